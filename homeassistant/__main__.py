@@ -108,6 +108,13 @@ def get_arguments() -> argparse.Namespace:
     parser.add_argument(
         "--log-no-color", action="store_true", help="Disable color logs"
     )
+    parser.add_argument(
+        "--json-backend",
+        choices=["auto", "json", "orjson"],
+        default="json",
+        help="Library to serialize JSON with, auto uses orjson when installed. "
+        "orjson writes NaN and infinity as null",
+    )
     parser.add_argument(
         "--runner",
         action="store_true",
@@ -307,6 +314,7 @@ def main() -> int:
         safe_mode=args.safe_mode,
         debug=args.debug,
         open_ui=args.open_ui,
+        json_backend=args.json_backend,
     )
 
     exit_code = runner.run(runtime_conf)
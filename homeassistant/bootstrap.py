@@ -17,6 +17,7 @@ from homeassistant import config as conf_util, config_entries, core, loader
 from homeassistant.components import http
 from homeassistant.const import REQUIRED_NEXT_PYTHON_DATE, REQUIRED_NEXT_PYTHON_VER
 from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.json import set_json_backend
 from homeassistant.helpers.typing import ConfigType
 from homeassistant.setup import (
     DATA_SETUP,
@@ -88,6 +89,9 @@ async def async_setup_hass(
         runtime_config.log_no_color,
     )
 
+    json_backend = set_json_backend(runtime_config.json_backend)
+    _LOGGER.debug("Serializing JSON with %s", json_backend)
+
     hass.config.skip_pip = runtime_config.skip_pip
     if runtime_config.skip_pip:
         _LOGGER.warning(
@@ -264,12 +264,17 @@ class DSMREntity(Entity):
         self._device_name = device_name
         self._device_serial = device_serial
         self._unique_id = f"{device_serial}_{name}".replace(" ", "_")
+        self._unit_of_measurement = None
 
     @callback
     def update_data(self, telegram):
         """Update data."""
         self.telegram = telegram
         if self.hass and self._obis in self.telegram:
+            unit_of_measurement = self.unit_of_measurement
+            if unit_of_measurement != self._unit_of_measurement:
+                self._unit_of_measurement = unit_of_measurement
+                self.async_invalidate_static_attributes()
             self.async_write_ha_state()
 
     def get_dsmr_object_attr(self, attribute):
@@ -340,6 +345,11 @@ class DSMREntity(Entity):
         """Force update."""
         return True
 
+    @property
+    def cache_static_attributes(self):
+        """Return True as the attributes only change with the unit."""
+        return True
+
     @property
     def should_poll(self):
         """Disable polling."""
@@ -1,6 +1,6 @@
 """Provide pre-made queries on top of the recorder component."""
-from collections import defaultdict
 from datetime import datetime as dt, timedelta
+from functools import partial
 from itertools import groupby
 import json
 import logging
@@ -14,11 +14,17 @@ import voluptuous as vol
 
 from homeassistant.components import recorder
 from homeassistant.components.http import HomeAssistantView
+from homeassistant.components.recorder.const import EXECUTOR_POOL
 from homeassistant.components.recorder.models import (
+    StateAttributes,
     States,
     process_timestamp,
     process_timestamp_to_utc_isoformat,
 )
+from homeassistant.components.recorder.statistics import (
+    STATISTICS_PERIODS,
+    statistics_during_period,
+)
 from homeassistant.components.recorder.util import execute, session_scope
 from homeassistant.const import (
     CONF_DOMAINS,
@@ -32,7 +38,9 @@ import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.entityfilter import (
     CONF_ENTITY_GLOBS,
     INCLUDE_EXCLUDE_BASE_FILTER_SCHEMA,
+    generate_filter,
 )
+from homeassistant.helpers.executor import async_add_executor_job
 from homeassistant.helpers.typing import HomeAssistantType
 import homeassistant.util.dt as dt_util
 
@@ -80,12 +88,23 @@ QUERY_STATES = [
     States.entity_id,
     States.state,
     States.attributes,
+    StateAttributes.shared_attrs,
     States.last_changed,
     States.last_updated,
 ]
 
 HISTORY_BAKERY = "history_bakery"
 
+# Rows fetched at once from the database cursor when streaming
+STREAM_ROWS_PER_BATCH = 1000
+
+
+def _query_states(session):
+    """Query the states with the attributes they share with other states."""
+    return session.query(*QUERY_STATES).outerjoin(
+        StateAttributes, States.attributes_id == StateAttributes.attributes_id
+    )
+
 
 def get_significant_states(hass, *args, **kwargs):
     """Wrap _get_significant_states with a sql session."""
@@ -103,6 +122,7 @@ def _get_significant_states(
     include_start_time_state=True,
     significant_changes_only=True,
     minimal_response=False,
+    max_points=None,
 ):
     """
     Return states changes during UTC period start_time - end_time.
@@ -110,12 +130,97 @@ def _get_significant_states(
     Significant states are all states where there is a state change,
     as well as all states from certain domains (for instance
     thermostat so that we get current temperature in our graphs).
+
+    With max_points, numeric states are downsampled to about max_points
+    states per entity while the rows are read from the database cursor.
     """
     timer_start = time.perf_counter()
 
-    baked_query = hass.data[HISTORY_BAKERY](
-        lambda session: session.query(*QUERY_STATES)
+    query = _significant_states_query(
+        hass,
+        session,
+        start_time,
+        end_time,
+        entity_ids,
+        filters,
+        significant_changes_only,
     )
+    if max_points:
+        states = query.with_post_criteria(
+            lambda q: q.yield_per(STREAM_ROWS_PER_BATCH)
+        )
+    else:
+        states = execute(query)
+
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            elapsed = time.perf_counter() - timer_start
+            _LOGGER.debug("get_significant_states took %fs", elapsed)
+
+    return _sorted_states_to_json(
+        hass,
+        session,
+        states,
+        start_time,
+        entity_ids,
+        filters,
+        include_start_time_state,
+        minimal_response,
+        end_time,
+        max_points,
+    )
+
+
+def _iter_significant_states(
+    hass,
+    start_time,
+    end_time,
+    entity_ids,
+    filters,
+    include_start_time_state,
+    significant_changes_only,
+    minimal_response,
+    max_points,
+):
+    """Yield the list of significant states of each entity.
+
+    Rows are read from the database cursor in batches while the lists are
+    consumed, so only the states of one entity are held in memory.
+    """
+    with session_scope(hass=hass) as session:
+        states = _significant_states_query(
+            hass,
+            session,
+            start_time,
+            end_time,
+            entity_ids,
+            filters,
+            significant_changes_only,
+        ).with_post_criteria(lambda q: q.yield_per(STREAM_ROWS_PER_BATCH))
+        initial_states = _get_initial_states(
+            hass, session, start_time, entity_ids, filters, include_start_time_state
+        )
+        for _, ent_results in _iter_entity_states(
+            states,
+            initial_states,
+            start_time,
+            minimal_response,
+            end_time,
+            max_points,
+        ):
+            yield ent_results
+
+
+def _significant_states_query(
+    hass,
+    session,
+    start_time,
+    end_time,
+    entity_ids,
+    filters,
+    significant_changes_only,
+):
+    """Return the query of the significant states sorted by entity."""
+    baked_query = hass.data[HISTORY_BAKERY](_query_states)
 
     if significant_changes_only:
         baked_query += lambda q: q.filter(
@@ -142,34 +247,15 @@ def _get_significant_states(
 
     baked_query += lambda q: q.order_by(States.entity_id, States.last_updated)
 
-    states = execute(
-        baked_query(session).params(
-            start_time=start_time, end_time=end_time, entity_ids=entity_ids
-        )
-    )
-
-    if _LOGGER.isEnabledFor(logging.DEBUG):
-        elapsed = time.perf_counter() - timer_start
-        _LOGGER.debug("get_significant_states took %fs", elapsed)
-
-    return _sorted_states_to_json(
-        hass,
-        session,
-        states,
-        start_time,
-        entity_ids,
-        filters,
-        include_start_time_state,
-        minimal_response,
+    return baked_query(session).params(
+        start_time=start_time, end_time=end_time, entity_ids=entity_ids
     )
 
 
 def state_changes_during_period(hass, start_time, end_time=None, entity_id=None):
     """Return states changes during UTC period start_time - end_time."""
     with session_scope(hass=hass) as session:
-        baked_query = hass.data[HISTORY_BAKERY](
-            lambda session: session.query(*QUERY_STATES)
-        )
+        baked_query = hass.data[HISTORY_BAKERY](_query_states)
 
         baked_query += lambda q: q.filter(
             (States.last_changed == States.last_updated)
@@ -182,7 +268,9 @@ def state_changes_during_period(hass, start_time, end_time=None, entity_id=None)
             )
 
         if entity_id is not None:
-            baked_query += lambda q: q.filter_by(entity_id=bindparam("entity_id"))
+            baked_query += lambda q: q.filter(
+                States.entity_id == bindparam("entity_id")
+            )
             entity_id = entity_id.lower()
 
         baked_query += lambda q: q.order_by(States.entity_id, States.last_updated)
@@ -203,13 +291,13 @@ def get_last_state_changes(hass, number_of_states, entity_id):
     start_time = dt_util.utcnow()
 
     with session_scope(hass=hass) as session:
-        baked_query = hass.data[HISTORY_BAKERY](
-            lambda session: session.query(*QUERY_STATES)
-        )
+        baked_query = hass.data[HISTORY_BAKERY](_query_states)
         baked_query += lambda q: q.filter(States.last_changed == States.last_updated)
 
         if entity_id is not None:
-            baked_query += lambda q: q.filter_by(entity_id=bindparam("entity_id"))
+            baked_query += lambda q: q.filter(
+                States.entity_id == bindparam("entity_id")
+            )
             entity_id = entity_id.lower()
 
         baked_query += lambda q: q.order_by(
@@ -270,7 +358,7 @@ def _get_states_with_session(
     # We have more than one entity to look at (most commonly we want
     # all entities,) so we need to do a search on all states since the
     # last recorder run started.
-    query = session.query(*QUERY_STATES)
+    query = _query_states(session)
 
     most_recent_states_by_date = session.query(
         States.entity_id.label("max_entity_id"),
@@ -318,9 +406,7 @@ def _get_states_with_session(
 def _get_single_entity_states_with_session(hass, session, utc_point_in_time, entity_id):
     # Use an entirely different (and extremely fast) query if we only
     # have a single entity id
-    baked_query = hass.data[HISTORY_BAKERY](
-        lambda session: session.query(*QUERY_STATES)
-    )
+    baked_query = hass.data[HISTORY_BAKERY](_query_states)
     baked_query += lambda q: q.filter(
         States.last_updated < bindparam("utc_point_in_time"),
         States.entity_id == bindparam("entity_id"),
@@ -344,6 +430,8 @@ def _sorted_states_to_json(
     filters=None,
     include_start_time_state=True,
     minimal_response=False,
+    end_time=None,
+    max_points=None,
 ):
     """Convert SQL results into JSON friendly data structure.
 
@@ -356,26 +444,67 @@ def _sorted_states_to_json(
     each list of states, otherwise our graphs won't start on the Y
     axis correctly.
     """
-    result = defaultdict(list)
+    result = {}
     # Set all entity IDs to empty lists in result set to maintain the order
     if entity_ids is not None:
         for ent_id in entity_ids:
             result[ent_id] = []
 
-    # Get the states at the start time
+    initial_states = _get_initial_states(
+        hass, session, start_time, entity_ids, filters, include_start_time_state
+    )
+    for ent_id in initial_states:
+        result.setdefault(ent_id, [])
+
+    for ent_id, ent_results in _iter_entity_states(
+        states,
+        initial_states,
+        start_time,
+        minimal_response,
+        end_time,
+        max_points,
+    ):
+        result[ent_id] = ent_results
+
+    # Filter out the empty lists if some states had 0 results.
+    return {key: val for key, val in result.items() if val}
+
+
+def _get_initial_states(
+    hass, session, start_time, entity_ids, filters, include_start_time_state
+):
+    """Return the states at the start time by entity_id."""
+    initial_states = {}
+    if not include_start_time_state:
+        return initial_states
+
     timer_start = time.perf_counter()
-    if include_start_time_state:
-        run = recorder.run_information_from_instance(hass, start_time)
-        for state in _get_states_with_session(
-            hass, session, start_time, entity_ids, run=run, filters=filters
-        ):
-            state.last_changed = start_time
-            state.last_updated = start_time
-            result[state.entity_id].append(state)
+    run = recorder.run_information_from_instance(hass, start_time)
+    for state in _get_states_with_session(
+        hass, session, start_time, entity_ids, run=run, filters=filters
+    ):
+        state.last_changed = start_time
+        state.last_updated = start_time
+        initial_states[state.entity_id] = state
 
     if _LOGGER.isEnabledFor(logging.DEBUG):
         elapsed = time.perf_counter() - timer_start
-        _LOGGER.debug("getting %d first datapoints took %fs", len(result), elapsed)
+        _LOGGER.debug(
+            "getting %d first datapoints took %fs", len(initial_states), elapsed
+        )
+    return initial_states
+
+
+def _iter_entity_states(
+    states, initial_states, start_time, minimal_response, end_time, max_points
+):
+    """Yield the entity_id and the list of states of each entity.
+
+    States must be sorted by entity_id and last_updated, the states of an
+    entity are consumed when its list is yielded. Entities that only have
+    a state at the start time come last.
+    """
+    initial_states = dict(initial_states)
 
     # Called in a tight loop so cache the function
     # here
@@ -383,10 +512,15 @@ def _sorted_states_to_json(
 
     # Append all changes to it
     for ent_id, group in groupby(states, lambda state: state.entity_id):
+        if max_points:
+            group = _downsample(group, start_time, end_time, max_points)
         domain = split_entity_id(ent_id)[0]
-        ent_results = result[ent_id]
+        initial_state = initial_states.pop(ent_id, None)
+        ent_results = [initial_state] if initial_state else []
         if not minimal_response or domain in NEED_ATTRIBUTE_DOMAINS:
             ent_results.extend(LazyState(db_state) for db_state in group)
+            yield ent_id, ent_results
+            continue
 
         # With minimal response we only provide a native
         # State for the first and last response. All the states
@@ -420,8 +554,71 @@ def _sorted_states_to_json(
             # a full state
             ent_results[-1] = LazyState(prev_state)
 
-    # Filter out the empty lists if some states had 0 results.
-    return {key: val for key, val in result.items() if val}
+        yield ent_id, ent_results
+
+    for ent_id, initial_state in initial_states.items():
+        yield ent_id, [initial_state]
+
+
+def _downsample(states, start_time, end_time, max_points):
+    """Reduce the numeric states of an entity to min/max buckets.
+
+    The period is divided in max_points / 2 buckets of equal length and only
+    the lowest and the highest numeric state of each bucket are kept, in the
+    order they happened. Non-numeric states, eg. unavailable, are always kept.
+    States must be sorted by last_updated, they are consumed one at a time.
+    """
+    if end_time is None:
+        end_time = dt_util.utcnow()
+    buckets = max(max_points // 2, 1)
+    bucket_length = max((end_time - start_time).total_seconds() / buckets, 1)
+    start_timestamp = process_timestamp(start_time).timestamp()
+
+    bucket = None
+    min_state = max_state = None
+    min_value = max_value = 0.0
+    for db_state in states:
+        try:
+            value = float(db_state.state)
+        except (TypeError, ValueError):
+            value = None
+
+        if value is not None:
+            state_bucket = int(
+                (process_timestamp(db_state.last_updated).timestamp() - start_timestamp)
+                // bucket_length
+            )
+            if state_bucket == bucket:
+                if value < min_value:
+                    min_state, min_value = db_state, value
+                elif value > max_value:
+                    max_state, max_value = db_state, value
+                continue
+
+        if min_state is not None:
+            yield from _bucket_states(min_state, max_state)
+            min_state = max_state = None
+            bucket = None
+
+        if value is None:
+            yield db_state
+            continue
+
+        bucket = state_bucket
+        min_state = max_state = db_state
+        min_value = max_value = value
+
+    if min_state is not None:
+        yield from _bucket_states(min_state, max_state)
+
+
+def _bucket_states(min_state, max_state):
+    """Return the lowest and highest state of a bucket in time order."""
+    if min_state is max_state:
+        return (min_state,)
+    if min_state.last_updated <= max_state.last_updated:
+        return (min_state, max_state)
+    return (max_state, min_state)
 
 
 def get_state(hass, utc_point_in_time, entity_id, run=None):
@@ -462,7 +659,7 @@ class HistoryPeriodView(HomeAssistantView):
 
     async def get(
         self, request: web.Request, datetime: Optional[str] = None
-    ) -> web.Response:
+    ) -> web.StreamResponse:
         """Return history over a period of time."""
         datetime_ = None
         if datetime:
@@ -495,6 +692,29 @@ class HistoryPeriodView(HomeAssistantView):
         entity_ids = None
         if entity_ids_str:
             entity_ids = entity_ids_str.lower().split(",")
+
+        hass = request.app["hass"]
+
+        statistics_period = request.query.get("statistics")
+        if statistics_period is not None:
+            period = STATISTICS_PERIODS.get(statistics_period)
+            if period is None:
+                return self.json_message("Invalid statistics period", HTTP_BAD_REQUEST)
+            return cast(
+                web.Response,
+                await async_add_executor_job(
+                    hass,
+                    DOMAIN,
+                    self._statistics_json,
+                    hass,
+                    start_time,
+                    end_time,
+                    entity_ids,
+                    period,
+                    pool=EXECUTOR_POOL,
+                ),
+            )
+
         include_start_time_state = "skip_initial_state" not in request.query
         significant_changes_only = (
             request.query.get("significant_changes_only", "1") != "0"
@@ -502,7 +722,15 @@ class HistoryPeriodView(HomeAssistantView):
 
         minimal_response = "minimal_response" in request.query
 
-        hass = request.app["hass"]
+        max_points = None
+        max_points_str = request.query.get("max_points")
+        if max_points_str:
+            try:
+                max_points = int(max_points_str)
+            except ValueError:
+                max_points = 0
+            if max_points < 1:
+                return self.json_message("Invalid max_points", HTTP_BAD_REQUEST)
 
         if (
             not include_start_time_state
@@ -511,9 +739,32 @@ class HistoryPeriodView(HomeAssistantView):
         ):
             return self.json([])
 
+        if "stream" in request.query:
+            # The configured include order is not applied to streamed
+            # responses as it would require holding all states
+            return await self.json_stream(
+                request,
+                partial(
+                    _iter_significant_states,
+                    hass,
+                    start_time,
+                    end_time,
+                    entity_ids,
+                    self.filters,
+                    include_start_time_state,
+                    significant_changes_only,
+                    minimal_response,
+                    max_points,
+                ),
+                domain=DOMAIN,
+                pool=EXECUTOR_POOL,
+            )
+
         return cast(
             web.Response,
-            await hass.async_add_executor_job(
+            await async_add_executor_job(
+                hass,
+                DOMAIN,
                 self._sorted_significant_states_json,
                 hass,
                 start_time,
@@ -522,9 +773,44 @@ class HistoryPeriodView(HomeAssistantView):
                 include_start_time_state,
                 significant_changes_only,
                 minimal_response,
+                max_points,
+                pool=EXECUTOR_POOL,
             ),
         )
 
+    def _statistics_json(self, hass, start_time, end_time, entity_ids, period):
+        """Fetch the long-term statistics from the database as json."""
+        timer_start = time.perf_counter()
+        result = statistics_during_period(
+            hass, start_time, end_time, entity_ids, period
+        )
+        if self.filters:
+            entity_filter = self.filters.entity_id_filter()
+            result = {
+                entity_id: rows
+                for entity_id, rows in result.items()
+                if entity_filter(entity_id)
+            }
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            elapsed = time.perf_counter() - timer_start
+            _LOGGER.debug(
+                "Extracted %d statistics in %fs",
+                sum(map(len, result.values())),
+                elapsed,
+            )
+
+        # Optionally reorder the result to respect the ordering given
+        # by any entities explicitly included in the configuration.
+        if self.filters and self.use_include_order:
+            ordered = [
+                result.pop(order_entity)
+                for order_entity in self.filters.included_entities
+                if order_entity in result
+            ]
+            return self.json(ordered + list(result.values()))
+
+        return self.json(list(result.values()))
+
     def _sorted_significant_states_json(
         self,
         hass,
@@ -534,6 +820,7 @@ class HistoryPeriodView(HomeAssistantView):
         include_start_time_state,
         significant_changes_only,
         minimal_response,
+        max_points,
     ):
         """Fetch significant stats from the database as json."""
         timer_start = time.perf_counter()
@@ -549,6 +836,7 @@ class HistoryPeriodView(HomeAssistantView):
                 include_start_time_state,
                 significant_changes_only,
                 minimal_response,
+                max_points,
             )
 
         result = list(result.values())
@@ -634,6 +922,17 @@ class Filters:
 
         baked_query += lambda q: q.filter(self.entity_filter())
 
+    def entity_id_filter(self):
+        """Generate a filter on the entity ids of rows without a domain."""
+        return generate_filter(
+            self.included_domains,
+            self.included_entities,
+            self.excluded_domains,
+            self.excluded_entities,
+            self.included_entity_globs,
+            self.excluded_entity_globs,
+        )
+
     def entity_filter(self):
         """Generate the entity filter query."""
         includes = []
@@ -710,7 +1009,9 @@ class LazyState(State):
         """State attributes."""
         if not self._attributes:
             try:
-                self._attributes = json.loads(self._row.attributes)
+                self._attributes = json.loads(
+                    self._row.shared_attrs or self._row.attributes
+                )
             except ValueError:
                 # When json.loads fails
                 _LOGGER.exception("Error converting row to state: %s", self)
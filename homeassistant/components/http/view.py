@@ -1,8 +1,9 @@
 """Support for views."""
 import asyncio
-import json
+import concurrent.futures
 import logging
-from typing import Any, Callable, List, Optional
+import threading
+from typing import Any, Callable, Iterable, Iterator, List, Optional
 
 from aiohttp import web
 from aiohttp.typedefs import LooseHeaders
@@ -16,12 +17,20 @@ import voluptuous as vol
 from homeassistant import exceptions
 from homeassistant.const import CONTENT_TYPE_JSON, HTTP_OK, HTTP_SERVICE_UNAVAILABLE
 from homeassistant.core import Context, is_callback
-from homeassistant.helpers.json import JSONEncoder
+from homeassistant.helpers.executor import DEFAULT_POOL, async_add_executor_job
+from homeassistant.helpers.json import json_dumps
 
 from .const import KEY_AUTHENTICATED, KEY_HASS
 
 _LOGGER = logging.getLogger(__name__)
 
+# Number of items serialized into a chunk of a streamed JSON response
+JSON_STREAM_CHUNK_ITEMS = 100
+# Number of serialized chunks waiting to be sent to the client
+JSON_STREAM_MAX_CHUNKS = 4
+# Seconds after which the producer checks if the client went away
+JSON_STREAM_PUT_TIMEOUT = 1
+
 
 class HomeAssistantView:
     """Base view for all views."""
@@ -49,12 +58,21 @@ class HomeAssistantView:
     ) -> web.Response:
         """Return a JSON response."""
         try:
-            msg = json.dumps(result, cls=JSONEncoder, allow_nan=False).encode("UTF-8")
+            msg = json_dumps(result)
         except (ValueError, TypeError) as err:
             _LOGGER.error("Unable to serialize to JSON: %s\n%s", err, result)
             raise HTTPInternalServerError from err
+        return HomeAssistantView.json_encoded(msg, status_code, headers)
+
+    @staticmethod
+    def json_encoded(
+        msg: str,
+        status_code: int = HTTP_OK,
+        headers: Optional[LooseHeaders] = None,
+    ) -> web.Response:
+        """Return a JSON response of already serialized JSON."""
         response = web.Response(
-            body=msg,
+            body=msg.encode("UTF-8"),
             content_type=CONTENT_TYPE_JSON,
             status=status_code,
             headers=headers,
@@ -62,6 +80,79 @@ class HomeAssistantView:
         response.enable_compression()
         return response
 
+    async def json_stream(
+        self,
+        request: web.Request,
+        items: Callable[[], Iterable[Any]],
+        status_code: int = HTTP_OK,
+        *,
+        domain: Optional[str] = None,
+        pool: str = DEFAULT_POOL,
+    ) -> web.StreamResponse:
+        """Stream a JSON array of items to the client.
+
+        The items callable runs in the executor and may return a generator,
+        eg. one reading rows from a database cursor. Items are serialized
+        in the executor too and only a few chunks are held in memory.
+
+        With a domain, the items are produced in the executor pool with the
+        executor quota of the integration.
+        """
+        hass = request.app[KEY_HASS]
+        chunks: asyncio.Queue = asyncio.Queue(JSON_STREAM_MAX_CHUNKS)
+        cancelled = threading.Event()
+
+        def put_chunk(chunk: Optional[bytes]) -> bool:
+            """Hand a chunk to the response, False if the client went away."""
+            future = asyncio.run_coroutine_threadsafe(chunks.put(chunk), hass.loop)
+            while True:
+                try:
+                    future.result(JSON_STREAM_PUT_TIMEOUT)
+                    return True
+                except concurrent.futures.TimeoutError:
+                    if cancelled.is_set():
+                        future.cancel()
+                        return False
+
+        def produce() -> None:
+            """Serialize the items into chunks."""
+            try:
+                for chunk in _json_array_chunks(items()):
+                    if not put_chunk(chunk):
+                        return
+            finally:
+                put_chunk(None)
+
+        if domain is None:
+            producer = hass.async_add_executor_job(produce)
+        else:
+            producer = async_add_executor_job(hass, domain, produce, pool=pool)
+        try:
+            chunk = await chunks.get()
+            if chunk is None:
+                # Nothing was serialized, the producer failed
+                await _wait_producer(producer)
+            response = web.StreamResponse(status=status_code)
+            response.content_type = CONTENT_TYPE_JSON
+            response.enable_compression()
+            await response.prepare(request)
+            while chunk is not None:
+                await response.write(chunk)
+                chunk = await chunks.get()
+            try:
+                await producer
+            except Exception:  # pylint: disable=broad-except
+                # The status was sent already, abort the connection so the
+                # client can't take the partial JSON for the complete result
+                _LOGGER.exception("Error streaming JSON to %s", request.path)
+                if request.transport is not None:
+                    request.transport.close()
+                return response
+            await response.write_eof()
+            return response
+        finally:
+            cancelled.set()
+
     def json_message(
         self,
         message: str,
@@ -99,6 +190,30 @@ class HomeAssistantView:
             app["allow_cors"](route)
 
 
+def _json_array_chunks(items: Iterable[Any]) -> Iterator[bytes]:
+    """Serialize items into the chunks of a JSON array."""
+    fragments = []
+    separator = "["
+    for item in items:
+        fragments.append(separator)
+        fragments.append(json_dumps(item))
+        separator = ","
+        if len(fragments) >= 2 * JSON_STREAM_CHUNK_ITEMS:
+            yield "".join(fragments).encode("UTF-8")
+            fragments = []
+    fragments.append("]" if separator == "," else "[]")
+    yield "".join(fragments).encode("UTF-8")
+
+
+async def _wait_producer(producer: asyncio.Future) -> None:
+    """Wait for the producer of a JSON stream and raise its errors."""
+    try:
+        await producer
+    except (ValueError, TypeError) as err:
+        _LOGGER.error("Unable to serialize to JSON: %s", err)
+        raise HTTPInternalServerError from err
+
+
 def request_handler_factory(view: HomeAssistantView, handler: Callable) -> Callable:
     """Wrap the handler classes."""
     assert asyncio.iscoroutinefunction(handler) or is_callback(
@@ -143,6 +143,7 @@ class IntegrationSensor(RestoreEntity):
                 self._unit_of_measurement = self._unit_template.format(
                     "" if unit is None else unit
                 )
+                self.async_invalidate_static_attributes()
 
             try:
                 # integration as the Riemann integral of previous measures.
@@ -200,6 +201,11 @@ class IntegrationSensor(RestoreEntity):
         """No polling needed."""
         return False
 
+    @property
+    def cache_static_attributes(self):
+        """Return True as the attributes only change with the unit."""
+        return True
+
     @property
     def device_state_attributes(self):
         """Return the state attributes of the sensor."""
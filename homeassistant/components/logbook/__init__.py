@@ -1,5 +1,7 @@
 """Event parser and human readable log generator."""
+from collections import OrderedDict
 from datetime import timedelta
+from functools import partial
 from itertools import groupby
 import json
 import re
@@ -12,8 +14,10 @@ import voluptuous as vol
 from homeassistant.components.automation import EVENT_AUTOMATION_TRIGGERED
 from homeassistant.components.history import sqlalchemy_filter_from_include_exclude_conf
 from homeassistant.components.http import HomeAssistantView
+from homeassistant.components.recorder.const import EXECUTOR_POOL
 from homeassistant.components.recorder.models import (
     Events,
+    StateAttributes,
     States,
     process_timestamp_to_utc_isoformat,
 )
@@ -41,6 +45,7 @@ from homeassistant.helpers.entityfilter import (
     convert_include_exclude_filter,
     generate_filter,
 )
+from homeassistant.helpers.executor import async_add_executor_job
 from homeassistant.helpers.integration_platform import (
     async_process_integration_platforms,
 )
@@ -62,6 +67,9 @@ DOMAIN = "logbook"
 
 GROUP_BY_MINUTES = 15
 
+# Contexts whose first event is kept while reading the events of a period
+CONTEXT_LOOKUP_SIZE = 1024
+
 EMPTY_JSON_OBJECT = "{}"
 UNIT_OF_MEASUREMENT_JSON = '"unit_of_measurement":'
 
@@ -95,6 +103,11 @@ EVENT_COLUMNS = [
     Events.context_user_id,
 ]
 
+# Attributes of states recorded before they were deduplicated are inline
+STATE_ATTRIBUTES = sqlalchemy.func.coalesce(
+    StateAttributes.shared_attrs, States.attributes
+)
+
 SCRIPT_AUTOMATION_EVENTS = [EVENT_AUTOMATION_TRIGGERED, EVENT_SCRIPT_STARTED]
 
 LOG_MESSAGE_SCHEMA = vol.Schema(
@@ -233,6 +246,23 @@ class LogbookView(HomeAssistantView):
 
         entity_matches_only = "entity_matches_only" in request.query
 
+        if "stream" in request.query:
+            return await self.json_stream(
+                request,
+                partial(
+                    _iter_events,
+                    hass,
+                    start_day,
+                    end_day,
+                    entity_ids,
+                    self.filters,
+                    self.entities_filter,
+                    entity_matches_only,
+                ),
+                domain=DOMAIN,
+                pool=EXECUTOR_POOL,
+            )
+
         def json_events():
             """Fetch events and generate JSON."""
             return self.json(
@@ -247,7 +277,9 @@ class LogbookView(HomeAssistantView):
                 )
             )
 
-        return await hass.async_add_executor_job(json_events)
+        return await async_add_executor_job(
+            hass, DOMAIN, json_events, pool=EXECUTOR_POOL
+        )
 
 
 def humanify(hass, events, entity_attr_cache, context_lookup):
@@ -421,15 +453,37 @@ def _get_events(
     entity_matches_only=False,
 ):
     """Get events for a period of time."""
+    return list(
+        _iter_events(
+            hass,
+            start_day,
+            end_day,
+            entity_ids,
+            filters,
+            entities_filter,
+            entity_matches_only,
+        )
+    )
+
+
+def _iter_events(
+    hass,
+    start_day,
+    end_day,
+    entity_ids=None,
+    filters=None,
+    entities_filter=None,
+    entity_matches_only=False,
+):
+    """Yield the logbook entries of a period of time as they are read."""
 
     entity_attr_cache = EntityAttributeCache(hass)
-    context_lookup = {None: None}
 
-    def yield_events(query):
+    def yield_events(query, context_lookup):
         """Yield Events that are not filtered away."""
         for row in query.yield_per(1000):
             event = LazyEventPartialState(row)
-            context_lookup.setdefault(event.context_id, event)
+            context_lookup.add(event)
             if event.event_type == EVENT_CALL_SERVICE:
                 continue
             if event.event_type == EVENT_STATE_CHANGED or _keep_event(
@@ -473,10 +527,11 @@ def _get_events(
                     filters.entity_filter() | (Events.event_type != EVENT_STATE_CHANGED)
                 )
 
+        context_lookup = ContextLookup(hass, query)
         query = query.order_by(Events.time_fired)
 
-        return list(
-            humanify(hass, yield_events(query), entity_attr_cache, context_lookup)
+        yield from humanify(
+            hass, yield_events(query, context_lookup), entity_attr_cache, context_lookup
         )
 
 
@@ -486,7 +541,7 @@ def _generate_events_query(session):
         States.state,
         States.entity_id,
         States.domain,
-        States.attributes,
+        STATE_ATTRIBUTES.label("attributes"),
     )
 
 
@@ -505,6 +560,9 @@ def _generate_states_query(session, start_day, end_day, old_state, entity_ids):
         _generate_events_query(session)
         .outerjoin(Events, (States.event_id == Events.event_id))
         .outerjoin(old_state, (States.old_state_id == old_state.state_id))
+        .outerjoin(
+            StateAttributes, (States.attributes_id == StateAttributes.attributes_id)
+        )
         .filter(_missing_state_matcher(old_state))
         .filter(_continuous_entity_matcher())
         .filter((States.last_updated > start_day) & (States.last_updated < end_day))
@@ -519,6 +577,9 @@ def _apply_events_types_and_states_filter(hass, query, old_state):
     events_query = (
         query.outerjoin(States, (Events.event_id == States.event_id))
         .outerjoin(old_state, (States.old_state_id == old_state.state_id))
+        .outerjoin(
+            StateAttributes, (States.attributes_id == StateAttributes.attributes_id)
+        )
         .filter(
             (Events.event_type != EVENT_STATE_CHANGED)
             | _missing_state_matcher(old_state)
@@ -548,7 +609,7 @@ def _continuous_entity_matcher():
     #
     return sqlalchemy.or_(
         sqlalchemy.not_(States.domain.in_(CONTINUOUS_DOMAINS)),
-        sqlalchemy.not_(States.attributes.contains(UNIT_OF_MEASUREMENT_JSON)),
+        sqlalchemy.not_(STATE_ATTRIBUTES.contains(UNIT_OF_MEASUREMENT_JSON)),
     )
 
 
@@ -689,6 +750,14 @@ class LazyEventPartialState:
         self.context_user_id = self._row.context_user_id
         self.time_fired_minute = self._row.time_fired.minute
 
+    def __eq__(self, other):
+        """Return if both are the same row, also when it was read again."""
+        return isinstance(other, LazyEventPartialState) and self._row == other._row
+
+    def __hash__(self):
+        """Return the hash of the row."""
+        return hash(self._row)
+
     @property
     def attributes_icon(self):
         """Extract the icon from the decoded attributes or json."""
@@ -750,6 +819,65 @@ class LazyEventPartialState:
         return self._time_fired_isoformat
 
 
+class ContextLookup:
+    """The first event of the contexts of the events read from the database.
+
+    The events of the most recently seen contexts are kept. Once contexts were
+    dropped, a context that is seen again can't tell if it is new, so the first
+    events of the contexts seen since are looked up with the query the events
+    are read with.
+    """
+
+    def __init__(self, hass, query):
+        """Init the lookup."""
+        self._hass = hass
+        self._query = query
+        self._events = OrderedDict()
+        self._unverified = set()
+        self._dropped = False
+
+    def add(self, event):
+        """Add an event read from the database."""
+        context_id = event.context_id
+        if context_id is None:
+            return
+        if context_id in self._events:
+            self._events.move_to_end(context_id)
+            return
+        self._events[context_id] = event
+        if self._dropped:
+            self._unverified.add(context_id)
+        if len(self._events) > CONTEXT_LOOKUP_SIZE:
+            dropped_id, _ = self._events.popitem(last=False)
+            self._unverified.discard(dropped_id)
+            self._dropped = True
+
+    def get(self, context_id):
+        """Return the first event of a context."""
+        if context_id is None:
+            return None
+        event = self._events.get(context_id)
+        if event is not None and context_id not in self._unverified:
+            return event
+
+        event = self._first_event(context_id) or event
+        if context_id in self._events:
+            self._events[context_id] = event
+            self._unverified.discard(context_id)
+        return event
+
+    def _first_event(self, context_id):
+        """Look up the first event of a context in the database."""
+        with session_scope(hass=self._hass) as session:
+            row = (
+                self._query.with_session(session)
+                .filter(Events.context_id == context_id)
+                .order_by(Events.time_fired)
+                .first()
+            )
+        return row and LazyEventPartialState(row)
+
+
 class EntityAttributeCache:
     """A cache to lookup static entity_id attribute.
 
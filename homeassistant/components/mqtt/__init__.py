@@ -1,6 +1,7 @@
 """Support for MQTT message handling."""
 import asyncio
-from functools import lru_cache, partial, wraps
+from collections import deque
+from functools import partial, wraps
 import inspect
 from itertools import groupby
 import json
@@ -8,8 +9,9 @@ import logging
 from operator import attrgetter
 import os
 import ssl
+import threading
 import time
-from typing import Any, Callable, List, Optional, Union
+from typing import Any, Callable, Deque, List, Optional, Tuple, Union
 import uuid
 
 import attr
@@ -84,6 +86,7 @@ from .discovery import (
 )
 from .models import Message, MessageCallbackType, PublishPayloadType
 from .subscription import async_subscribe_topics, async_unsubscribe_topics
+from .topic_trie import TopicTrie
 from .util import _VALID_QOS_SCHEMA, valid_publish_topic, valid_subscribe_topic
 
 _LOGGER = logging.getLogger(__name__)
@@ -117,6 +120,8 @@ CONF_MODEL = "model"
 CONF_SW_VERSION = "sw_version"
 CONF_VIA_DEVICE = "via_device"
 CONF_DEPRECATED_VIA_HUB = "via_hub"
+CONF_MESSAGE_BATCH_SIZE = "message_batch_size"
+CONF_MESSAGE_BATCH_LATENCY = "message_batch_latency"
 
 PROTOCOL_31 = "3.1"
 
@@ -124,6 +129,8 @@ DEFAULT_PORT = 1883
 DEFAULT_KEEPALIVE = 60
 DEFAULT_PROTOCOL = PROTOCOL_311
 DEFAULT_TLS_PROTOCOL = "auto"
+DEFAULT_MESSAGE_BATCH_SIZE = 100
+DEFAULT_MESSAGE_BATCH_LATENCY = 0
 
 ATTR_PAYLOAD_TEMPLATE = "payload_template"
 
@@ -228,6 +235,13 @@ CONFIG_SCHEMA = vol.Schema(
                     vol.Optional(
                         CONF_DISCOVERY_PREFIX, default=DEFAULT_PREFIX
                     ): valid_publish_topic,
+                    vol.Optional(
+                        CONF_MESSAGE_BATCH_SIZE, default=DEFAULT_MESSAGE_BATCH_SIZE
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+                    vol.Optional(
+                        CONF_MESSAGE_BATCH_LATENCY,
+                        default=DEFAULT_MESSAGE_BATCH_LATENCY,
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0, max=1)),
                 }
             ),
         )
@@ -494,6 +508,7 @@ async def async_setup(hass: HomeAssistantType, config: ConfigType) -> bool:
     websocket_api.async_register_command(hass, websocket_subscribe)
     websocket_api.async_register_command(hass, websocket_remove_device)
     websocket_api.async_register_command(hass, websocket_mqtt_info)
+    websocket_api.async_register_command(hass, websocket_message_stats)
 
     if conf is None:
         # If we have a config entry, setup is done by that config entry.
@@ -633,7 +648,6 @@ class Subscription:
     """Class to hold data about an active subscription."""
 
     topic: str = attr.ib()
-    matcher: Any = attr.ib()
     job: HassJob = attr.ib()
     qos: int = attr.ib(default=0)
     encoding: str = attr.ib(default="utf-8")
@@ -657,6 +671,7 @@ class MQTT:
         self.config_entry = config_entry
         self.conf = conf
         self.subscriptions: List[Subscription] = []
+        self._subscriptions_by_topic = TopicTrie()
         self.connected = False
         self._ha_started = asyncio.Event()
         self._last_subscribe = time.time()
@@ -665,6 +680,20 @@ class MQTT:
 
         self._pending_operations = {}
 
+        # Messages received by the paho thread, waiting to be handled
+        self._pending_messages: Deque[Tuple[float, Any]] = deque()
+        self._pending_messages_lock = threading.Lock()
+        self._drain_scheduled = False
+        self._batch_size = conf.get(CONF_MESSAGE_BATCH_SIZE, DEFAULT_MESSAGE_BATCH_SIZE)
+        self._batch_latency = conf.get(
+            CONF_MESSAGE_BATCH_LATENCY, DEFAULT_MESSAGE_BATCH_LATENCY
+        )
+        self.messages_received = 0
+        self.message_batches = 0
+        self.peak_queue_depth = 0
+        self.last_drain_latency = 0.0
+        self.max_drain_latency = 0.0
+
         if self.hass.state == CoreState.running:
             self._ha_started.set()
         else:
@@ -843,11 +872,9 @@ class MQTT:
         if not isinstance(topic, str):
             raise HomeAssistantError("Topic needs to be a string!")
 
-        subscription = Subscription(
-            topic, _matcher_for_topic(topic), HassJob(msg_callback), qos, encoding
-        )
+        subscription = Subscription(topic, HassJob(msg_callback), qos, encoding)
         self.subscriptions.append(subscription)
-        self._matching_subscriptions.cache_clear()
+        self._subscriptions_by_topic.add(topic, subscription)
 
         # Only subscribe if currently connected.
         if self.connected:
@@ -857,12 +884,11 @@ class MQTT:
         @callback
         def async_remove() -> None:
             """Remove subscription."""
-            if subscription not in self.subscriptions:
+            if not self._subscriptions_by_topic.remove(topic, subscription):
                 raise HomeAssistantError("Can't remove subscription twice")
             self.subscriptions.remove(subscription)
-            self._matching_subscriptions.cache_clear()
 
-            if any(other.topic == topic for other in self.subscriptions):
+            if self._subscriptions_by_topic.get(topic):
                 # Other subscriptions on topic remaining - don't unsubscribe.
                 return
 
@@ -950,16 +976,70 @@ class MQTT:
             )
 
     def _mqtt_on_message(self, _mqttc, _userdata, msg) -> None:
-        """Message received callback."""
-        self.hass.add_job(self._mqtt_handle_message, msg)
+        """Message received callback.
+
+        Messages are queued and handled in batches, so a flood of messages
+        wakes up the event loop once and not once per message.
+        """
+        with self._pending_messages_lock:
+            self._pending_messages.append((time.monotonic(), msg))
+            if self._drain_scheduled:
+                return
+            self._drain_scheduled = True
+        self.hass.loop.call_soon_threadsafe(self._async_schedule_drain)
+
+    @callback
+    def _async_schedule_drain(self) -> None:
+        """Handle the queued messages once the batch latency has passed."""
+        if self._batch_latency:
+            self.hass.loop.call_later(self._batch_latency, self._async_drain_messages)
+        else:
+            self._async_drain_messages()
+
+    @callback
+    def _async_drain_messages(self) -> None:
+        """Handle a batch of queued messages.
+
+        The messages left after a full batch are handled in the next
+        iteration of the event loop to let other callbacks run in between.
+        """
+        with self._pending_messages_lock:
+            pending = self._pending_messages
+            queue_depth = len(pending)
+            batch = [
+                pending.popleft() for _ in range(min(queue_depth, self._batch_size))
+            ]
+            more_pending = self._drain_scheduled = bool(pending)
+
+        if not batch:
+            return
+
+        self.messages_received += len(batch)
+        self.message_batches += 1
+        self.peak_queue_depth = max(self.peak_queue_depth, queue_depth)
+        self.last_drain_latency = time.monotonic() - batch[0][0]
+        self.max_drain_latency = max(self.max_drain_latency, self.last_drain_latency)
 
-    @lru_cache(2048)
-    def _matching_subscriptions(self, topic):
-        subscriptions = []
-        for subscription in self.subscriptions:
-            if subscription.matcher(topic):
-                subscriptions.append(subscription)
-        return subscriptions
+        for _, msg in batch:
+            try:
+                self._mqtt_handle_message(msg)
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Error handling message on %s", msg.topic)
+
+        if more_pending:
+            self.hass.loop.call_soon(self._async_drain_messages)
+
+    @callback
+    def async_message_stats(self) -> dict:
+        """Return the counters of the received messages."""
+        return {
+            "queue_depth": len(self._pending_messages),
+            "peak_queue_depth": self.peak_queue_depth,
+            "messages_received": self.messages_received,
+            "message_batches": self.message_batches,
+            "last_drain_latency": self.last_drain_latency,
+            "max_drain_latency": self.max_drain_latency,
+        }
 
     @callback
     def _mqtt_handle_message(self, msg) -> None:
@@ -971,7 +1051,7 @@ class MQTT:
         )
         timestamp = dt_util.utcnow()
 
-        subscriptions = self._matching_subscriptions(msg.topic)
+        subscriptions = self._subscriptions_by_topic.match(msg.topic)
 
         for subscription in subscriptions:
 
@@ -1069,16 +1149,6 @@ def _raise_on_error(result_code: int) -> None:
         )
 
 
-def _matcher_for_topic(subscription: str) -> Any:
-    # pylint: disable=import-outside-toplevel
-    from paho.mqtt.matcher import MQTTMatcher
-
-    matcher = MQTTMatcher()
-    matcher[subscription] = True
-
-    return lambda topic: next(matcher.iter_match(topic), False)
-
-
 class MqttAttributes(Entity):
     """Mixin used for platforms that support JSON attributes."""
 
@@ -1420,6 +1490,19 @@ async def websocket_mqtt_info(hass, connection, msg):
     connection.send_result(msg["id"], mqtt_info)
 
 
+@callback
+@websocket_api.websocket_command({vol.Required("type"): "mqtt/message_stats"})
+def websocket_message_stats(hass, connection, msg):
+    """Get the counters of the messages received from the broker."""
+    if DATA_MQTT not in hass.data:
+        connection.send_error(
+            msg["id"], websocket_api.const.ERR_NOT_FOUND, "MQTT is not set up"
+        )
+        return
+
+    connection.send_result(msg["id"], hass.data[DATA_MQTT].async_message_stats())
+
+
 @websocket_api.websocket_command(
     {vol.Required("type"): "mqtt/device/remove", vol.Required("device_id"): str}
 )
@@ -0,0 +1,106 @@
+"""Match topics against the topic filters of MQTT subscriptions."""
+from typing import Any, Dict, List, Optional
+
+
+class _TopicNode:
+    """A level of a topic filter."""
+
+    __slots__ = ("children", "items")
+
+    def __init__(self) -> None:
+        """Initialize the node."""
+        self.children: Dict[str, "_TopicNode"] = {}
+        self.items: List[Any] = []
+
+
+class TopicTrie:
+    """Items stored by topic filter, with one level of the filter per node.
+
+    Matching a topic walks the trie once, following the topic levels and the
+    + and # wildcards, so it costs the depth of the topic and not the number
+    of filters. Filters are added and removed one at a time.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the trie."""
+        self._root = _TopicNode()
+
+    def add(self, topic_filter: str, item: Any) -> None:
+        """Add an item for a topic filter."""
+        node = self._root
+        for level in topic_filter.split("/"):
+            child = node.children.get(level)
+            if child is None:
+                child = node.children[level] = _TopicNode()
+            node = child
+        node.items.append(item)
+
+    def remove(self, topic_filter: str, item: Any) -> bool:
+        """Remove an item of a topic filter, return False if it was not added."""
+        path = [self._root]
+        for level in topic_filter.split("/"):
+            child = path[-1].children.get(level)
+            if child is None:
+                return False
+            path.append(child)
+
+        try:
+            path[-1].items.remove(item)
+        except ValueError:
+            return False
+
+        # Prune the levels that no other filter uses
+        for level, parent, node in zip(
+            reversed(topic_filter.split("/")), reversed(path[:-1]), reversed(path)
+        ):
+            if node.items or node.children:
+                break
+            del parent.children[level]
+        return True
+
+    def get(self, topic_filter: str) -> List[Any]:
+        """Return the items of a topic filter."""
+        node: Optional[_TopicNode] = self._root
+        for level in topic_filter.split("/"):
+            node = node.children.get(level)  # type: ignore
+            if node is None:
+                return []
+        return list(node.items)  # type: ignore
+
+    def match(self, topic: str) -> List[Any]:
+        """Return the items of all filters that match a topic.
+
+        Like the broker, wildcards at the first level don't match topics
+        starting with $, eg. $SYS topics.
+        """
+        matches: List[Any] = []
+        nodes = [self._root]
+        wildcards = not topic.startswith("$")
+        for level in topic.split("/"):
+            next_nodes = []
+            for node in nodes:
+                children = node.children
+                if not children:
+                    continue
+                child = children.get(level)
+                if child is not None:
+                    next_nodes.append(child)
+                if wildcards:
+                    child = children.get("+")
+                    if child is not None:
+                        next_nodes.append(child)
+                    child = children.get("#")
+                    if child is not None:
+                        matches.extend(child.items)
+            wildcards = True
+            nodes = next_nodes
+            if not nodes:
+                return matches
+
+        for node in nodes:
+            matches.extend(node.items)
+            # A filter ending with /# also matches its parent level
+            child = node.children.get("#")
+            if child is not None:
+                matches.extend(child.items)
+        return matches
@@ -10,20 +10,31 @@ import objgraph
 from pyprof2calltree import convert
 import voluptuous as vol
 
+from homeassistant.components import websocket_api
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, ServiceCall
 import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.entity import async_skipped_state_writes
 from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.executor import async_executor_stats
+from homeassistant.helpers.polling import async_poll_stats
 from homeassistant.helpers.service import async_register_admin_service
+from homeassistant.helpers.template import (
+    async_render_memo_stats,
+    compiled_template_cache_stats,
+)
 from homeassistant.helpers.typing import ConfigType
 
-from .const import DOMAIN
+from .const import DOMAIN, LOOP_MONITOR
+from .loop_monitor import DEFAULT_SLOW_THRESHOLD, LoopMonitor
 
 SERVICE_START = "start"
 SERVICE_MEMORY = "memory"
 SERVICE_START_LOG_OBJECTS = "start_log_objects"
 SERVICE_STOP_LOG_OBJECTS = "stop_log_objects"
 SERVICE_DUMP_LOG_OBJECTS = "dump_log_objects"
+SERVICE_START_LOOP_MONITOR = "start_loop_monitor"
+SERVICE_STOP_LOOP_MONITOR = "stop_loop_monitor"
 
 SERVICES = (
     SERVICE_START,
@@ -31,6 +42,8 @@ SERVICES = (
     SERVICE_START_LOG_OBJECTS,
     SERVICE_STOP_LOG_OBJECTS,
     SERVICE_DUMP_LOG_OBJECTS,
+    SERVICE_START_LOOP_MONITOR,
+    SERVICE_STOP_LOOP_MONITOR,
 )
 
 DEFAULT_SCAN_INTERVAL = timedelta(seconds=30)
@@ -38,6 +51,7 @@ DEFAULT_SCAN_INTERVAL = timedelta(seconds=30)
 CONF_SECONDS = "seconds"
 CONF_SCAN_INTERVAL = "scan_interval"
 CONF_TYPE = "type"
+CONF_SLOW_THRESHOLD = "slow_threshold"
 
 LOG_INTERVAL_SUB = "log_interval_subscription"
 
@@ -46,6 +60,14 @@ _LOGGER = logging.getLogger(__name__)
 
 async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     """Set up the profiler component."""
+    hass.components.websocket_api.async_register_command(websocket_loop_monitor)
+    hass.components.websocket_api.async_register_command(websocket_executor_stats)
+    hass.components.websocket_api.async_register_command(
+        websocket_compiled_template_cache
+    )
+    hass.components.websocket_api.async_register_command(websocket_render_memo)
+    hass.components.websocket_api.async_register_command(websocket_skipped_state_writes)
+    hass.components.websocket_api.async_register_command(websocket_poll_stats)
     return True
 
 
@@ -53,7 +75,8 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     """Set up Profiler from a config entry."""
 
     lock = asyncio.Lock()
-    domain_data = hass.data[DOMAIN] = {}
+    monitor = LoopMonitor(hass)
+    domain_data = hass.data[DOMAIN] = {LOOP_MONITOR: monitor}
 
     async def _async_run_profile(call: ServiceCall):
         async with lock:
@@ -99,6 +122,13 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
             notification_id="profile_object_dump",
         )
 
+    async def _async_start_loop_monitor(call: ServiceCall):
+        monitor.async_reset()
+        monitor.async_start(call.data[CONF_SLOW_THRESHOLD])
+
+    async def _async_stop_loop_monitor(call: ServiceCall):
+        monitor.async_stop()
+
     async_register_admin_service(
         hass,
         DOMAIN,
@@ -149,19 +179,98 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
         schema=vol.Schema({vol.Required(CONF_TYPE): str}),
     )
 
+    async_register_admin_service(
+        hass,
+        DOMAIN,
+        SERVICE_START_LOOP_MONITOR,
+        _async_start_loop_monitor,
+        schema=vol.Schema(
+            {
+                vol.Optional(
+                    CONF_SLOW_THRESHOLD, default=DEFAULT_SLOW_THRESHOLD
+                ): vol.All(vol.Coerce(float), vol.Range(min=0))
+            }
+        ),
+    )
+
+    async_register_admin_service(
+        hass,
+        DOMAIN,
+        SERVICE_STOP_LOOP_MONITOR,
+        _async_stop_loop_monitor,
+        schema=vol.Schema({}),
+    )
+
+    hass.async_create_task(
+        hass.config_entries.async_forward_entry_setup(entry, "sensor")
+    )
     return True
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
     """Unload a config entry."""
+    if not await hass.config_entries.async_forward_entry_unload(entry, "sensor"):
+        return False
     for service in SERVICES:
         hass.services.async_remove(domain=DOMAIN, service=service)
     if LOG_INTERVAL_SUB in hass.data[DOMAIN]:
         hass.data[DOMAIN][LOG_INTERVAL_SUB]()
+    hass.data[DOMAIN][LOOP_MONITOR].async_stop()
     hass.data.pop(DOMAIN)
     return True
 
 
+@websocket_api.require_admin
+@websocket_api.websocket_command({vol.Required("type"): "profiler/loop_monitor"})
+def websocket_loop_monitor(hass, connection, msg):
+    """Return the callbacks that blocked the event loop."""
+    if DOMAIN not in hass.data:
+        connection.send_error(
+            msg["id"], websocket_api.ERR_NOT_FOUND, "Profiler is not loaded"
+        )
+        return
+    connection.send_result(msg["id"], hass.data[DOMAIN][LOOP_MONITOR].async_as_dict())
+
+
+@websocket_api.require_admin
+@websocket_api.websocket_command({vol.Required("type"): "profiler/executor_stats"})
+def websocket_executor_stats(hass, connection, msg):
+    """Return the job counts, waits and run times of the executor pools."""
+    connection.send_result(msg["id"], async_executor_stats(hass))
+
+
+@websocket_api.require_admin
+@websocket_api.websocket_command(
+    {vol.Required("type"): "profiler/compiled_template_cache"}
+)
+def websocket_compiled_template_cache(hass, connection, msg):
+    """Return the hits, misses and size of the compiled template cache."""
+    connection.send_result(msg["id"], compiled_template_cache_stats())
+
+
+@websocket_api.require_admin
+@websocket_api.websocket_command({vol.Required("type"): "profiler/render_memo"})
+def websocket_render_memo(hass, connection, msg):
+    """Return the hits and misses of the memoized template renders."""
+    connection.send_result(msg["id"], async_render_memo_stats(hass))
+
+
+@websocket_api.require_admin
+@websocket_api.websocket_command(
+    {vol.Required("type"): "profiler/skipped_state_writes"}
+)
+def websocket_skipped_state_writes(hass, connection, msg):
+    """Return the state writes skipped as nothing changed, by integration."""
+    connection.send_result(msg["id"], async_skipped_state_writes(hass))
+
+
+@websocket_api.require_admin
+@websocket_api.websocket_command({vol.Required("type"): "profiler/poll_stats"})
+def websocket_poll_stats(hass, connection, msg):
+    """Return the polls, failures and latencies by domain and platform."""
+    connection.send_result(msg["id"], async_poll_stats(hass))
+
+
 async def _async_generate_profile(hass: HomeAssistant, call: ServiceCall):
     start_time = int(time.time() * 1000000)
     hass.components.persistent_notification.async_create(
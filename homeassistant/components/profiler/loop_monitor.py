@@ -0,0 +1,199 @@
+"""Find the callbacks that block the event loop."""
+from bisect import bisect_left
+from collections import deque
+from functools import partial
+import logging
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from homeassistant.core import HomeAssistant, callback
+import homeassistant.util.dt as dt_util
+
+_LOGGER = logging.getLogger(__name__)
+
+# Upper bounds of the histogram buckets, in seconds
+HISTOGRAM_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, float("inf"))
+
+DEFAULT_SLOW_THRESHOLD = 0.1
+
+# Seconds between two measurements of the event loop lag
+LAG_PROBE_INTERVAL = 0.5
+
+SLOW_CALLBACKS_SIZE = 50
+
+
+class Histogram:
+    """Distribution of durations."""
+
+    def __init__(self) -> None:
+        """Initialize the histogram."""
+        self.buckets = [0] * len(HISTOGRAM_BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, duration: float) -> None:
+        """Add a duration."""
+        self.buckets[bisect_left(HISTOGRAM_BUCKETS, duration)] += 1
+        self.count += 1
+        self.total += duration
+        if duration > self.max:
+            self.max = duration
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return a JSON serializable representation of the histogram."""
+        return {
+            "count": self.count,
+            "total": self.total,
+            "max": self.max,
+            "buckets": {
+                "+Inf" if bound == float("inf") else str(bound): count
+                for bound, count in zip(HISTOGRAM_BUCKETS, self.buckets)
+            },
+        }
+
+
+def callback_domain(target: Callable) -> str:
+    """Return the integration a callback belongs to."""
+    while isinstance(target, partial):
+        target = target.func
+    module = getattr(target, "__module__", None) or "unknown"
+    parts = module.split(".")
+    if parts[:2] == ["homeassistant", "components"] and len(parts) > 2:
+        return parts[2]
+    if parts[0] == "custom_components" and len(parts) > 1:
+        return parts[1]
+    return parts[0]
+
+
+def callback_name(target: Callable) -> str:
+    """Return a readable name of a callback."""
+    while isinstance(target, partial):
+        target = target.func
+    name = getattr(target, "__qualname__", None)
+    if name is None:
+        return repr(target)
+    return f"{getattr(target, '__module__', None)}.{name}"
+
+
+class LoopMonitor:
+    """Record how long callbacks block the event loop and how late it runs.
+
+    The time callbacks block the loop is recorded per integration and origin
+    of the callback: a job, an event listener or a service handler. Coroutines
+    are not timed per step, a slow one shows up in the loop lag instead.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the monitor."""
+        self.hass = hass
+        self.slow_threshold = DEFAULT_SLOW_THRESHOLD
+        self.histograms: Dict[str, Dict[str, Histogram]] = {}
+        self.loop_lag = Histogram()
+        self.slow_callbacks: Deque[Dict[str, Any]] = deque(maxlen=SLOW_CALLBACKS_SIZE)
+        self.slow_callback_count = 0
+        self.peak_lag = 0.0
+        self._probe_time = 0.0
+        self._probe_handle: Optional[Any] = None
+
+    @property
+    def running(self) -> bool:
+        """Return if the monitor is recording."""
+        return self._probe_handle is not None
+
+    @callback
+    def async_start(self, slow_threshold: float = DEFAULT_SLOW_THRESHOLD) -> None:
+        """Start recording."""
+        self.slow_threshold = slow_threshold
+        self.hass.job_timer = self._async_record
+        if self._probe_handle is None:
+            self._async_schedule_probe()
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop recording, the recorded data is kept."""
+        if self.hass.job_timer == self._async_record:
+            self.hass.job_timer = None
+        if self._probe_handle is not None:
+            self._probe_handle.cancel()
+            self._probe_handle = None
+
+    @callback
+    def async_reset(self) -> None:
+        """Forget the recorded data."""
+        self.histograms = {}
+        self.loop_lag = Histogram()
+        self.slow_callbacks.clear()
+        self.slow_callback_count = 0
+        self.peak_lag = 0.0
+
+    @callback
+    def async_pop_peak_lag(self) -> float:
+        """Return the highest loop lag since the last call."""
+        peak_lag, self.peak_lag = self.peak_lag, 0.0
+        return peak_lag
+
+    @callback
+    def _async_record(self, origin: str, target: Callable, duration: float) -> None:
+        """Record the time a callback blocked the event loop."""
+        kind = origin.split(" ", 1)[0]
+        domain = callback_domain(target)
+        histograms = self.histograms.setdefault(domain, {})
+        histogram = histograms.get(kind)
+        if histogram is None:
+            histogram = histograms[kind] = Histogram()
+        histogram.add(duration)
+
+        if duration < self.slow_threshold:
+            return
+
+        name = callback_name(target)
+        _LOGGER.warning(
+            "%s of %s blocked the event loop for %.3f seconds (%s)",
+            name,
+            domain,
+            duration,
+            origin,
+        )
+        self.slow_callback_count += 1
+        self.slow_callbacks.append(
+            {
+                "callback": name,
+                "domain": domain,
+                "origin": origin,
+                "duration": duration,
+                "time": dt_util.utcnow().isoformat(),
+            }
+        )
+
+    @callback
+    def _async_schedule_probe(self) -> None:
+        """Schedule the next measurement of the loop lag."""
+        self._probe_time = self.hass.loop.time() + LAG_PROBE_INTERVAL
+        self._probe_handle = self.hass.loop.call_at(self._probe_time, self._async_probe)
+
+    @callback
+    def _async_probe(self) -> None:
+        """Measure how late the event loop ran a timer."""
+        lag = max(self.hass.loop.time() - self._probe_time, 0.0)
+        self.loop_lag.add(lag)
+        if lag > self.peak_lag:
+            self.peak_lag = lag
+        self._async_schedule_probe()
+
+    @callback
+    def async_as_dict(self) -> Dict[str, Any]:
+        """Return a JSON serializable representation of the recorded data."""
+        slow_callbacks: List[Dict[str, Any]] = list(self.slow_callbacks)
+        return {
+            "running": self.running,
+            "slow_threshold": self.slow_threshold,
+            "loop_lag": self.loop_lag.as_dict(),
+            "domains": {
+                domain: {
+                    kind: histogram.as_dict() for kind, histogram in histograms.items()
+                }
+                for domain, histograms in self.histograms.items()
+            },
+            "slow_callback_count": self.slow_callback_count,
+            "slow_callbacks": slow_callbacks,
+        }
@@ -0,0 +1,72 @@
+"""Sensor of the event loop lag measured by the profiler."""
+from datetime import timedelta
+
+from homeassistant.const import TIME_MILLISECONDS
+from homeassistant.helpers.entity import Entity
+
+from .const import DEFAULT_NAME, DOMAIN, LOOP_MONITOR
+
+SCAN_INTERVAL = timedelta(seconds=30)
+
+ATTR_SLOW_CALLBACKS = "slow_callbacks"
+ATTR_LAST_SLOW_CALLBACK = "last_slow_callback"
+
+
+async def async_setup_entry(hass, config_entry, async_add_entities):
+    """Set up the profiler sensors."""
+    async_add_entities(
+        [LoopLagSensor(hass.data[DOMAIN][LOOP_MONITOR], config_entry.entry_id)], True
+    )
+
+
+class LoopLagSensor(Entity):
+    """Highest event loop lag since the previous update."""
+
+    def __init__(self, monitor, entry_id):
+        """Initialize the sensor."""
+        self._monitor = monitor
+        self._entry_id = entry_id
+        self._state = None
+
+    @property
+    def name(self):
+        """Return the name of the sensor."""
+        return f"{DEFAULT_NAME} event loop lag"
+
+    @property
+    def unique_id(self):
+        """Return the unique id of the sensor."""
+        return f"{self._entry_id}_loop_lag"
+
+    @property
+    def state(self):
+        """Return the state of the sensor."""
+        return self._state
+
+    @property
+    def unit_of_measurement(self):
+        """Return the unit of measurement."""
+        return TIME_MILLISECONDS
+
+    @property
+    def icon(self):
+        """Return the icon of the sensor."""
+        return "mdi:timer-sand"
+
+    @property
+    def device_state_attributes(self):
+        """Return the state attributes."""
+        slow_callbacks = self._monitor.slow_callbacks
+        return {
+            ATTR_SLOW_CALLBACKS: self._monitor.slow_callback_count,
+            ATTR_LAST_SLOW_CALLBACK: slow_callbacks[-1]["callback"]
+            if slow_callbacks
+            else None,
+        }
+
+    async def async_update(self):
+        """Read the highest lag measured since the previous update."""
+        if not self._monitor.running:
+            self._state = None
+            return
+        self._state = round(self._monitor.async_pop_peak_lag() * 1000, 1)
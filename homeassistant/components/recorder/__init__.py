@@ -1,8 +1,8 @@
 """Support for recording details."""
 import asyncio
-from collections import namedtuple
+from collections import deque, namedtuple
 import concurrent.futures
-from datetime import datetime
+from datetime import datetime, timedelta
 import logging
 import queue
 import threading
@@ -31,12 +31,25 @@ from homeassistant.helpers.entityfilter import (
     INCLUDE_EXCLUDE_FILTER_SCHEMA_INNER,
     convert_include_exclude_filter,
 )
+from homeassistant.helpers.executor import async_create_executor_pool
 from homeassistant.helpers.typing import ConfigType
 import homeassistant.util.dt as dt_util
 
-from . import migration, purge
-from .const import CONF_DB_INTEGRITY_CHECK, DATA_INSTANCE, DOMAIN, SQLITE_URL_PREFIX
-from .models import Base, Events, RecorderRuns, States
+from . import migration, purge, statistics
+from .attributes import StateAttributesIds
+from .batch import RecorderBatch
+from .const import (
+    CONF_DB_INTEGRITY_CHECK,
+    DATA_INSTANCE,
+    DOMAIN,
+    EVENT_RECORDER_QUEUE_OVERFLOW,
+    EXECUTOR_POOL,
+    EXECUTOR_POOL_QUOTA,
+    EXECUTOR_POOL_WORKERS,
+    SQLITE_URL_PREFIX,
+)
+from .models import Base, Events, RecorderRuns, StateAttributes, States
+from .spill import SpillFile
 from .util import session_scope, validate_or_move_away_sqlite_database
 
 _LOGGER = logging.getLogger(__name__)
@@ -59,8 +72,17 @@ DEFAULT_DB_INTEGRITY_CHECK = True
 DEFAULT_DB_MAX_RETRIES = 10
 DEFAULT_DB_RETRY_WAIT = 3
 DEFAULT_COMMIT_INTERVAL = 1
+DEFAULT_BATCH_WRITES = False
+DEFAULT_MAX_QUEUE_DEPTH = 30000
+DEFAULT_SPILL_FILE = "home-assistant_v2.spill"
 KEEPALIVE_TIME = 30
 
+# Commit every this many events while replaying spilled events
+SPILL_REPLAY_COMMIT_EVENTS = 1000
+
+# Window used to compute the rows per second written
+WRITE_RATE_WINDOW = 60
+
 # Controls how often we clean up
 # States and Events objects
 EXPIRE_AFTER_COMMITS = 120
@@ -73,6 +95,8 @@ CONF_PURGE_KEEP_DAYS = "purge_keep_days"
 CONF_PURGE_INTERVAL = "purge_interval"
 CONF_EVENT_TYPES = "event_types"
 CONF_COMMIT_INTERVAL = "commit_interval"
+CONF_BATCH_WRITES = "batch_writes"
+CONF_MAX_QUEUE_DEPTH = "max_queue_depth"
 
 EXCLUDE_SCHEMA = INCLUDE_EXCLUDE_FILTER_SCHEMA_INNER.extend(
     {vol.Optional(CONF_EVENT_TYPES): vol.All(cv.ensure_list, [cv.string])}
@@ -97,6 +121,12 @@ CONFIG_SCHEMA = vol.Schema(
                     vol.Optional(
                         CONF_COMMIT_INTERVAL, default=DEFAULT_COMMIT_INTERVAL
                     ): cv.positive_int,
+                    vol.Optional(
+                        CONF_BATCH_WRITES, default=DEFAULT_BATCH_WRITES
+                    ): cv.boolean,
+                    vol.Optional(
+                        CONF_MAX_QUEUE_DEPTH, default=DEFAULT_MAX_QUEUE_DEPTH
+                    ): cv.positive_int,
                     vol.Optional(
                         CONF_DB_MAX_RETRIES, default=DEFAULT_DB_MAX_RETRIES
                     ): cv.positive_int,
@@ -161,6 +191,8 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     auto_purge = conf[CONF_AUTO_PURGE]
     keep_days = conf[CONF_PURGE_KEEP_DAYS]
     commit_interval = conf[CONF_COMMIT_INTERVAL]
+    batch_writes = conf[CONF_BATCH_WRITES]
+    max_queue_depth = conf[CONF_MAX_QUEUE_DEPTH]
     db_max_retries = conf[CONF_DB_MAX_RETRIES]
     db_retry_wait = conf[CONF_DB_RETRY_WAIT]
     db_integrity_check = conf[CONF_DB_INTEGRITY_CHECK]
@@ -175,6 +207,8 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
         auto_purge=auto_purge,
         keep_days=keep_days,
         commit_interval=commit_interval,
+        batch_writes=batch_writes,
+        max_queue_depth=max_queue_depth,
         uri=db_url,
         db_max_retries=db_max_retries,
         db_retry_wait=db_retry_wait,
@@ -183,6 +217,11 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
         db_integrity_check=db_integrity_check,
     )
     instance.async_initialize()
+    # History and logbook read the database in their own threads, so that
+    # long queries can't take all the threads of the default executor
+    async_create_executor_pool(
+        hass, EXECUTOR_POOL, EXECUTOR_POOL_WORKERS, EXECUTOR_POOL_QUOTA
+    )
     instance.start()
 
     async def async_handle_purge_service(service):
@@ -198,6 +237,8 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
 
 PurgeTask = namedtuple("PurgeTask", ["keep_days", "repack"])
 
+StatisticsTask = namedtuple("StatisticsTask", ["start", "states", "next_start"])
+
 
 class WaitTask:
     """An object to insert into the recorder queue to tell it set the _queue_watch event."""
@@ -212,6 +253,8 @@ class Recorder(threading.Thread):
         auto_purge: bool,
         keep_days: int,
         commit_interval: int,
+        batch_writes: bool,
+        max_queue_depth: int,
         uri: str,
         db_max_retries: int,
         db_retry_wait: int,
@@ -226,6 +269,8 @@ class Recorder(threading.Thread):
         self.auto_purge = auto_purge
         self.keep_days = keep_days
         self.commit_interval = commit_interval
+        self.batch_writes = batch_writes
+        self.max_queue_depth = max_queue_depth
         self.queue: Any = queue.SimpleQueue()
         self.recording_start = dt_util.utcnow()
         self.db_url = uri
@@ -245,6 +290,19 @@ class Recorder(threading.Thread):
         self._keepalive_count = 0
         self._old_states = {}
         self._pending_expunge = []
+        self.state_attributes_ids = StateAttributesIds()
+        self._pending_state_attributes = {}
+        self._batch = RecorderBatch(self.state_attributes_ids) if batch_writes else None
+        self._pending_rows = 0
+        self.rows_written = 0
+        self._write_samples: Any = deque()
+        self._spill = SpillFile(hass.config.path(DEFAULT_SPILL_FILE))
+        self._spilling = False
+        self._spill_flush_scheduled = False
+        self.queue_overflows = 0
+        self.purge_in_progress = False
+        self.purge_rows_deleted = 0
+        self._repack_pending = False
         self.event_session = None
         self.get_session = None
         self._completed_database_setup = False
@@ -348,23 +406,52 @@ class Recorder(threading.Thread):
                 async_purge, hour=4, minute=12, second=0
             )
 
+        @callback
+        def async_compile_statistics(now):
+            """Trigger compiling the statistics of the last 5 minutes."""
+            start = statistics.period_start(
+                dt_util.utcnow(), statistics.PERIOD_5MINUTE
+            ) - timedelta(seconds=statistics.PERIOD_5MINUTE)
+            self.queue.put(
+                StatisticsTask(start, statistics.async_seed_states(self), None)
+            )
+
+        # Compile statistics shortly after every 5 minutes, the first time
+        # with the periods missed while Home Assistant was stopped
+        self.hass.helpers.event.track_time_change(
+            async_compile_statistics, minute="/5", second=10
+        )
+
+        self._spill.load()
+
         self.event_session = self.get_session()
         self.event_session.expire_on_commit = False
         # Use a session for the event read loop
         # with a commit every time the event time
         # has changed. This reduces the disk io.
         while True:
+            # Only replay once the events queued before
+            # the overflow have been written
+            if self._spill.pending and self.queue.empty():
+                self._replay_spill()
+            # Repacking is slow and optional, so wait for an idle moment
+            if self._repack_pending and self.queue.empty():
+                self._repack()
             event = self.queue.get()
             if event is None:
+                self._spill.flush()
                 self._close_run()
                 self._close_connection()
                 return
             if isinstance(event, PurgeTask):
-                # Schedule a new purge task if this one didn't finish
-                if not purge.purge_old_data(self, event.keep_days, event.repack):
-                    self.queue.put(PurgeTask(event.keep_days, event.repack))
+                self._run_purge(event)
+                continue
+            if isinstance(event, StatisticsTask):
+                self._run_statistics(event)
                 continue
             if isinstance(event, WaitTask):
+                if self._repack_pending:
+                    self._repack()
                 self._queue_watch.set()
                 continue
             if event.event_type == EVENT_TIME_CHANGED:
@@ -378,58 +465,186 @@ class Recorder(threading.Thread):
                         self._timechanges_seen = 0
                         self._commit_event_session_or_retry()
                 continue
-            if event.event_type in self.exclude_t:
-                continue
+            self._process_event(event)
+
+    def _run_purge(self, task):
+        """Run a step of a purge and schedule the next one."""
+        if not self.purge_in_progress:
+            self.purge_in_progress = True
+            self.purge_rows_deleted = 0
+        # Pending states may reference attributes the purge removes
+        self._commit_event_session_or_retry()
+        # Schedule a new purge task if this one didn't finish, the events
+        # queued in the meantime are written first
+        if not purge.purge_old_data(self, task.keep_days):
+            self.queue.put(PurgeTask(task.keep_days, task.repack))
+            return
+        self.purge_in_progress = False
+        _LOGGER.info("Purge finished, deleted %s rows", self.purge_rows_deleted)
+        if task.repack:
+            self._repack_pending = True
+
+    def _run_statistics(self, task):
+        """Compile missing statistics and schedule the next ones."""
+        # The states of the periods have to be in the database
+        self._commit_event_session_or_retry()
+        # Schedule a new statistics task if periods are left, the events
+        # queued in the meantime are written first
+        next_start = statistics.compile_missing_statistics(
+            self, task.start, task.states, task.next_start
+        )
+        if next_start is not None:
+            self.queue.put(StatisticsTask(task.start, task.states, next_start))
+
+    def _repack(self):
+        """Repack the database after a purge."""
+        self._repack_pending = False
+        purge.repack_database(self)
+
+    def evict_purged_states(self, state_ids):
+        """Forget the last states of entities that were purged."""
+        state_ids = set(state_ids)
+        for entity_id, dbstate in list(self._old_states.items()):
+            if dbstate.state_id in state_ids:
+                del self._old_states[entity_id]
+        if self._batch is not None:
+            self._batch.evict_old_states(state_ids)
+
+    def _process_event(self, event):
+        """Add an event to the event session."""
+        if event.event_type in self.exclude_t:
+            return
+
+        entity_id = event.data.get(ATTR_ENTITY_ID)
+        if entity_id is not None:
+            if not self.entity_filter(entity_id):
+                return
 
-            entity_id = event.data.get(ATTR_ENTITY_ID)
-            if entity_id is not None:
-                if not self.entity_filter(entity_id):
-                    continue
+        if self._batch is not None:
+            self._batch.add(event)
+            if not self.commit_interval:
+                self._commit_event_session_or_retry()
+            return
+
+        dbevent = None
+        try:
+            if event.event_type == EVENT_STATE_CHANGED:
+                dbevent = Events.from_event(event, event_data="{}")
+            else:
+                dbevent = Events.from_event(event)
+            dbevent.created = event.time_fired
+            self.event_session.add(dbevent)
+            self._pending_rows += 1
+        except (TypeError, ValueError):
+            _LOGGER.warning("Event is not JSON serializable: %s", event)
+        except Exception as err:  # pylint: disable=broad-except
+            # Must catch the exception to prevent the loop from collapsing
+            _LOGGER.exception("Error adding event: %s", err)
 
+        if dbevent and event.event_type == EVENT_STATE_CHANGED:
             try:
-                if event.event_type == EVENT_STATE_CHANGED:
-                    dbevent = Events.from_event(event, event_data="{}")
-                else:
-                    dbevent = Events.from_event(event)
-                dbevent.created = event.time_fired
-                self.event_session.add(dbevent)
+                dbstate = States.from_event(event)
+                has_new_state = event.data.get("new_state")
+                if dbstate.entity_id in self._old_states:
+                    old_state = self._old_states.pop(dbstate.entity_id)
+                    if old_state.state_id:
+                        dbstate.old_state_id = old_state.state_id
+                    else:
+                        dbstate.old_state = old_state
+                if not has_new_state:
+                    dbstate.state = None
+                self._set_state_attributes(dbstate)
+                dbstate.event = dbevent
+                dbstate.created = event.time_fired
+                self.event_session.add(dbstate)
+                self._pending_rows += 1
+                if has_new_state:
+                    self._old_states[dbstate.entity_id] = dbstate
+                    self._pending_expunge.append(dbstate)
             except (TypeError, ValueError):
-                _LOGGER.warning("Event is not JSON serializable: %s", event)
+                _LOGGER.warning(
+                    "State is not JSON serializable: %s",
+                    event.data.get("new_state"),
+                )
             except Exception as err:  # pylint: disable=broad-except
                 # Must catch the exception to prevent the loop from collapsing
-                _LOGGER.exception("Error adding event: %s", err)
-
-            if dbevent and event.event_type == EVENT_STATE_CHANGED:
-                try:
-                    dbstate = States.from_event(event)
-                    has_new_state = event.data.get("new_state")
-                    if dbstate.entity_id in self._old_states:
-                        old_state = self._old_states.pop(dbstate.entity_id)
-                        if old_state.state_id:
-                            dbstate.old_state_id = old_state.state_id
-                        else:
-                            dbstate.old_state = old_state
-                    if not has_new_state:
-                        dbstate.state = None
-                    dbstate.event = dbevent
-                    dbstate.created = event.time_fired
-                    self.event_session.add(dbstate)
-                    if has_new_state:
-                        self._old_states[dbstate.entity_id] = dbstate
-                        self._pending_expunge.append(dbstate)
-                except (TypeError, ValueError):
-                    _LOGGER.warning(
-                        "State is not JSON serializable: %s",
-                        event.data.get("new_state"),
-                    )
-                except Exception as err:  # pylint: disable=broad-except
-                    # Must catch the exception to prevent the loop from collapsing
-                    _LOGGER.exception("Error adding state change: %s", err)
+                _LOGGER.exception("Error adding state change: %s", err)
 
-            # If they do not have a commit interval
-            # than we commit right away
-            if not self.commit_interval:
+        # If they do not have a commit interval
+        # than we commit right away
+        if not self.commit_interval:
+            self._commit_event_session_or_retry()
+
+    def _replay_spill(self):
+        """Write the events that overflowed the queue to the database."""
+        _LOGGER.info("Recording %s events spilled to disk", self._spill.pending)
+        replayed = 0
+        for event in self._spill.replay():
+            self._process_event(event)
+            replayed += 1
+            if self.commit_interval and replayed % SPILL_REPLAY_COMMIT_EVENTS == 0:
                 self._commit_event_session_or_retry()
+        self._commit_event_session_or_retry()
+        _LOGGER.info("Recorded %s events spilled to disk", replayed)
+        self.hass.add_job(self._async_stop_spilling)
+
+    @callback
+    def _async_stop_spilling(self):
+        """Send events to the queue again once the spill file is replayed."""
+        # Events spilled since the replay started are picked up by the next one
+        if self._spill.pending:
+            return
+        self._spilling = False
+
+    @callback
+    def _async_spill(self, event):
+        """Spill an event that does not fit in the queue."""
+        if not self._spilling:
+            self._spilling = True
+            self.queue_overflows += 1
+            queue_depth = self.queue.qsize()
+            _LOGGER.warning(
+                "The recorder queue reached %s events, "
+                "spilling new events to %s until the database catches up",
+                queue_depth,
+                self._spill.path,
+            )
+            self.hass.bus.async_fire(
+                EVENT_RECORDER_QUEUE_OVERFLOW,
+                {"queue_depth": queue_depth, "max_queue_depth": self.max_queue_depth},
+            )
+
+        if self._spill.add(event) and not self._spill_flush_scheduled:
+            self._spill_flush_scheduled = True
+            self.hass.async_add_executor_job(self._flush_spill)
+
+    def _flush_spill(self):
+        """Write the spilled events to disk."""
+        self._spill_flush_scheduled = False
+        self._spill.flush()
+
+    def _set_state_attributes(self, dbstate):
+        """Link a state to its attributes, which are only stored once."""
+        shared_attrs = dbstate.attributes
+        dbstate.attributes = None
+        dbattributes = self._pending_state_attributes.get(shared_attrs)
+        if dbattributes is not None:
+            dbstate.state_attributes = dbattributes
+            return
+
+        attributes_id = self.state_attributes_ids.lookup(
+            self.event_session, shared_attrs
+        )
+        if attributes_id is not None:
+            dbstate.attributes_id = attributes_id
+            return
+
+        dbattributes = StateAttributes(
+            hash=StateAttributes.hash_shared_attrs(shared_attrs),
+            shared_attrs=shared_attrs,
+        )
+        dbstate.state_attributes = dbattributes
+        self._pending_state_attributes[shared_attrs] = dbattributes
 
     def _send_keep_alive(self):
         try:
@@ -473,14 +688,22 @@ class Recorder(threading.Thread):
             except Exception as err:  # pylint: disable=broad-except
                 # Must catch the exception to prevent the loop from collapsing
                 _LOGGER.exception("Error saving events: %s", err)
+                self._discard_pending_rows()
                 return
 
         _LOGGER.error(
             "Error in database update. Could not save " "after %d tries. Giving up",
             tries,
         )
+        self._discard_pending_rows()
         self._reopen_event_session()
 
+    def _discard_pending_rows(self):
+        """Drop the rows that could not be written."""
+        self._pending_rows = 0
+        if self._batch is not None:
+            self._batch.clear()
+
     def _reopen_event_session(self):
         try:
             self.event_session.rollback()
@@ -505,7 +728,9 @@ class Recorder(threading.Thread):
         self._commits_without_expire += 1
 
         try:
-            if self._pending_expunge:
+            if self._batch is not None:
+                self._pending_rows = self._batch.write(self.event_session)
+            elif self._pending_expunge:
                 self.event_session.flush()
                 for dbstate in self._pending_expunge:
                     # Expunge the state so its not expired
@@ -521,12 +746,29 @@ class Recorder(threading.Thread):
             )
             self.event_session.rollback()
             self._old_states = {}
+            self._pending_state_attributes = {}
+            self.state_attributes_ids.clear()
+            if self._batch is not None:
+                self._batch.reset_old_states()
             raise
         except Exception as err:
             _LOGGER.error("Error executing query: %s", err)
             self.event_session.rollback()
+            self._pending_state_attributes = {}
             raise
 
+        for shared_attrs, dbattributes in self._pending_state_attributes.items():
+            self.state_attributes_ids.set(shared_attrs, dbattributes.attributes_id)
+        self._pending_state_attributes = {}
+        # The spilled events replayed so far are in the database
+        self._spill.commit()
+
+        if self._batch is not None:
+            self._batch.committed()
+        if self._pending_rows:
+            self._record_rows_written(self._pending_rows)
+            self._pending_rows = 0
+
         # Expire is an expensive operation (frequently more expensive
         # than the flush and commit itself) so we only
         # do it after EXPIRE_AFTER_COMMITS commits
@@ -534,9 +776,45 @@ class Recorder(threading.Thread):
             self._commits_without_expire = 0
             self.event_session.expire_all()
 
+    def _record_rows_written(self, rows):
+        """Record the number of rows written by a commit."""
+        now = time.monotonic()
+        self.rows_written += rows
+        self._write_samples.append((now, rows))
+        while self._write_samples[0][0] < now - WRITE_RATE_WINDOW:
+            self._write_samples.popleft()
+
+    @property
+    def queue_depth(self) -> int:
+        """Return the number of items waiting to be processed."""
+        return self.queue.qsize()
+
+    @property
+    def spilled_events(self) -> int:
+        """Return the number of events spilled to disk and not recorded yet."""
+        return self._spill.pending
+
+    @property
+    def rows_per_second(self) -> float:
+        """Return the rows written per second over the last minute."""
+        window_start = time.monotonic() - WRITE_RATE_WINDOW
+        rows = sum(
+            rows
+            for sample_time, rows in list(self._write_samples)
+            if sample_time >= window_start
+        )
+        return rows / WRITE_RATE_WINDOW
+
     @callback
     def event_listener(self, event):
         """Listen for new events and put them in the process queue."""
+        # Time changed events drive the commits so they are always queued
+        if event.event_type != EVENT_TIME_CHANGED and (
+            self._spilling
+            or (self.max_queue_depth and self.queue.qsize() >= self.max_queue_depth)
+        ):
+            self._async_spill(event)
+            return
         self.queue.put(event)
 
     def block_till_done(self):
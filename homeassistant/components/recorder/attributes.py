@@ -0,0 +1,57 @@
+"""Deduplicate the attributes of recorded states."""
+from collections import OrderedDict
+from typing import Optional
+
+from .models import StateAttributes
+
+# Number of distinct attribute sets to remember the id of
+STATE_ATTRIBUTES_ID_CACHE_SIZE = 2048
+
+
+class StateAttributesIds:
+    """Least recently used map of serialized attributes to their row id."""
+
+    def __init__(self, size: int = STATE_ATTRIBUTES_ID_CACHE_SIZE) -> None:
+        """Initialize the cache."""
+        self._size = size
+        self._ids: OrderedDict = OrderedDict()
+
+    def get(self, shared_attrs: str) -> Optional[int]:
+        """Return the id of cached attributes."""
+        attributes_id = self._ids.get(shared_attrs)
+        if attributes_id is not None:
+            self._ids.move_to_end(shared_attrs)
+        return attributes_id
+
+    def set(self, shared_attrs: str, attributes_id: int) -> None:
+        """Remember the id of attributes."""
+        self._ids[shared_attrs] = attributes_id
+        self._ids.move_to_end(shared_attrs)
+        if len(self._ids) > self._size:
+            self._ids.popitem(last=False)
+
+    def clear(self) -> None:
+        """Forget all ids, eg. after attributes were purged."""
+        self._ids.clear()
+
+    def lookup(self, session, shared_attrs: str) -> Optional[int]:
+        """Return the id of attributes from the cache or the database."""
+        attributes_id = self.get(shared_attrs)
+        if attributes_id is not None:
+            return attributes_id
+
+        with session.no_autoflush:
+            row = (
+                session.query(StateAttributes.attributes_id)
+                .filter(
+                    StateAttributes.hash
+                    == StateAttributes.hash_shared_attrs(shared_attrs)
+                )
+                .filter(StateAttributes.shared_attrs == shared_attrs)
+                .first()
+            )
+        if row is None:
+            return None
+
+        self.set(shared_attrs, row[0])
+        return row[0]
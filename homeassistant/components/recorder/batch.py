@@ -0,0 +1,190 @@
+"""Batched bulk-insert write path for the recorder."""
+import logging
+from typing import Any, Dict, List, Optional, Set
+
+from sqlalchemy import func, text
+
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import Event
+
+from .attributes import StateAttributesIds
+from .models import (
+    TABLE_EVENTS,
+    TABLE_STATE_ATTRIBUTES,
+    TABLE_STATES,
+    Events,
+    StateAttributes,
+    States,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class RecorderBatch:
+    """Collect the rows of a commit interval and write them with executemany.
+
+    Primary keys are assigned here instead of by the database so states can
+    reference their event and their previous state without a round trip per
+    row. The recorder is the only writer for the events, states and
+    state_attributes tables, so the next free ids are read once per write.
+    """
+
+    def __init__(self, state_attributes_ids: StateAttributesIds) -> None:
+        """Initialize the batch."""
+        self._events: List[Dict[str, Any]] = []
+        self._states: List[Dict[str, Any]] = []
+        self._state_events: List[Dict[str, Any]] = []
+        self._shared_attrs: List[str] = []
+        self._state_attributes_ids = state_attributes_ids
+        self._pending_attributes: Dict[str, Dict[str, Any]] = {}
+        # entity_id -> state_id of the last written state
+        self._old_state_ids: Dict[str, int] = {}
+        self._pending_old_state_ids: Dict[str, Optional[int]] = {}
+
+    def __len__(self) -> int:
+        """Return the number of rows waiting to be written."""
+        return len(self._events) + len(self._states)
+
+    def add(self, event: Event) -> None:
+        """Add an event, and the state it carries, to the batch."""
+        try:
+            if event.event_type == EVENT_STATE_CHANGED:
+                event_row = Events.row_from_event(event, event_data="{}")
+            else:
+                event_row = Events.row_from_event(event)
+        except (TypeError, ValueError):
+            _LOGGER.warning("Event is not JSON serializable: %s", event)
+            return
+        self._events.append(event_row)
+
+        if event.event_type != EVENT_STATE_CHANGED:
+            return
+
+        try:
+            state_row = States.row_from_event(event)
+        except (TypeError, ValueError):
+            _LOGGER.warning(
+                "State is not JSON serializable: %s", event.data.get("new_state")
+            )
+            return
+        self._shared_attrs.append(state_row["attributes"])
+        state_row["attributes"] = None
+        self._states.append(state_row)
+        self._state_events.append(event_row)
+
+    def write(self, session) -> int:
+        """Insert the pending rows in the session's transaction.
+
+        The rows are kept until committed() is called so a failed
+        transaction can be retried.
+        """
+        if not self._events:
+            return 0
+
+        event_id = session.query(func.max(Events.event_id)).scalar() or 0
+        for event_row in self._events:
+            event_id += 1
+            event_row["event_id"] = event_id
+        session.execute(Events.__table__.insert(), self._events)
+
+        pending = self._pending_old_state_ids = {}
+        if self._states:
+            self._write_state_attributes(session)
+            state_id = session.query(func.max(States.state_id)).scalar() or 0
+            old_state_ids = self._old_state_ids
+            for state_row, event_row in zip(self._states, self._state_events):
+                state_id += 1
+                entity_id = state_row["entity_id"]
+                state_row["state_id"] = state_id
+                state_row["event_id"] = event_row["event_id"]
+                if entity_id in pending:
+                    state_row["old_state_id"] = pending[entity_id]
+                else:
+                    state_row["old_state_id"] = old_state_ids.get(entity_id)
+                # A removed state is never the old state of the next one
+                pending[entity_id] = None if state_row["state"] is None else state_id
+            session.execute(States.__table__.insert(), self._states)
+
+        if session.bind.dialect.name == "postgresql":
+            # Explicit ids do not advance the serial sequences
+            _advance_sequence(session, TABLE_EVENTS, "event_id")
+            _advance_sequence(session, TABLE_STATES, "state_id")
+            _advance_sequence(session, TABLE_STATE_ATTRIBUTES, "attributes_id")
+
+        return len(self)
+
+    def _write_state_attributes(self, session) -> None:
+        """Link the states to their attributes, inserting the new ones."""
+        state_attributes_ids = self._state_attributes_ids
+        new_attributes = self._pending_attributes = {}
+        attributes_id = None
+        for state_row, shared_attrs in zip(self._states, self._shared_attrs):
+            if shared_attrs in new_attributes:
+                state_row["attributes_id"] = new_attributes[shared_attrs][
+                    "attributes_id"
+                ]
+                continue
+            existing_id = state_attributes_ids.lookup(session, shared_attrs)
+            if existing_id is not None:
+                state_row["attributes_id"] = existing_id
+                continue
+            if attributes_id is None:
+                attributes_id = (
+                    session.query(func.max(StateAttributes.attributes_id)).scalar() or 0
+                )
+            attributes_id += 1
+            new_attributes[shared_attrs] = {
+                "attributes_id": attributes_id,
+                "hash": StateAttributes.hash_shared_attrs(shared_attrs),
+                "shared_attrs": shared_attrs,
+            }
+            state_row["attributes_id"] = attributes_id
+
+        if new_attributes:
+            session.execute(
+                StateAttributes.__table__.insert(), list(new_attributes.values())
+            )
+
+    def committed(self) -> None:
+        """Forget the written rows after the transaction was committed."""
+        for entity_id, state_id in self._pending_old_state_ids.items():
+            if state_id is None:
+                self._old_state_ids.pop(entity_id, None)
+            else:
+                self._old_state_ids[entity_id] = state_id
+        for shared_attrs, attributes_row in self._pending_attributes.items():
+            self._state_attributes_ids.set(
+                shared_attrs, attributes_row["attributes_id"]
+            )
+        self.clear()
+
+    def clear(self) -> None:
+        """Drop the pending rows."""
+        self._events = []
+        self._states = []
+        self._state_events = []
+        self._shared_attrs = []
+        self._pending_old_state_ids = {}
+        self._pending_attributes = {}
+
+    def evict_old_states(self, state_ids: Set[int]) -> None:
+        """Forget the known state ids that were purged."""
+        self._old_state_ids = {
+            entity_id: state_id
+            for entity_id, state_id in self._old_state_ids.items()
+            if state_id not in state_ids
+        }
+
+    def reset_old_states(self) -> None:
+        """Forget the known state ids, eg. when the database went away."""
+        self._old_state_ids = {}
+
+
+def _advance_sequence(session, table: str, column: str) -> None:
+    """Move a PostgreSQL serial sequence past the highest id in use."""
+    session.execute(
+        text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', '{column}'), "  # nosec # not injection
+            f"(SELECT COALESCE(MAX({column}), 1) FROM {table}))"
+        )
+    )
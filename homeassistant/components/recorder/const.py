@@ -4,4 +4,12 @@ DATA_INSTANCE = "recorder_instance"
 SQLITE_URL_PREFIX = "sqlite://"
 DOMAIN = "recorder"
 
+# Executor pool of the integrations reading the database
+EXECUTOR_POOL = "recorder"
+EXECUTOR_POOL_WORKERS = 4
+# Database reads one integration may run at once in the pool
+EXECUTOR_POOL_QUOTA = 2
+
 CONF_DB_INTEGRITY_CHECK = "db_integrity_check"
+
+EVENT_RECORDER_QUEUE_OVERFLOW = "recorder_queue_overflow"
@@ -313,6 +313,14 @@ def _apply_update(engine, new_version, old_version):
         _drop_index(engine, "events", "ix_events_event_type")
     elif new_version == 10:
         _update_states_table_with_foreign_key_options(engine)
+    elif new_version == 11:
+        # The state_attributes table is created with the other missing
+        # tables, existing states keep their attributes inline
+        _add_columns(engine, "states", ["attributes_id INTEGER"])
+        _create_index(engine, "states", "ix_states_attributes_id")
+    elif new_version == 12:
+        # The statistics table is created with the other missing tables
+        pass
     else:
         raise ValueError(f"No schema migration defined for version {new_version}")
 
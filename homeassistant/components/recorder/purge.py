@@ -3,20 +3,38 @@ from datetime import timedelta
 import logging
 import time
 
+from sqlalchemy import distinct, func
 from sqlalchemy.exc import OperationalError, SQLAlchemyError
 
 import homeassistant.util.dt as dt_util
 
-from .models import Events, RecorderRuns, States
+from .models import (
+    Events,
+    RecorderRuns,
+    StateAttributes,
+    States,
+    Statistics,
+    process_timestamp,
+)
+from .statistics import PERIOD_5MINUTE, PERIOD_HOUR
 from .util import execute, session_scope
 
 _LOGGER = logging.getLogger(__name__)
 
+# Stay below the maximum number of host parameters in a SQLite query
+MAX_IDS_PER_QUERY = 999
 
-def purge_old_data(instance, purge_days: int, repack: bool) -> bool:
-    """Purge events and states older than purge_days ago.
+# Maximum number of states and of events deleted by a purge step
+MAX_ROWS_TO_PURGE = 5000
 
-    Cleans up an timeframe of an hour, based on the oldest record.
+
+def purge_old_data(instance, purge_days: int) -> bool:
+    """Purge events, states and 5 minute statistics older than purge_days ago.
+
+    Cleans up an timeframe of an hour, based on the oldest record, and at most
+    MAX_ROWS_TO_PURGE states and events per call so the recorder can write
+    the events that were queued in the meantime. Returns False if the purge
+    has to be continued.
     """
     purge_before = dt_util.utcnow() - timedelta(days=purge_days)
     _LOGGER.debug("Purging states and events before target %s", purge_before)
@@ -44,19 +62,53 @@ def purge_old_data(instance, purge_days: int, repack: bool) -> bool:
 
             _LOGGER.debug("Purging states and events before %s", batch_purge_before)
 
-            deleted_rows = (
-                session.query(States)
+            state_rows = (
+                session.query(States.state_id, States.attributes_id)
                 .filter(States.last_updated < batch_purge_before)
-                .delete(synchronize_session=False)
+                .order_by(States.last_updated.asc())
+                .limit(MAX_ROWS_TO_PURGE)
+                .all()
             )
-            _LOGGER.debug("Deleted %s states", deleted_rows)
+            state_ids = [state_id for state_id, _ in state_rows]
+            attributes_ids = {
+                attributes_id
+                for _, attributes_id in state_rows
+                if attributes_id is not None
+            }
+
+            _disconnect_states_about_to_be_purged(session, state_ids)
+            instance.evict_purged_states(state_ids)
+            deleted_rows = _purge_by_ids(session, States.state_id, state_ids)
+            deleted_attributes = _purge_unused_attributes(session, attributes_ids)
+            if deleted_attributes:
+                instance.state_attributes_ids.clear()
+            _LOGGER.debug(
+                "Deleted %s states and %s state attributes",
+                deleted_rows,
+                deleted_attributes,
+            )
+            instance.purge_rows_deleted += deleted_rows + deleted_attributes
 
-            deleted_rows = (
-                session.query(Events)
+            # Events are only purged once the states of the timeframe are
+            # gone, as the states still reference them
+            if len(state_ids) == MAX_ROWS_TO_PURGE:
+                _LOGGER.debug("Purging states of the timeframe hasn't completed yet")
+                return False
+
+            event_ids = [
+                event_id
+                for event_id, in session.query(Events.event_id)
                 .filter(Events.time_fired < batch_purge_before)
-                .delete(synchronize_session=False)
-            )
+                .order_by(Events.time_fired.asc())
+                .limit(MAX_ROWS_TO_PURGE)
+            ]
+            deleted_rows = _purge_by_ids(session, Events.event_id, event_ids)
             _LOGGER.debug("Deleted %s events", deleted_rows)
+            instance.purge_rows_deleted += deleted_rows
+
+            if len(event_ids) == MAX_ROWS_TO_PURGE:
+                _LOGGER.debug("Purging events of the timeframe hasn't completed yet")
+                return False
 
             # If states or events purging isn't processing the purge_before yet,
             # return false, as we are not done yet.
@@ -72,16 +124,11 @@ def purge_old_data(instance, purge_days: int, repack: bool) -> bool:
                 .delete(synchronize_session=False)
             )
             _LOGGER.debug("Deleted %s recorder_runs", deleted_rows)
+            instance.purge_rows_deleted += deleted_rows
 
-        if repack:
-            # Execute sqlite or postgresql vacuum command to free up space on disk
-            if instance.engine.driver in ("pysqlite", "postgresql"):
-                _LOGGER.debug("Vacuuming SQL DB to free space")
-                instance.engine.execute("VACUUM")
-            # Optimize mysql / mariadb tables to free up space on disk
-            elif instance.engine.driver in ("mysqldb", "pymysql"):
-                _LOGGER.debug("Optimizing SQL DB to free space")
-                instance.engine.execute("OPTIMIZE TABLE states, events, recorder_runs")
+            deleted_rows = _purge_5minute_statistics(session, purge_before)
+            _LOGGER.debug("Deleted %s 5 minute statistics", deleted_rows)
+            instance.purge_rows_deleted += deleted_rows
 
     except OperationalError as err:
         # Retry when one of the following MySQL errors occurred:
@@ -101,3 +148,91 @@ def purge_old_data(instance, purge_days: int, repack: bool) -> bool:
     except SQLAlchemyError as err:
         _LOGGER.warning("Error purging history: %s", err)
     return True
+
+
+def repack_database(instance) -> None:
+    """Free up the disk space of purged rows."""
+    try:
+        # Execute sqlite or postgresql vacuum command to free up space on disk
+        if instance.engine.driver in ("pysqlite", "postgresql"):
+            _LOGGER.debug("Vacuuming SQL DB to free space")
+            instance.engine.execute("VACUUM")
+        # Optimize mysql / mariadb tables to free up space on disk
+        elif instance.engine.driver in ("mysqldb", "pymysql"):
+            _LOGGER.debug("Optimizing SQL DB to free space")
+            instance.engine.execute(
+                "OPTIMIZE TABLE states, state_attributes, events, recorder_runs"
+            )
+    except SQLAlchemyError as err:
+        _LOGGER.warning("Error repacking database: %s", err)
+
+
+def _disconnect_states_about_to_be_purged(session, state_ids) -> None:
+    """Unlink the states whose old state is about to be purged."""
+    for idx in range(0, len(state_ids), MAX_IDS_PER_QUERY):
+        session.query(States).filter(
+            States.old_state_id.in_(state_ids[idx : idx + MAX_IDS_PER_QUERY])
+        ).update({"old_state_id": None}, synchronize_session=False)
+
+
+def _purge_by_ids(session, column, ids) -> int:
+    """Delete the rows whose primary key is in ids."""
+    deleted_rows = 0
+    for idx in range(0, len(ids), MAX_IDS_PER_QUERY):
+        deleted_rows += (
+            session.query(column.class_)
+            .filter(column.in_(ids[idx : idx + MAX_IDS_PER_QUERY]))
+            .delete(synchronize_session=False)
+        )
+    return deleted_rows
+
+
+def _purge_5minute_statistics(session, purge_before) -> int:
+    """Delete the 5 minute statistics before purge_before.
+
+    Only the 5 minute statistics that hourly statistics were compiled from
+    are deleted, the hourly statistics are kept.
+    """
+    last_hour_start = (
+        session.query(func.max(Statistics.start))
+        .filter(Statistics.period == PERIOD_HOUR)
+        .scalar()
+    )
+    if last_hour_start is None:
+        return 0
+
+    purge_before = min(
+        purge_before,
+        process_timestamp(last_hour_start) + timedelta(seconds=PERIOD_HOUR),
+    )
+    return (
+        session.query(Statistics)
+        .filter(Statistics.period == PERIOD_5MINUTE)
+        .filter(Statistics.start < purge_before)
+        .delete(synchronize_session=False)
+    )
+
+
+def _purge_unused_attributes(session, attributes_ids) -> int:
+    """Delete the attributes no state references anymore."""
+    deleted_rows = 0
+    attributes_ids = list(attributes_ids)
+    for idx in range(0, len(attributes_ids), MAX_IDS_PER_QUERY):
+        chunk = attributes_ids[idx : idx + MAX_IDS_PER_QUERY]
+        used_ids = {
+            attributes_id
+            for attributes_id, in session.query(distinct(States.attributes_id)).filter(
+                States.attributes_id.in_(chunk)
+            )
+        }
+        unused_ids = [
+            attributes_id for attributes_id in chunk if attributes_id not in used_ids
+        ]
+        if not unused_ids:
+            continue
+        deleted_rows += (
+            session.query(StateAttributes)
+            .filter(StateAttributes.attributes_id.in_(unused_ids))
+            .delete(synchronize_session=False)
+        )
+    return deleted_rows
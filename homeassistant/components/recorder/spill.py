@@ -0,0 +1,174 @@
+"""Spill events that overflow the recorder queue to disk."""
+import json
+import logging
+import os
+import threading
+from typing import Iterator, List, Optional
+
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import Context, Event, EventOrigin, State
+from homeassistant.helpers.json import json_dumps
+import homeassistant.util.dt as dt_util
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class SpillFile:
+    """Append-only file of events that did not fit in the recorder queue.
+
+    Events are serialized on the event loop into an in-memory buffer that is
+    written to disk from a worker thread. The recorder thread replays the file
+    once it has caught up with the queue. The offset of the events committed
+    to the database is saved with each commit, so that a replay stopped
+    halfway resumes after them.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Initialize the spill file."""
+        self.path = path
+        self._replay_path = f"{path}.replay"
+        self._offset_path = f"{path}.offset"
+        # Offset in the replay file after the last replayed event and if
+        # the replay reached the end of the file
+        self._replayed: Optional[int] = None
+        self._replayed_all = False
+        self._lock = threading.Lock()
+        self._file_lock = threading.Lock()
+        self._buffer: List[str] = []
+        self._pending = 0
+        self.spilled = 0
+
+    @property
+    def pending(self) -> int:
+        """Return the number of spilled events not replayed yet."""
+        return self._pending
+
+    def load(self) -> None:
+        """Count the events left on disk by a previous run."""
+        pending = 0
+        for path in (self._replay_path, self.path):
+            if not os.path.exists(path):
+                continue
+            with open(path, "rb") as spill:
+                if path == self._replay_path:
+                    spill.seek(self._load_offset())
+                pending += sum(1 for line in spill if line.strip())
+        with self._lock:
+            self._pending += pending
+        if pending:
+            _LOGGER.info("Found %s spilled events to record in %s", pending, self.path)
+
+    def add(self, event: Event) -> bool:
+        """Serialize an event into the buffer.
+
+        Returns False if the event could not be serialized.
+        """
+        try:
+            line = json_dumps(event.as_dict(), allow_nan=True)
+        except (TypeError, ValueError):
+            _LOGGER.warning("Event is not JSON serializable: %s", event)
+            return False
+        with self._lock:
+            self._buffer.append(line)
+            self._pending += 1
+        self.spilled += 1
+        return True
+
+    def flush(self) -> None:
+        """Append the buffered events to the file."""
+        with self._file_lock:
+            with self._lock:
+                lines, self._buffer = self._buffer, []
+            if not lines:
+                return
+            with open(self.path, "a", encoding="utf-8") as spill:
+                spill.write("\n".join(lines))
+                spill.write("\n")
+
+    def replay(self) -> Iterator[Event]:
+        """Yield the spilled events, oldest first.
+
+        Call commit once the yielded events are in the database.
+        """
+        self.flush()
+        with self._file_lock:
+            # A replay file is left behind if we stopped while replaying
+            if not os.path.exists(self._replay_path) and os.path.exists(self.path):
+                # The offset of a replay file removed before its offset
+                if os.path.exists(self._offset_path):
+                    os.remove(self._offset_path)
+                os.replace(self.path, self._replay_path)
+
+        if not os.path.exists(self._replay_path):
+            return
+
+        offset = self._load_offset()
+        self._replayed_all = False
+        with open(self._replay_path, "rb") as spill:
+            spill.seek(offset)
+            for line in spill:
+                offset += len(line)
+                self._replayed = offset
+                if not line.strip():
+                    continue
+                with self._lock:
+                    self._pending = max(self._pending - 1, 0)
+                event = _event_from_json(line.decode("utf-8"))
+                if event is not None:
+                    yield event
+        self._replayed_all = True
+
+    def commit(self) -> None:
+        """Save that the events replayed so far are in the database.
+
+        The replay file is removed once all its events are committed.
+        """
+        if self._replayed is None:
+            return
+        if self._replayed_all:
+            os.remove(self._replay_path)
+            if os.path.exists(self._offset_path):
+                os.remove(self._offset_path)
+            self._replayed = None
+            self._replayed_all = False
+            return
+        # Replace the offset in one step, a crash leaves the old or the new one
+        with open(f"{self._offset_path}.tmp", "w", encoding="utf-8") as offset:
+            offset.write(str(self._replayed))
+        os.replace(f"{self._offset_path}.tmp", self._offset_path)
+
+    def _load_offset(self) -> int:
+        """Return the offset of the first event of the replay file to replay."""
+        try:
+            with open(self._offset_path, encoding="utf-8") as offset:
+                return int(offset.read())
+        except FileNotFoundError:
+            return 0
+        except ValueError:
+            _LOGGER.warning("Invalid offset in %s, replaying all", self._offset_path)
+            return 0
+
+
+def _event_from_json(line: str) -> Optional[Event]:
+    """Restore an event serialized by SpillFile.add."""
+    try:
+        event_dict = json.loads(line)
+        event_data = event_dict["data"]
+        if event_dict["event_type"] == EVENT_STATE_CHANGED:
+            for key in ("old_state", "new_state"):
+                event_data[key] = State.from_dict(event_data.get(key))
+        context = event_dict["context"]
+        return Event(
+            event_dict["event_type"],
+            event_data,
+            EventOrigin(event_dict["origin"]),
+            dt_util.parse_datetime(event_dict["time_fired"]),
+            Context(
+                id=context["id"],
+                user_id=context["user_id"],
+                parent_id=context["parent_id"],
+            ),
+        )
+    except (ValueError, KeyError, TypeError):
+        _LOGGER.exception("Error restoring spilled event: %s", line)
+        return None
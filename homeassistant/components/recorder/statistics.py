@@ -0,0 +1,374 @@
+"""Compile long-term statistics of numeric sensors."""
+from collections import defaultdict
+from datetime import datetime, timedelta
+import json
+import logging
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import and_, func
+from sqlalchemy.exc import SQLAlchemyError
+
+from homeassistant.const import ATTR_DEVICE_CLASS, DEVICE_CLASS_ENERGY
+from homeassistant.core import State, callback
+
+from .models import StateAttributes, States, Statistics, process_timestamp
+from .util import session_scope
+
+_LOGGER = logging.getLogger(__name__)
+
+PERIOD_5MINUTE = 300
+PERIOD_HOUR = 3600
+
+STATISTICS_PERIODS = {"5minute": PERIOD_5MINUTE, "hour": PERIOD_HOUR}
+
+STATISTICS_DOMAINS = ("sensor",)
+
+# Entities whose state is a meter reading get the increase as sum
+METER_DEVICE_CLASSES = (DEVICE_CLASS_ENERGY,)
+
+STATE_ATTRIBUTES = func.coalesce(StateAttributes.shared_attrs, States.attributes)
+
+# Missed periods compiled by one statistics task, the recorder writes the
+# events queued in the meantime before the next periods are compiled
+MAX_MISSING_PERIODS = 12
+
+
+def period_start(now: datetime, period: int) -> datetime:
+    """Return the start of the period now is in."""
+    now = now.replace(microsecond=0)
+    seconds = (now.minute * 60 + now.second) % period
+    return now - timedelta(seconds=seconds)
+
+
+@callback
+def async_seed_states(instance) -> List[State]:
+    """Return the states of the recorded entities statistics are compiled of.
+
+    Taken in the event loop when the statistics are scheduled, entities whose
+    state didn't change in a period start with them.
+    """
+    return [
+        state
+        for state in instance.hass.states.async_all(STATISTICS_DOMAINS)
+        if instance.entity_filter(state.entity_id)
+    ]
+
+
+def compile_statistics(instance, start: datetime, states: List[State]) -> None:
+    """Compile the 5 minute statistics starting at start.
+
+    The hourly statistics are compiled from the 5 minute ones once the last
+    5 minutes of an hour are compiled. Periods that were already compiled are
+    skipped, so the recorder can safely compile a period again.
+    """
+    end = start + timedelta(seconds=PERIOD_5MINUTE)
+    try:
+        with session_scope(session=instance.get_session()) as session:
+            if not _is_compiled(session, PERIOD_5MINUTE, start):
+                rows = _compile_5minute(
+                    session, start, end, states, instance.entity_filter
+                )
+                session.add_all(rows)
+                _LOGGER.debug("Compiled 5 minute statistics of %s entities", len(rows))
+
+            if end == period_start(end, PERIOD_HOUR):
+                hour_start = end - timedelta(seconds=PERIOD_HOUR)
+                session.flush()
+                if not _is_compiled(session, PERIOD_HOUR, hour_start):
+                    rows = _compile_hour(session, hour_start, end)
+                    session.add_all(rows)
+                    _LOGGER.debug(
+                        "Compiled hourly statistics of %s entities", len(rows)
+                    )
+    except SQLAlchemyError as err:
+        _LOGGER.warning("Error compiling statistics: %s", err)
+
+
+def compile_missing_statistics(
+    instance,
+    start: datetime,
+    states: List[State],
+    next_start: Optional[datetime] = None,
+) -> Optional[datetime]:
+    """Compile the 5 minute statistics up to the period starting at start.
+
+    The periods missed since the last compiled one, eg. while Home Assistant
+    was stopped, are compiled first. Periods older than the states that are
+    kept are not compiled anymore. At most MAX_MISSING_PERIODS periods are
+    compiled, the start of the next period to compile is returned if periods
+    are left.
+    """
+    if next_start is None:
+        try:
+            with session_scope(session=instance.get_session()) as session:
+                last_start = (
+                    session.query(func.max(Statistics.start))
+                    .filter(Statistics.period == PERIOD_5MINUTE)
+                    .scalar()
+                )
+        except SQLAlchemyError as err:
+            _LOGGER.warning("Error compiling statistics: %s", err)
+            return None
+
+        next_start = start
+        if last_start is not None:
+            next_start = max(
+                process_timestamp(last_start) + timedelta(seconds=PERIOD_5MINUTE),
+                period_start(
+                    start - timedelta(days=instance.keep_days), PERIOD_5MINUTE
+                ),
+            )
+        if next_start < start:
+            _LOGGER.debug("Compiling missed statistics since %s", next_start)
+
+    for _ in range(MAX_MISSING_PERIODS):
+        if next_start > start:
+            return None
+        compile_statistics(instance, next_start, states)
+        next_start += timedelta(seconds=PERIOD_5MINUTE)
+    return next_start if next_start <= start else None
+
+
+def _is_compiled(session, period: int, start: datetime) -> bool:
+    """Return if statistics were compiled for a period."""
+    return (
+        session.query(Statistics.id)
+        .filter(Statistics.period == period)
+        .filter(Statistics.start == start)
+        .first()
+        is not None
+    )
+
+
+def _to_float(state: Optional[str]) -> Optional[float]:
+    """Return the numeric value of a state, None if it is not numeric."""
+    try:
+        return float(state)  # type: ignore
+    except (TypeError, ValueError):
+        return None
+
+
+def _compile_5minute(
+    session,
+    start: datetime,
+    end: datetime,
+    states: List[State],
+    entity_filter: Callable[[str], bool],
+) -> List[Statistics]:
+    """Aggregate the states of the recorded entities changed between start and end."""
+    # The value at the end of the previous period is the value at start
+    previous = {
+        entity_id: (last, total)
+        for entity_id, last, total in session.query(
+            Statistics.entity_id, Statistics.last, Statistics.sum
+        )
+        .filter(Statistics.period == PERIOD_5MINUTE)
+        .filter(Statistics.start == start - timedelta(seconds=PERIOD_5MINUTE))
+        if entity_filter(entity_id)
+    }
+    # Entities without statistics of the previous period, eg. as their state
+    # didn't change since before the first compiled period, start with their
+    # current state if it is older than start, else with the last recorded one
+    seeds = [state for state in states if state.entity_id not in previous]
+    last_values = _last_values_before(
+        session,
+        [state.entity_id for state in seeds if state.last_updated >= start],
+        start,
+    )
+    for state in seeds:
+        if state.last_updated < start:
+            initial = _to_float(state.state)
+        else:
+            initial = last_values.get(state.entity_id)
+        if initial is not None:
+            is_meter = state.attributes.get(ATTR_DEVICE_CLASS) in METER_DEVICE_CLASSES
+            previous[state.entity_id] = (initial, 0.0 if is_meter else None)
+
+    changes: Dict[str, List] = defaultdict(list)
+    last_attributes: Dict[str, Optional[str]] = {}
+    query = (
+        session.query(
+            States.entity_id, States.state, States.last_updated, STATE_ATTRIBUTES
+        )
+        .outerjoin(
+            StateAttributes, States.attributes_id == StateAttributes.attributes_id
+        )
+        .filter(States.domain.in_(STATISTICS_DOMAINS))
+        .filter(States.last_updated >= start)
+        .filter(States.last_updated < end)
+        .order_by(States.entity_id, States.last_updated)
+    )
+    for entity_id, state, last_updated, attributes in query:
+        if not entity_filter(entity_id):
+            continue
+        changes[entity_id].append((process_timestamp(last_updated), _to_float(state)))
+        last_attributes[entity_id] = attributes
+
+    rows = []
+    for entity_id in set(changes) | set(previous):
+        initial, initial_sum = previous.get(entity_id, (None, None))
+        if entity_id in changes:
+            is_meter = initial_sum is not None or _is_meter(last_attributes[entity_id])
+        else:
+            is_meter = initial_sum is not None
+        row = _aggregate(
+            entity_id, start, end, initial, changes.get(entity_id, []), is_meter
+        )
+        if row is not None:
+            rows.append(row)
+    return rows
+
+
+def _last_values_before(
+    session, entity_ids: List[str], start: datetime
+) -> Dict[str, Optional[float]]:
+    """Return the values of the last states of entities recorded before start."""
+    if not entity_ids:
+        return {}
+    last_updated = (
+        session.query(
+            States.entity_id, func.max(States.last_updated).label("max_last_updated")
+        )
+        .filter(States.entity_id.in_(entity_ids))
+        .filter(States.last_updated < start)
+        .group_by(States.entity_id)
+        .subquery()
+    )
+    query = (
+        session.query(States.entity_id, States.state)
+        .join(
+            last_updated,
+            and_(
+                States.entity_id == last_updated.c.entity_id,
+                States.last_updated == last_updated.c.max_last_updated,
+            ),
+        )
+        .order_by(States.state_id)
+    )
+    return {entity_id: _to_float(state) for entity_id, state in query}
+
+
+def _is_meter(attributes: Optional[str]) -> bool:
+    """Return if serialized attributes are the ones of a meter."""
+    if not attributes:
+        return False
+    try:
+        device_class = json.loads(attributes).get(ATTR_DEVICE_CLASS)
+    except ValueError:
+        return False
+    return device_class in METER_DEVICE_CLASSES
+
+
+def _aggregate(
+    entity_id: str,
+    start: datetime,
+    end: datetime,
+    initial: Optional[float],
+    changes: List,
+    is_meter: bool,
+) -> Optional[Statistics]:
+    """Aggregate the values an entity had between start and end.
+
+    The mean is weighted by the time each value was held. Periods in which
+    the state was not numeric, eg. unavailable, are left out.
+    """
+    values = [(start, initial)] + changes + [(end, None)]
+    weighted_sum = 0.0
+    duration = 0.0
+    minimum = maximum = None
+    for (since, value), (until, _) in zip(values, values[1:]):
+        held = (until - since).total_seconds()
+        if value is None or held <= 0:
+            continue
+        weighted_sum += value * held
+        duration += held
+        minimum = value if minimum is None else min(minimum, value)
+        maximum = value if maximum is None else max(maximum, value)
+
+    if not duration:
+        return None
+
+    total = None
+    if is_meter:
+        total = 0.0
+        previous = initial
+        for _, value in changes:
+            if value is None:
+                continue
+            if previous is not None:
+                # A meter that went down was reset
+                total += value - previous if value >= previous else value
+            previous = value
+
+    return Statistics(
+        entity_id=entity_id,
+        period=PERIOD_5MINUTE,
+        start=start,
+        mean=weighted_sum / duration,
+        min=minimum,
+        max=maximum,
+        sum=total,
+        last=values[-2][1],
+        duration=duration,
+    )
+
+
+def _compile_hour(session, start: datetime, end: datetime) -> List[Statistics]:
+    """Aggregate the 5 minute statistics of an hour."""
+    periods: Dict[str, List[Statistics]] = defaultdict(list)
+    query = (
+        session.query(Statistics)
+        .filter(Statistics.period == PERIOD_5MINUTE)
+        .filter(Statistics.start >= start)
+        .filter(Statistics.start < end)
+        .order_by(Statistics.entity_id, Statistics.start)
+    )
+    for statistics in query:
+        periods[statistics.entity_id].append(statistics)
+
+    rows = []
+    for entity_id, statistics in periods.items():
+        sums = [row.sum for row in statistics if row.sum is not None]
+        # Weight the means by the time they cover, periods without a numeric
+        # value are missing or only partly covered
+        duration = sum(row.duration for row in statistics)
+        rows.append(
+            Statistics(
+                entity_id=entity_id,
+                period=PERIOD_HOUR,
+                start=start,
+                mean=sum(row.mean * row.duration for row in statistics) / duration,
+                min=min(row.min for row in statistics),
+                max=max(row.max for row in statistics),
+                sum=sum(sums) if sums else None,
+                last=statistics[-1].last,
+                duration=duration,
+            )
+        )
+    return rows
+
+
+def statistics_during_period(
+    hass,
+    start_time: datetime,
+    end_time: Optional[datetime] = None,
+    entity_ids: Optional[List[str]] = None,
+    period: int = PERIOD_HOUR,
+) -> Dict[str, List[dict]]:
+    """Return the statistics of entities between start_time and end_time."""
+    with session_scope(hass=hass) as session:
+        query = (
+            session.query(Statistics)
+            .filter(Statistics.period == period)
+            .filter(Statistics.start >= period_start(start_time, period))
+        )
+        if end_time is not None:
+            query = query.filter(Statistics.start < end_time)
+        if entity_ids is not None:
+            query = query.filter(Statistics.entity_id.in_(entity_ids))
+        query = query.order_by(Statistics.entity_id, Statistics.start)
+
+        result: Dict[str, List[dict]] = defaultdict(list)
+        for statistics in query:
+            result[statistics.entity_id].append(statistics.to_dict())
+        return result
@@ -0,0 +1,30 @@
+"""Provide info to system health."""
+from homeassistant.components import system_health
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DATA_INSTANCE
+
+
+@callback
+def async_register(
+    hass: HomeAssistant, register: system_health.SystemHealthRegistration
+) -> None:
+    """Register system health callbacks."""
+    register.async_register_info(system_health_info)
+
+
+async def system_health_info(hass):
+    """Get info for the info page."""
+    instance = hass.data[DATA_INSTANCE]
+
+    return {
+        "write_mode": "batch" if instance.batch_writes else "session",
+        "queue_depth": instance.queue_depth,
+        "max_queue_depth": instance.max_queue_depth,
+        "queue_overflows": instance.queue_overflows,
+        "spilled_events": instance.spilled_events,
+        "rows_written": instance.rows_written,
+        "rows_per_second": round(instance.rows_per_second, 1),
+        "purge_in_progress": instance.purge_in_progress,
+        "purge_rows_deleted": instance.purge_rows_deleted,
+    }
@@ -8,6 +8,10 @@ PLATFORM_STORAGE_KEY = "template_platforms"
 
 EVENT_TEMPLATE_RELOADED = "event_template_reloaded"
 
+# Seconds a render of a tracked template may take on the event loop, the
+# renders of templates that held up the loop run in the executor
+RENDER_BUDGET = 1.0
+
 PLATFORMS = [
     "alarm_control_panel",
     "binary_sensor",
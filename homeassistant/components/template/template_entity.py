@@ -18,6 +18,8 @@ from homeassistant.helpers.event import (
 )
 from homeassistant.helpers.template import Template, result_as_boolean
 
+from .const import RENDER_BUDGET
+
 _LOGGER = logging.getLogger(__name__)
 
 
@@ -254,7 +256,8 @@ class TemplateEntity(Entity):
     async def _async_template_startup(self, *_) -> None:
         template_var_tups = []
         for template, attributes in self._template_attrs.items():
-            template_var_tups.append(TrackTemplate(template, None))
+            template.render_budget = RENDER_BUDGET
+            template_var_tups.append(TrackTemplate(template, None, offload=True))
             for attribute in attributes:
                 attribute.async_setup()
 
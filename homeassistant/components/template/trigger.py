@@ -14,6 +14,8 @@ from homeassistant.helpers.event import (
 )
 from homeassistant.helpers.template import result_as_boolean
 
+from .const import RENDER_BUDGET
+
 # mypy: allow-untyped-defs, no-check-untyped-defs
 
 _LOGGER = logging.getLogger(__name__)
@@ -99,9 +101,10 @@ async def async_attach_trigger(
 
         delay_cancel = async_call_later(hass, period.seconds, call_action)
 
+    value_template.render_budget = RENDER_BUDGET
     info = async_track_template_result(
         hass,
-        [TrackTemplate(value_template, automation_info["variables"])],
+        [TrackTemplate(value_template, automation_info["variables"], offload=True)],
         template_listener,
     )
     unsub = info.async_remove
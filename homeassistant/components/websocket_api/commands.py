@@ -1,12 +1,13 @@
 """Commands part of Websocket API."""
 import asyncio
+from typing import Any, Dict
 
 import voluptuous as vol
 
 from homeassistant.auth.permissions.const import CAT_ENTITIES, POLICY_READ
 from homeassistant.components.websocket_api.const import ERR_NOT_FOUND
 from homeassistant.const import EVENT_STATE_CHANGED, EVENT_TIME_CHANGED, MATCH_ALL
-from homeassistant.core import DOMAIN as HASS_DOMAIN, callback
+from homeassistant.core import DOMAIN as HASS_DOMAIN, State, callback
 from homeassistant.exceptions import (
     HomeAssistantError,
     ServiceNotFound,
@@ -14,7 +15,12 @@ from homeassistant.exceptions import (
     Unauthorized,
 )
 from homeassistant.helpers import config_validation as cv, entity
-from homeassistant.helpers.event import TrackTemplate, async_track_template_result
+from homeassistant.helpers.event import (
+    TrackTemplate,
+    async_track_state_added_domain,
+    async_track_state_change_event,
+    async_track_template_result,
+)
 from homeassistant.helpers.service import async_get_all_descriptions
 from homeassistant.helpers.template import Template
 from homeassistant.loader import IntegrationNotFound, async_get_integration
@@ -29,11 +35,14 @@ def async_register_commands(hass, async_reg):
     """Register commands."""
     async_reg(hass, handle_subscribe_events)
     async_reg(hass, handle_unsubscribe_events)
+    async_reg(hass, handle_subscribe_entities)
     async_reg(hass, handle_call_service)
     async_reg(hass, handle_get_states)
+    async_reg(hass, handle_get_state_changes)
     async_reg(hass, handle_get_services)
     async_reg(hass, handle_get_config)
     async_reg(hass, handle_ping)
+    async_reg(hass, handle_supported_features)
     async_reg(hass, handle_render_template)
     async_reg(hass, handle_manifest_list)
     async_reg(hass, handle_manifest_get)
@@ -75,7 +84,10 @@ def handle_subscribe_events(hass, connection, msg):
             ):
                 return
 
-            connection.send_message(messages.cached_event_message(msg["id"], event))
+            connection.send_message(
+                messages.cached_event_message(msg["id"], event),
+                (msg["id"], event.data["entity_id"]),
+            )
 
     else:
 
@@ -116,6 +128,112 @@ def handle_unsubscribe_events(hass, connection, msg):
         )
 
 
+@callback
+@decorators.websocket_command(
+    {
+        vol.Required("type"): "subscribe_entities",
+        vol.Optional("entity_ids"): cv.entity_ids,
+        vol.Optional("domains"): vol.All(cv.ensure_list, [cv.string]),
+    }
+)
+def handle_subscribe_entities(hass, connection, msg):
+    """Handle subscribe entities command.
+
+    The first event holds the current states of the entities, the next
+    events only what changed since the last state sent to the client:
+    added entities under "a", changes under "c" and removed entities
+    under "r".
+    """
+    entity_ids = set(msg.get("entity_ids", []))
+    domains = set(msg.get("domains", []))
+
+    if not entity_ids and not domains:
+        connection.send_error(
+            msg["id"], const.ERR_INVALID_FORMAT, "No entity_ids or domains given"
+        )
+        return
+
+    entity_perm = connection.user.permissions.check_entity
+    # The states last sent to the client, the diffs are computed against them
+    sent_states: Dict[str, State] = {}
+
+    @callback
+    def forward_state_change(event):
+        """Forward what changed in a state to websocket."""
+        entity_id = event.data["entity_id"]
+        if not entity_perm(entity_id, POLICY_READ):
+            return
+
+        new_state = event.data["new_state"]
+        old_state = sent_states.get(entity_id)
+        # Added entities of a domain are seen by both listeners
+        if new_state is old_state:
+            return
+
+        diff: Dict[str, Any]
+
+        if new_state is None:
+            del sent_states[entity_id]
+            diff = {"r": [entity_id]}
+        elif old_state is None:
+            sent_states[entity_id] = new_state
+            diff = {"a": {entity_id: messages.compressed_state(new_state)}}
+        else:
+            sent_states[entity_id] = new_state
+            state_diff = messages.compressed_state_diff(old_state, new_state)
+            if not state_diff:
+                return
+            diff = {"c": {entity_id: state_diff}}
+
+        connection.send_message(messages.event_message(msg["id"], diff))
+
+    tracked_entity_ids = entity_ids | set(hass.states.async_entity_ids(domains))
+    unsubs = []
+
+    @callback
+    def track_added_entity(event):
+        """Start tracking an entity added to a subscribed domain."""
+        entity_id = event.data["entity_id"]
+        if entity_id not in tracked_entity_ids:
+            tracked_entity_ids.add(entity_id)
+            unsubs.append(
+                async_track_state_change_event(hass, entity_id, forward_state_change)
+            )
+        forward_state_change(event)
+
+    unsubs.append(
+        async_track_state_change_event(hass, tracked_entity_ids, forward_state_change)
+    )
+    if domains:
+        unsubs.append(async_track_state_added_domain(hass, domains, track_added_entity))
+
+    @callback
+    def unsubscribe():
+        """Stop tracking the entities."""
+        for unsub in unsubs:
+            unsub()
+
+    connection.subscriptions[msg["id"]] = unsubscribe
+    connection.send_result(msg["id"])
+
+    for entity_id in tracked_entity_ids:
+        state = hass.states.get(entity_id)
+        if state is not None and entity_perm(entity_id, POLICY_READ):
+            sent_states[entity_id] = state
+
+    connection.send_message(
+        messages.event_message(
+            msg["id"],
+            {
+                "a": {
+                    entity_id: messages.compressed_state(state)
+                    for entity_id, state in sent_states.items()
+                }
+            },
+        )
+    )
+
+
 @decorators.websocket_command(
     {
         vol.Required("type"): "call_service",
@@ -181,7 +299,64 @@ def handle_get_states(hass, connection, msg):
             if entity_perm(state.entity_id, "read")
         ]
 
-    connection.send_message(messages.result_message(msg["id"], states))
+    try:
+        states_json = f"[{', '.join(state.as_json() for state in states)}]"
+    except (ValueError, TypeError):
+        # Let message_to_json log the state that can't be serialized
+        connection.send_message(messages.result_message(msg["id"], states))
+        return
+    connection.send_message(messages.result_message_json(msg["id"], states_json))
+
+
+@callback
+@decorators.websocket_command(
+    {
+        vol.Required("type"): "get_state_changes",
+        vol.Optional("instance_id"): str,
+        vol.Optional("version"): cv.positive_int,
+    }
+)
+def handle_get_state_changes(hass, connection, msg):
+    """Handle get state changes command.
+
+    Returns the states changed and the entities removed since the version a
+    client got with a previous call, or all states when the change log no
+    longer goes back to it.
+    """
+    changes = None
+    if msg.get("instance_id") == hass.states.instance_id and "version" in msg:
+        changes = hass.states.async_changes_since(msg["version"])
+
+    if changes is None:
+        states, removed = hass.states.async_all(), []
+    else:
+        states, removed = changes
+
+    if not connection.user.permissions.access_all_entities("read"):
+        entity_perm = connection.user.permissions.check_entity
+        states = [state for state in states if entity_perm(state.entity_id, "read")]
+        removed = [entity_id for entity_id in removed if entity_perm(entity_id, "read")]
+
+    result = {
+        "instance_id": hass.states.instance_id,
+        "version": hass.states.version,
+        "snapshot": changes is None,
+        "removed": removed,
+    }
+
+    try:
+        states_json = f"[{', '.join(state.as_json() for state in states)}]"
+    except (ValueError, TypeError):
+        # Let message_to_json log the state that can't be serialized
+        result["states"] = states
+        connection.send_message(messages.result_message(msg["id"], result))
+        return
+    result_json = const.JSON_DUMP(result)
+    connection.send_message(
+        messages.result_message_json(
+            msg["id"], f'{result_json[:-1]}, "states": {states_json}}}'
+        )
+    )
 
 
 @decorators.websocket_command({vol.Required("type"): "get_services"})
@@ -236,6 +411,19 @@ def handle_ping(hass, connection, msg):
     connection.send_message(pong_message(msg["id"]))
 
 
+@callback
+@decorators.websocket_command(
+    {
+        vol.Required("type"): "supported_features",
+        vol.Required("features"): {str: int},
+    }
+)
+def handle_supported_features(hass, connection, msg):
+    """Handle the features the client supports."""
+    connection.supported_features = msg["features"]
+    connection.send_result(msg["id"])
+
+
 @decorators.websocket_command(
     {
         vol.Required("type"): "render_template",
@@ -28,6 +28,7 @@ class ActiveConnection:
 
         self.subscriptions: Dict[Hashable, Callable[[], Any]] = {}
         self.last_id = 0
+        self.supported_features: Dict[str, int] = {}
 
     def context(self, msg):
         """Return a context."""
@@ -16,6 +16,8 @@ from .auth import AuthPhase, auth_required_message
 from .const import (
     CANCELLATION_ERRORS,
     DATA_CONNECTIONS,
+    FEATURE_COALESCE_MESSAGES,
+    FEATURE_COALESCE_STATE_CHANGES,
     MAX_PENDING_MSG,
     PENDING_MSG_PEAK,
     PENDING_MSG_PEAK_TIME,
@@ -50,6 +52,17 @@ class WebSocketAdapter(logging.LoggerAdapter):
         return f'[{self.extra["connid"]}] {msg}', kwargs
 
 
+class _CoalescedMessage:
+    """A queued message that newer messages with the same key replace."""
+
+    __slots__ = ("key", "message")
+
+    def __init__(self, key, message):
+        """Initialize the message."""
+        self.key = key
+        self.message = message
+
+
 class WebSocketHandler:
     """Handle an active websocket client connection."""
 
@@ -63,6 +76,9 @@ class WebSocketHandler:
         self._writer_task = None
         self._logger = WebSocketAdapter(_WS_LOGGER, {"connid": id(self)})
         self._peak_checker_unsub = None
+        self._connection = None
+        # Key -> queued message that is replaced by newer messages
+        self._coalesced_messages = {}
 
     async def _writer(self):
         """Write outgoing messages."""
@@ -73,26 +89,70 @@ class WebSocketHandler:
                 if message is None:
                     break
 
-                self._logger.debug("Sending %s", message)
+                if not self._supports(FEATURE_COALESCE_MESSAGES):
+                    await self.wsock.send_str(self._message_json(message))
+                    continue
 
-                if not isinstance(message, str):
-                    message = message_to_json(message)
+                # Send everything that is queued in one frame
+                frame = [self._message_json(message)]
+                while not self._to_write.empty():
+                    message = self._to_write.get_nowait()
+                    if message is None:
+                        break
+                    frame.append(self._message_json(message))
 
-                await self.wsock.send_str(message)
+                if len(frame) == 1:
+                    await self.wsock.send_str(frame[0])
+                else:
+                    await self.wsock.send_str(f"[{','.join(frame)}]")
+
+                if message is None:
+                    break
 
         # Clean up the peaker checker when we shut down the writer
         if self._peak_checker_unsub:
             self._peak_checker_unsub()
             self._peak_checker_unsub = None
 
+    def _supports(self, feature):
+        """Return if the client enabled a feature."""
+        return (
+            self._connection is not None
+            and self._connection.supported_features.get(feature) == 1
+        )
+
+    def _message_json(self, message):
+        """Return the JSON of a queued message."""
+        if isinstance(message, _CoalescedMessage):
+            self._coalesced_messages.pop(message.key, None)
+            message = message.message
+
+        self._logger.debug("Sending %s", message)
+
+        if not isinstance(message, str):
+            message = message_to_json(message)
+        return message
+
     @callback
-    def _send_message(self, message):
+    def _send_message(self, message, coalesce_key=None):
         """Send a message to the client.
 
         Closes connection if the client is not reading the messages.
 
+        A message with a coalesce_key replaces the queued message with the
+        same key if the client enabled coalescing.
+
         Async friendly.
         """
+        if coalesce_key is not None and self._supports(FEATURE_COALESCE_STATE_CHANGES):
+            queued = self._coalesced_messages.get(coalesce_key)
+            if queued is not None:
+                queued.message = message
+                return
+            message = self._coalesced_messages[coalesce_key] = _CoalescedMessage(
+                coalesce_key, message
+            )
+
         try:
             self._to_write.put_nowait(message)
         except asyncio.QueueFull:
@@ -184,7 +244,7 @@ class WebSocketHandler:
                 raise Disconnect from err
 
             self._logger.debug("Received %s", msg_data)
-            connection = await auth.async_handle(msg_data)
+            connection = self._connection = await auth.async_handle(msg_data)
             self.hass.data[DATA_CONNECTIONS] = (
                 self.hass.data.get(DATA_CONNECTIONS, 0) + 1
             )
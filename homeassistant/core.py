@@ -5,6 +5,7 @@ Home Assistant is a Home Automation framework for observing the state
 of entities and react to changes.
 """
 import asyncio
+from collections import OrderedDict
 import datetime
 import enum
 import functools
@@ -29,6 +30,7 @@ from typing import (
     Mapping,
     Optional,
     Set,
+    Tuple,
     TypeVar,
     Union,
     cast,
@@ -70,6 +72,7 @@ from homeassistant.exceptions import (
     ServiceNotFound,
     Unauthorized,
 )
+from homeassistant.helpers.json import json_dumps
 from homeassistant.util import location, network
 from homeassistant.util.async_ import fire_coroutine_threadsafe, run_callback_threadsafe
 import homeassistant.util.dt as dt_util
@@ -106,6 +109,9 @@ BLOCK_LOG_TIMEOUT = 60
 # How long we wait for the result of a service call
 SERVICE_CALL_LIMIT = 10  # seconds
 
+# How many entities the state machine remembers the last change of
+STATE_CHANGE_LOG_SIZE = 10000
+
 # Source of core configuration
 SOURCE_DISCOVERED = "discovered"
 SOURCE_STORAGE = "storage"
@@ -149,6 +155,20 @@ def is_callback(func: Callable[..., Any]) -> bool:
     return getattr(func, "_hass_callback", False) is True
 
 
+def _run_timed(
+    job_timer: Callable[[str, Callable, float], None],
+    origin: str,
+    target: Callable,
+    *args: Any,
+) -> None:
+    """Run a callback and report how long it blocked the event loop."""
+    start = monotonic()
+    try:
+        target(*args)
+    finally:
+        job_timer(origin, target, monotonic() - start)
+
+
 @enum.unique
 class HassJobType(enum.Enum):
     """Represent a job type."""
@@ -236,6 +256,8 @@ class HomeAssistant:
         self._stopped: Optional[asyncio.Event] = None
         # Timeout handler for Core/Helper namespace
         self.timeout: TimeoutManager = TimeoutManager()
+        # If not None, called with the origin, target and run time of callbacks
+        self.job_timer: Optional[Callable[[str, Callable, float], None]] = None
 
     @property
     def is_running(self) -> bool:
@@ -367,7 +389,12 @@ class HomeAssistant:
         if hassjob.job_type == HassJobType.Coroutinefunction:
             task = self.loop.create_task(hassjob.target(*args))
         elif hassjob.job_type == HassJobType.Callback:
-            self.loop.call_soon(hassjob.target, *args)
+            if self.job_timer is None:
+                self.loop.call_soon(hassjob.target, *args)
+            else:
+                self.loop.call_soon(
+                    _run_timed, self.job_timer, "job", hassjob.target, *args
+                )
             return None
         else:
             task = self.loop.run_in_executor(  # type: ignore
@@ -430,7 +457,10 @@ class HomeAssistant:
         args: parameters for method to call.
         """
         if hassjob.job_type == HassJobType.Callback:
-            hassjob.target(*args)
+            if self.job_timer is None:
+                hassjob.target(*args)
+            else:
+                _run_timed(self.job_timer, "job", hassjob.target, *args)
             return None
 
         return self.async_add_hass_job(hassjob, *args)
@@ -572,11 +602,24 @@ class Context:
     user_id: str = attr.ib(default=None)
     parent_id: Optional[str] = attr.ib(default=None)
     id: str = attr.ib(factory=uuid_util.random_uuid_hex)
+    _as_json: Optional[str] = attr.ib(
+        default=None, init=False, repr=False, eq=False, hash=False
+    )
 
     def as_dict(self) -> dict:
         """Return a dictionary representation of the context."""
         return {"id": self.id, "parent_id": self.parent_id, "user_id": self.user_id}
 
+    def as_json(self) -> str:
+        """Return the JSON representation of the context.
+
+        Async friendly.
+        """
+        if self._as_json is None:
+            # The context is frozen, the JSON is a cache
+            object.__setattr__(self, "_as_json", json_dumps(self.as_dict()))
+        return self._as_json  # type: ignore
+
 
 class EventOrigin(enum.Enum):
     """Represent the origin of an event."""
@@ -592,7 +635,7 @@ class EventOrigin(enum.Enum):
 class Event:
     """Representation of an event within the bus."""
 
-    __slots__ = ["event_type", "data", "origin", "time_fired", "context"]
+    __slots__ = ["event_type", "data", "origin", "time_fired", "context", "_as_json"]
 
     def __init__(
         self,
@@ -608,6 +651,7 @@ class Event:
         self.origin = origin
         self.time_fired = time_fired or dt_util.utcnow()
         self.context: Context = context or Context()
+        self._as_json: Optional[str] = None
 
     def __hash__(self) -> int:
         """Make hashable."""
@@ -627,6 +671,36 @@ class Event:
             "context": self.context.as_dict(),
         }
 
+    def as_json(self) -> str:
+        """Return the JSON representation of the event.
+
+        Async friendly.
+
+        States in the event data, eg. of state_changed events, are embedded
+        with their own memoized JSON.
+        """
+        if self._as_json is None:
+            if all(isinstance(key, str) for key in self.data):
+                data = ", ".join(
+                    f"{json_dumps(key)}: "
+                    + (
+                        value.as_json()
+                        if isinstance(value, State)
+                        else json_dumps(value)
+                    )
+                    for key, value in self.data.items()
+                )
+            else:
+                data = json_dumps(self.data)[1:-1]
+            self._as_json = (
+                f'{{"event_type": {json_dumps(self.event_type)}, '
+                f'"data": {{{data}}}, '
+                f'"origin": {json_dumps(str(self.origin.value))}, '
+                f'"time_fired": "{self.time_fired.isoformat()}", '
+                f'"context": {self.context.as_json()}}}'
+            )
+        return self._as_json
+
     def __repr__(self) -> str:
         """Return the representation."""
         # pylint: disable=maybe-no-member
@@ -653,6 +727,8 @@ class EventBus:
     def __init__(self, hass: HomeAssistant) -> None:
         """Initialize a new event bus."""
         self._listeners: Dict[str, List[HassJob]] = {}
+        # event_type -> data key -> data value -> listeners
+        self._keyed_listeners: Dict[str, Dict[str, Dict[Any, List[HassJob]]]] = {}
         self._hass = hass
 
     @callback
@@ -661,7 +737,12 @@ class EventBus:
 
         This method must be run in the event loop.
         """
-        return {key: len(self._listeners[key]) for key in self._listeners}
+        listeners = {key: len(self._listeners[key]) for key in self._listeners}
+        for event_type, keys in self._keyed_listeners.items():
+            listeners[event_type] = listeners.get(event_type, 0) + sum(
+                len(jobs) for index in keys.values() for jobs in index.values()
+            )
+        return listeners
 
     @property
     def listeners(self) -> Dict[str, int]:
@@ -700,6 +781,17 @@ class EventBus:
         if match_all_listeners is not None and event_type != EVENT_HOMEASSISTANT_CLOSE:
             listeners = match_all_listeners + listeners
 
+        keyed_listeners = self._keyed_listeners.get(event_type)
+        if keyed_listeners is not None and event_data:
+            for key, index in keyed_listeners.items():
+                try:
+                    jobs = index.get(event_data.get(key))
+                except TypeError:
+                    # Unhashable values, eg. lists, are never indexed
+                    continue
+                if jobs is not None:
+                    listeners = listeners + jobs
+
         event = Event(event_type, event_data, origin, time_fired, context)
 
         if event_type != EVENT_TIME_CHANGED:
@@ -708,17 +800,34 @@ class EventBus:
         if not listeners:
             return
 
+        job_timer = self._hass.job_timer
+        if job_timer is not None:
+            job_origin = f"event {event_type}"
+            for job in listeners:
+                if job.job_type == HassJobType.Callback:
+                    self._hass.loop.call_soon(
+                        _run_timed, job_timer, job_origin, job.target, event
+                    )
+                else:
+                    self._hass.async_add_hass_job(job, event)
+            return
+
         for job in listeners:
             self._hass.async_add_hass_job(job, event)
 
-    def listen(self, event_type: str, listener: Callable) -> CALLBACK_TYPE:
+    def listen(
+        self,
+        event_type: str,
+        listener: Callable,
+        event_filter: Optional[Dict[str, Any]] = None,
+    ) -> CALLBACK_TYPE:
         """Listen for all events or events of a specific type.
 
         To listen to all events specify the constant ``MATCH_ALL``
         as event_type.
         """
         async_remove_listener = run_callback_threadsafe(
-            self._hass.loop, self.async_listen, event_type, listener
+            self._hass.loop, self.async_listen, event_type, listener, event_filter
         ).result()
 
         def remove_listener() -> None:
@@ -728,15 +837,47 @@ class EventBus:
         return remove_listener
 
     @callback
-    def async_listen(self, event_type: str, listener: Callable) -> CALLBACK_TYPE:
+    def async_listen(
+        self,
+        event_type: str,
+        listener: Callable,
+        event_filter: Optional[Dict[str, Any]] = None,
+    ) -> CALLBACK_TYPE:
         """Listen for all events or events of a specific type.
 
         To listen to all events specify the constant ``MATCH_ALL``
         as event_type.
 
+        An event_filter of a single data key and value, for example
+        ``{ATTR_ENTITY_ID: "light.kitchen"}``, only calls the listener for
+        events with that value. The listeners are indexed on the value, so
+        a listener is not called at all for the events of other values.
+
         This method must be run in the event loop.
         """
-        return self._async_listen_job(event_type, HassJob(listener))
+        if event_filter is None:
+            return self._async_listen_job(event_type, HassJob(listener))
+
+        if len(event_filter) != 1:
+            raise ValueError("The event filter must have a single key")
+        if event_type == MATCH_ALL:
+            raise ValueError("Filtered listeners need an event type")
+        ((key, value),) = event_filter.items()
+        return self._async_listen_keyed_job(event_type, key, value, HassJob(listener))
+
+    @callback
+    def _async_listen_keyed_job(
+        self, event_type: str, key: str, value: Any, hassjob: HassJob
+    ) -> CALLBACK_TYPE:
+        self._keyed_listeners.setdefault(event_type, {}).setdefault(key, {}).setdefault(
+            value, []
+        ).append(hassjob)
+
+        def remove_listener() -> None:
+            """Remove the listener."""
+            self._async_remove_keyed_listener(event_type, key, value, hassjob)
+
+        return remove_listener
 
     @callback
     def _async_listen_job(self, event_type: str, hassjob: HassJob) -> CALLBACK_TYPE:
@@ -816,6 +957,31 @@ class EventBus:
             # ValueError if listener did not exist within event_type
             _LOGGER.exception("Unable to remove unknown job listener %s", hassjob)
 
+    @callback
+    def _async_remove_keyed_listener(
+        self, event_type: str, key: str, value: Any, hassjob: HassJob
+    ) -> None:
+        """Remove a listener of a specific event_type and data value.
+
+        This method must be run in the event loop.
+        """
+        try:
+            keys = self._keyed_listeners[event_type]
+            jobs = keys[key][value]
+            jobs.remove(hassjob)
+
+            # delete the empty parts of the index
+            if not jobs:
+                keys[key].pop(value)
+                if not keys[key]:
+                    keys.pop(key)
+                    if not keys:
+                        self._keyed_listeners.pop(event_type)
+        except (KeyError, ValueError):
+            # KeyError is key event_type listener did not exist
+            # ValueError if listener did not exist within event_type
+            _LOGGER.exception("Unable to remove unknown job listener %s", hassjob)
+
 
 class State:
     """Object to represent a state within the state machine.
@@ -840,6 +1006,8 @@ class State:
         "domain",
         "object_id",
         "_as_dict",
+        "_as_json",
+        "_attributes_json",
     ]
 
     def __init__(
@@ -875,6 +1043,8 @@ class State:
         self.context = context or Context()
         self.domain, self.object_id = split_entity_id(self.entity_id)
         self._as_dict: Optional[Dict[str, Collection[Any]]] = None
+        self._as_json: Optional[str] = None
+        self._attributes_json: Optional[str] = None
 
     @property
     def name(self) -> str:
@@ -907,6 +1077,35 @@ class State:
             }
         return self._as_dict
 
+    def as_json(self) -> str:
+        """Return the JSON representation of the State.
+
+        Async friendly.
+
+        The JSON is built once and shared by everything that sends or stores
+        the state, the same as json.dumps(state.as_dict()).
+        """
+        if self._as_json is None:
+            as_dict = self.as_dict()
+            self._as_json = (
+                f'{{"entity_id": {json_dumps(self.entity_id)}, '
+                f'"state": {json_dumps(self.state)}, '
+                f'"attributes": {self.attributes_json()}, '
+                f'"last_changed": "{as_dict["last_changed"]}", '
+                f'"last_updated": "{as_dict["last_updated"]}", '
+                f'"context": {self.context.as_json()}}}'
+            )
+        return self._as_json
+
+    def attributes_json(self) -> str:
+        """Return the JSON representation of the attributes.
+
+        Async friendly.
+        """
+        if self._attributes_json is None:
+            self._attributes_json = json_dumps(dict(self.attributes))
+        return self._attributes_json
+
     @classmethod
     def from_dict(cls, json_dict: Dict) -> Any:
         """Initialize a state from a dict.
@@ -962,7 +1161,13 @@ class State:
 
 
 class StateMachine:
-    """Helper class that tracks the state of different entities."""
+    """Helper class that tracks the state of different entities.
+
+    Every change of a state increments the version of the state machine. The
+    version of the last change of each entity is kept in a change log, ordered
+    from the oldest to the newest change, so the entities changed since a
+    version can be found without comparing all states.
+    """
 
     def __init__(self, bus: EventBus, loop: asyncio.events.AbstractEventLoop) -> None:
         """Initialize state machine."""
@@ -970,6 +1175,55 @@ class StateMachine:
         self._reservations: Set[str] = set()
         self._bus = bus
         self._loop = loop
+        # Versions are only comparable within the same instance
+        self.instance_id = uuid_util.random_uuid_hex()
+        self._version = 0
+        self._change_log: "OrderedDict[str, int]" = OrderedDict()
+        # Changes up to this version may have been dropped from the log
+        self._change_log_floor = 0
+
+    @property
+    def version(self) -> int:
+        """Return the version of the last change."""
+        return self._version
+
+    @callback
+    def _async_log_change(self, entity_id: str) -> None:
+        """Record a change of the state of an entity."""
+        self._version += 1
+        change_log = self._change_log
+        change_log[entity_id] = self._version
+        change_log.move_to_end(entity_id)
+        if len(change_log) > STATE_CHANGE_LOG_SIZE:
+            _, self._change_log_floor = change_log.popitem(last=False)
+
+    @callback
+    def async_changes_since(
+        self, version: int
+    ) -> Optional[Tuple[List[State], List[str]]]:
+        """Return the states changed and entity ids removed after a version.
+
+        Returns None if the change log no longer goes back to the version.
+
+        This method must be run in the event loop.
+        """
+        if version < self._change_log_floor or version > self._version:
+            return None
+
+        changed: List[State] = []
+        removed: List[str] = []
+        for entity_id, change_version in reversed(self._change_log.items()):
+            if change_version <= version:
+                break
+            state = self._states.get(entity_id)
+            if state is None:
+                removed.append(entity_id)
+            else:
+                changed.append(state)
+
+        changed.reverse()
+        removed.reverse()
+        return changed, removed
 
     def entity_ids(self, domain_filter: Optional[str] = None) -> List[str]:
         """List of entity ids that are being tracked."""
@@ -1081,6 +1335,7 @@ class StateMachine:
         if old_state is None:
             return False
 
+        self._async_log_change(entity_id)
         self._bus.async_fire(
             EVENT_STATE_CHANGED,
             {"entity_id": entity_id, "old_state": old_state, "new_state": None},
@@ -1186,6 +1441,7 @@ class StateMachine:
             old_state is None,
         )
         self._states[entity_id] = state
+        self._async_log_change(entity_id)
         self._bus.async_fire(
             EVENT_STATE_CHANGED,
             {"entity_id": entity_id, "old_state": old_state, "new_state": state},
@@ -1479,7 +1735,15 @@ class ServiceRegistry:
         if handler.job.job_type == HassJobType.Coroutinefunction:
             await handler.job.target(service_call)
         elif handler.job.job_type == HassJobType.Callback:
-            handler.job.target(service_call)
+            if self._hass.job_timer is None:
+                handler.job.target(service_call)
+            else:
+                _run_timed(
+                    self._hass.job_timer,
+                    f"service {service_call.domain}.{service_call.service}",
+                    handler.job.target,
+                    service_call,
+                )
         else:
             await self._hass.async_add_executor_job(handler.job.target, service_call)
 
@@ -7,6 +7,7 @@ import attr
 
 from homeassistant.const import EVENT_HOMEASSISTANT_STARTED
 from homeassistant.core import Event, callback
+from homeassistant.util import add_to_secondary_index, remove_from_secondary_index
 import homeassistant.util.uuid as uuid_util
 
 from .debounce import Debouncer
@@ -121,6 +122,9 @@ class DeviceRegistry:
     devices: Dict[str, DeviceEntry]
     deleted_devices: Dict[str, DeletedDeviceEntry]
     _devices_index: Dict[str, Dict[str, Dict[str, str]]]
+    # Ids of registered devices by area id and by config entry id
+    _area_index: Dict[str, Dict[str, None]]
+    _config_entry_index: Dict[str, Dict[str, None]]
 
     def __init__(self, hass: HomeAssistantType) -> None:
         """Initialize the device registry."""
@@ -179,6 +183,7 @@ class DeviceRegistry:
         else:
             devices_index = self._devices_index[REGISTERED_DEVICE]
             self.devices[device.id] = device
+            self._add_device_to_secondary_indexes(device)
 
         _add_device_to_index(devices_index, device)
 
@@ -190,6 +195,11 @@ class DeviceRegistry:
         else:
             devices_index = self._devices_index[REGISTERED_DEVICE]
             self.devices.pop(device.id)
+            remove_from_secondary_index(self._area_index, device.area_id, device.id)
+            for config_entry_id in device.config_entries:
+                remove_from_secondary_index(
+                    self._config_entry_index, config_entry_id, device.id
+                )
 
         _remove_device_from_index(devices_index, device)
 
@@ -201,18 +211,43 @@ class DeviceRegistry:
         _remove_device_from_index(devices_index, old_device)
         _add_device_to_index(devices_index, new_device)
 
+        # Only move devices in the secondary indexes when their keys change to keep
+        # their order
+        if old_device.area_id != new_device.area_id:
+            remove_from_secondary_index(
+                self._area_index, old_device.area_id, old_device.id
+            )
+            add_to_secondary_index(self._area_index, new_device.area_id, new_device.id)
+        for config_entry_id in old_device.config_entries - new_device.config_entries:
+            remove_from_secondary_index(
+                self._config_entry_index, config_entry_id, old_device.id
+            )
+        for config_entry_id in new_device.config_entries - old_device.config_entries:
+            add_to_secondary_index(
+                self._config_entry_index, config_entry_id, new_device.id
+            )
+
+    def _add_device_to_secondary_indexes(self, device: DeviceEntry) -> None:
+        """Add a registered device to the indexes by area and config entry."""
+        add_to_secondary_index(self._area_index, device.area_id, device.id)
+        for config_entry_id in device.config_entries:
+            add_to_secondary_index(self._config_entry_index, config_entry_id, device.id)
+
     def _clear_index(self):
         """Clear the index."""
         self._devices_index = {
             REGISTERED_DEVICE: {IDX_IDENTIFIERS: {}, IDX_CONNECTIONS: {}},
             DELETED_DEVICE: {IDX_IDENTIFIERS: {}, IDX_CONNECTIONS: {}},
         }
+        self._area_index = {}
+        self._config_entry_index = {}
 
     def _rebuild_index(self):
         """Create the index after loading devices."""
         self._clear_index()
         for device in self.devices.values():
             _add_device_to_index(self._devices_index[REGISTERED_DEVICE], device)
+            self._add_device_to_secondary_indexes(device)
         for device in self.deleted_devices.values():
             _add_device_to_index(self._devices_index[DELETED_DEVICE], device)
 
@@ -520,10 +555,17 @@ class DeviceRegistry:
 
         return data
 
+    @callback
+    def _async_devices_for_index(
+        self, index: Dict[str, Dict[str, None]], key: str
+    ) -> List[DeviceEntry]:
+        """Return the registered devices with a key in a secondary index."""
+        return [self.devices[device_id] for device_id in index.get(key, ())]
+
     @callback
     def async_clear_config_entry(self, config_entry_id: str) -> None:
         """Clear config entry from registry entries."""
-        for device in list(self.devices.values()):
+        for device in async_entries_for_config_entry(self, config_entry_id):
             self._async_update_device(device.id, remove_config_entry_id=config_entry_id)
         for deleted_device in list(self.deleted_devices.values()):
             config_entries = deleted_device.config_entries
@@ -544,9 +586,8 @@ class DeviceRegistry:
     @callback
     def async_clear_area_id(self, area_id: str) -> None:
         """Clear area id from registry entries."""
-        for dev_id, device in self.devices.items():
-            if area_id == device.area_id:
-                self._async_update_device(dev_id, area_id=None)
+        for device in async_entries_for_area(self, area_id):
+            self._async_update_device(device.id, area_id=None)
 
 
 @singleton(DATA_REGISTRY)
@@ -560,7 +601,8 @@ async def async_get_registry(hass: HomeAssistantType) -> DeviceRegistry:
 @callback
 def async_entries_for_area(registry: DeviceRegistry, area_id: str) -> List[DeviceEntry]:
     """Return entries that match an area."""
-    return [device for device in registry.devices.values() if device.area_id == area_id]
+    # pylint: disable=protected-access
+    return registry._async_devices_for_index(registry._area_index, area_id)
 
 
 @callback
@@ -568,11 +610,10 @@ def async_entries_for_config_entry(
     registry: DeviceRegistry, config_entry_id: str
 ) -> List[DeviceEntry]:
     """Return entries that match a config entry."""
-    return [
-        device
-        for device in registry.devices.values()
-        if config_entry_id in device.config_entries
-    ]
+    # pylint: disable=protected-access
+    return registry._async_devices_for_index(
+        registry._config_entry_index, config_entry_id
+    )
 
 
 @callback
@@ -5,7 +5,18 @@ from datetime import datetime, timedelta
 import functools as ft
 import logging
 from timeit import default_timer as timer
-from typing import Any, Awaitable, Dict, Iterable, List, Optional
+from typing import (
+    Any,
+    AsyncContextManager,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
 
 from homeassistant.config import DATA_CUSTOMIZE
 from homeassistant.const import (
@@ -24,20 +35,32 @@ from homeassistant.const import (
     TEMP_CELSIUS,
     TEMP_FAHRENHEIT,
 )
-from homeassistant.core import CALLBACK_TYPE, Context, HomeAssistant, callback
+from homeassistant.core import (
+    CALLBACK_TYPE,
+    Context,
+    HomeAssistant,
+    State,
+    callback,
+    split_entity_id,
+)
 from homeassistant.exceptions import HomeAssistantError, NoEntitySpecifiedError
 from homeassistant.helpers.entity_platform import EntityPlatform
 from homeassistant.helpers.entity_registry import RegistryEntry
+from homeassistant.helpers.entity_values import EntityValues
 from homeassistant.helpers.event import Event, async_track_entity_registry_updated_event
+from homeassistant.helpers.executor import async_add_executor_job
 from homeassistant.helpers.typing import StateType
 from homeassistant.loader import bind_hass
 from homeassistant.util import dt as dt_util, ensure_unique_string, slugify
 
+T = TypeVar("T")
+
 _LOGGER = logging.getLogger(__name__)
 SLOW_UPDATE_WARNING = 10
 DATA_ENTITY_SOURCE = "entity_info"
 SOURCE_CONFIG_ENTRY = "config_entry"
 SOURCE_PLATFORM_CONFIG = "platform_config"
+DATA_SKIPPED_STATE_WRITES = "entity_skipped_state_writes"
 
 
 @callback
@@ -47,6 +70,13 @@ def entity_sources(hass: HomeAssistant) -> Dict[str, Dict[str, str]]:
     return hass.data.get(DATA_ENTITY_SOURCE, {})
 
 
+@callback
+@bind_hass
+def async_skipped_state_writes(hass: HomeAssistant) -> Dict[str, int]:
+    """Get the state writes skipped because nothing changed, by integration."""
+    return dict(hass.data.get(DATA_SKIPPED_STATE_WRITES, {}))
+
+
 def generate_entity_id(
     entity_id_format: str,
     name: Optional[str],
@@ -123,6 +153,16 @@ class Entity(ABC):
     # If entity is added to an entity platform
     _added = False
 
+    # The properties the last written state was made of, and the written state
+    _write_fingerprint: Optional[Tuple] = None
+    _written_state: Optional[State] = None
+
+    # The customizations, capability attributes and other attributes that
+    # don't change between state writes, see cache_static_attributes
+    _static_attributes: Optional[
+        Tuple[Optional[EntityValues], Dict[str, Any], Dict[str, Any]]
+    ] = None
+
     @property
     def should_poll(self) -> bool:
         """Return True if entity has to be polled for state.
@@ -213,6 +253,17 @@ class Entity(ABC):
         """Return True if unable to access real state of the entity."""
         return False
 
+    @property
+    def cache_static_attributes(self) -> bool:
+        """Return True if the attributes besides the state attributes are static.
+
+        The capability attributes, unit of measurement, name, icon, entity
+        picture, assumed state, supported features and device class are then
+        read on the first state write only, and again after a registry update or
+        a call to async_invalidate_static_attributes.
+        """
+        return False
+
     @property
     def force_update(self) -> bool:
         """Return True if state updates should be forced.
@@ -296,31 +347,19 @@ class Entity(ABC):
         self._async_write_ha_state()
 
     @callback
-    def _async_write_ha_state(self) -> None:
-        """Write the state to the state machine."""
-        if self.registry_entry and self.registry_entry.disabled_by:
-            if not self._disabled_reported:
-                self._disabled_reported = True
-                assert self.platform is not None
-                _LOGGER.warning(
-                    "Entity %s is incorrectly being triggered for updates while it is disabled. This is a bug in the %s integration",
-                    self.entity_id,
-                    self.platform.platform_name,
-                )
-            return
-
-        start = timer()
+    def async_invalidate_static_attributes(self) -> None:
+        """Read the static attributes again on the next state write."""
+        self._static_attributes = None
 
-        attr = self.capability_attributes
-        attr = dict(attr) if attr else {}
+    @callback
+    def _async_static_attributes(
+        self, customize: Optional[EntityValues]
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Return the capability attributes and the attributes overriding the rest."""
+        capability_attr = self.capability_attributes
+        capability_attr = dict(capability_attr) if capability_attr else {}
 
-        if not self.available:
-            state = STATE_UNAVAILABLE
-        else:
-            sstate = self.state
-            state = STATE_UNKNOWN if sstate is None else str(sstate)
-            attr.update(self.state_attributes or {})
-            attr.update(self.device_state_attributes or {})
+        attr: Dict[str, Any] = {}
 
         unit_of_measurement = self.unit_of_measurement
         if unit_of_measurement is not None:
@@ -352,6 +391,44 @@ class Entity(ABC):
         if device_class is not None:
             attr[ATTR_DEVICE_CLASS] = str(device_class)
 
+        if customize is not None:
+            attr.update(customize.get(self.entity_id))
+
+        return capability_attr, attr
+
+    @callback
+    def _async_write_ha_state(self) -> None:
+        """Write the state to the state machine."""
+        if self.registry_entry and self.registry_entry.disabled_by:
+            if not self._disabled_reported:
+                self._disabled_reported = True
+                assert self.platform is not None
+                _LOGGER.warning(
+                    "Entity %s is incorrectly being triggered for updates while it is disabled. This is a bug in the %s integration",
+                    self.entity_id,
+                    self.platform.platform_name,
+                )
+            return
+
+        start = timer()
+
+        assert self.hass is not None
+        customize = self.hass.data.get(DATA_CUSTOMIZE)
+        static = self._static_attributes
+        if static is None or static[0] is not customize:
+            static = (customize, *self._async_static_attributes(customize))
+            if self.cache_static_attributes:
+                self._static_attributes = static
+        _, capability_attr, static_attr = static
+
+        available = self.available
+        if available:
+            sstate = self.state
+            state_attributes = self.state_attributes
+            device_state_attributes = self.device_state_attributes
+        else:
+            sstate = state_attributes = device_state_attributes = None
+
         end = timer()
 
         if end - start > 0.4 and not self._slow_reported:
@@ -377,10 +454,41 @@ class Entity(ABC):
                 extra,
             )
 
-        # Overwrite properties that have been set in the config file.
-        assert self.hass is not None
-        if DATA_CUSTOMIZE in self.hass.data:
-            attr.update(self.hass.data[DATA_CUSTOMIZE].get(self.entity_id))
+        # Skip writing when the entity is unchanged since its last write
+        fingerprint = (
+            static,
+            self.hass.config.units,
+            available,
+            sstate,
+            dict(state_attributes) if state_attributes else None,
+            dict(device_state_attributes) if device_state_attributes else None,
+        )
+        if (
+            fingerprint == self._write_fingerprint
+            and not self.force_update
+            and self.hass.states.get(self.entity_id) is self._written_state
+        ):
+            skipped_writes = self.hass.data.setdefault(DATA_SKIPPED_STATE_WRITES, {})
+            integration = (
+                self.platform.platform_name
+                if self.platform
+                else split_entity_id(self.entity_id)[0]
+            )
+            skipped_writes[integration] = skipped_writes.get(integration, 0) + 1
+            return
+
+        attr = dict(capability_attr)
+
+        if not available:
+            state = STATE_UNAVAILABLE
+        else:
+            state = STATE_UNKNOWN if sstate is None else str(sstate)
+            attr.update(state_attributes or {})
+            attr.update(device_state_attributes or {})
+
+        # Overwrite state attributes with the static ones and the properties
+        # that have been set in the config file.
+        attr.update(static_attr)
 
         # Convert temperature if we detect one
         try:
@@ -408,6 +516,8 @@ class Entity(ABC):
         self.hass.states.async_set(
             self.entity_id, state, attr, self.force_update, self._context
         )
+        self._write_fingerprint = fingerprint
+        self._written_state = self.hass.states.get(self.entity_id)
 
     def schedule_update_ha_state(self, force_refresh: bool = False) -> None:
         """Schedule an update ha state change task.
@@ -440,9 +550,14 @@ class Entity(ABC):
         else:
             self.async_write_ha_state()
 
-    async def async_device_update(self, warning: bool = True) -> None:
+    async def async_device_update(
+        self, warning: bool = True, slot: Optional[AsyncContextManager] = None
+    ) -> None:
         """Process 'update' or 'async_update' from entity.
 
+        The update runs within slot, when given, once the platform allows the
+        entity to update.
+
         This method is a coroutine.
         """
         if self._update_staged:
@@ -454,36 +569,59 @@ class Entity(ABC):
             await self.parallel_updates.acquire()
 
         try:
-            # pylint: disable=no-member
-            if hasattr(self, "async_update"):
-                task = self.hass.async_create_task(self.async_update())  # type: ignore
-            elif hasattr(self, "update"):
-                task = self.hass.async_add_executor_job(self.update)  # type: ignore
+            if slot is None:
+                await self._async_run_update(warning)
             else:
-                return
+                async with slot:
+                    await self._async_run_update(warning)
+        finally:
+            self._update_staged = False
+            if self.parallel_updates:
+                self.parallel_updates.release()
 
-            if not warning:
-                await task
-                return
+    @callback
+    def async_add_executor_job(
+        self, target: Callable[..., T], *args: Any
+    ) -> Awaitable[T]:
+        """Add an executor job of the entity.
 
-            finished, _ = await asyncio.wait([task], timeout=SLOW_UPDATE_WARNING)
+        The job keeps to the executor quota of the integration of the entity.
+        """
+        assert self.hass is not None
+        if self.platform is None:
+            return self.hass.async_add_executor_job(target, *args)
+        return async_add_executor_job(
+            self.hass, self.platform.platform_name, target, *args
+        )
 
-            for done in finished:
-                exc = done.exception()
-                if exc:
-                    raise exc
-                return
+    async def _async_run_update(self, warning: bool) -> None:
+        """Run 'update' or 'async_update' of the entity."""
+        # pylint: disable=no-member
+        if hasattr(self, "async_update"):
+            task = self.hass.async_create_task(self.async_update())  # type: ignore
+        elif hasattr(self, "update"):
+            task = self.async_add_executor_job(self.update)  # type: ignore
+        else:
+            return
 
-            _LOGGER.warning(
-                "Update of %s is taking over %s seconds",
-                self.entity_id,
-                SLOW_UPDATE_WARNING,
-            )
+        if not warning:
             await task
-        finally:
-            self._update_staged = False
-            if self.parallel_updates:
-                self.parallel_updates.release()
+            return
+
+        finished, _ = await asyncio.wait([task], timeout=SLOW_UPDATE_WARNING)
+
+        for done in finished:
+            exc = done.exception()
+            if exc:
+                raise exc
+            return
+
+        _LOGGER.warning(
+            "Update of %s is taking over %s seconds",
+            self.entity_id,
+            SLOW_UPDATE_WARNING,
+        )
+        await task
 
     @callback
     def async_on_remove(self, func: CALLBACK_TYPE) -> None:
@@ -615,6 +753,7 @@ class Entity(ABC):
         ent_reg = await self.hass.helpers.entity_registry.async_get_registry()
         old = self.registry_entry
         self.registry_entry = ent_reg.async_get(data["entity_id"])
+        self._static_attributes = None
         assert self.registry_entry is not None
 
         if self.registry_entry.disabled_by is not None:
@@ -686,8 +825,7 @@ class ToggleEntity(Entity):
 
     async def async_turn_on(self, **kwargs: Any) -> None:
         """Turn the entity on."""
-        assert self.hass is not None
-        await self.hass.async_add_executor_job(ft.partial(self.turn_on, **kwargs))
+        await self.async_add_executor_job(ft.partial(self.turn_on, **kwargs))
 
     def turn_off(self, **kwargs: Any) -> None:
         """Turn the entity off."""
@@ -695,8 +833,7 @@ class ToggleEntity(Entity):
 
     async def async_turn_off(self, **kwargs: Any) -> None:
         """Turn the entity off."""
-        assert self.hass is not None
-        await self.hass.async_add_executor_job(ft.partial(self.turn_off, **kwargs))
+        await self.async_add_executor_job(ft.partial(self.turn_off, **kwargs))
 
     def toggle(self, **kwargs: Any) -> None:
         """Toggle the entity."""
@@ -2,6 +2,7 @@
 import asyncio
 from contextvars import ContextVar
 from datetime import datetime, timedelta
+from functools import partial
 from logging import Logger
 from types import ModuleType
 from typing import TYPE_CHECKING, Callable, Coroutine, Dict, Iterable, List, Optional
@@ -22,6 +23,7 @@ from homeassistant.util.async_ import run_callback_threadsafe
 
 from .entity_registry import DISABLED_INTEGRATION
 from .event import async_call_later, async_track_time_interval
+from .polling import EntityPoller, async_get_poll_scheduler
 
 if TYPE_CHECKING:
     from .entity import Entity
@@ -65,11 +67,12 @@ class EntityPlatform:
         self._tasks: List[asyncio.Future] = []
         # Stop tracking tasks after setup is completed
         self._setup_complete = False
-        # Method to cancel the state change listener
-        self._async_unsub_polling: Optional[CALLBACK_TYPE] = None
+        # Pollers of the polling entities by entity id
+        self._pollers: Dict[str, EntityPoller] = {}
+        # Method to cancel looking for entities that started polling
+        self._async_unsub_poll_check: Optional[CALLBACK_TYPE] = None
         # Method to cancel the retry of setup
         self._async_cancel_retry_setup: Optional[CALLBACK_TYPE] = None
-        self._process_updates: Optional[asyncio.Lock] = None
 
         self.parallel_updates: Optional[asyncio.Semaphore] = None
 
@@ -329,16 +332,7 @@ class EntityPlatform:
             )
             raise
 
-        if self._async_unsub_polling is not None or not any(
-            entity.should_poll for entity in self.entities.values()
-        ):
-            return
-
-        self._async_unsub_polling = async_track_time_interval(
-            self.hass,
-            self._update_entity_states,
-            self.scan_interval,
-        )
+        self._async_start_polling()
 
     async def _async_add_entity(
         self, entity, update_before_add, entity_registry, device_registry
@@ -522,9 +516,7 @@ class EntityPlatform:
 
         await asyncio.gather(*tasks)
 
-        if self._async_unsub_polling is not None:
-            self._async_unsub_polling()
-            self._async_unsub_polling = None
+        self._async_stop_polling()
         self._setup_complete = False
 
     async def async_destroy(self) -> None:
@@ -539,13 +531,6 @@ class EntityPlatform:
         """Remove entity id from platform."""
         await self.entities[entity_id].async_remove()
 
-        # Clean up polling job if no longer needed
-        if self._async_unsub_polling is not None and not any(
-            entity.should_poll for entity in self.entities.values()
-        ):
-            self._async_unsub_polling()
-            self._async_unsub_polling = None
-
     async def async_extract_from_service(
         self, service_call: ServiceCall, expand_group: bool = True
     ) -> List["Entity"]:
@@ -589,34 +574,55 @@ class EntityPlatform:
             self.platform_name, name, handle_service, schema
         )
 
-    async def _update_entity_states(self, now: datetime) -> None:
-        """Update the states of all the polling entities.
-
-        To protect from flooding the executor, we will update async entities
-        in parallel and other entities sequential.
+    @callback
+    def _async_start_polling(self, _now: Optional[datetime] = None) -> None:
+        """Start polling the polling entities that are not polled yet.
 
-        This method must be run in the event loop.
+        The entities are polled each at their own offset in the scan interval,
+        to spread the updates of the platform. While some entities don't poll,
+        they are checked every scan interval for whether they started to.
         """
-        if self._process_updates is None:
-            self._process_updates = asyncio.Lock()
-        if self._process_updates.locked():
-            self.logger.warning(
-                "Updating %s %s took longer than the scheduled update interval %s",
-                self.platform_name,
-                self.domain,
-                self.scan_interval,
+        stats = None
+        not_polled = False
+        for entity_id, entity in self.entities.items():
+            if entity_id in self._pollers:
+                continue
+            if not entity.should_poll:
+                not_polled = True
+                continue
+            if stats is None:
+                stats = async_get_poll_scheduler(self.hass).async_stats_for(
+                    self.domain, self.platform_name
+                )
+            poller = self._pollers[entity_id] = EntityPoller(
+                self.hass, self.logger, entity, self.scan_interval, stats
             )
-            return
+            poller.async_start()
+            entity.async_on_remove(partial(self._async_stop_poller, entity_id))
 
-        async with self._process_updates:
-            tasks = []
-            for entity in self.entities.values():
-                if not entity.should_poll:
-                    continue
-                tasks.append(entity.async_update_ha_state(True))
+        if not_polled and self._async_unsub_poll_check is None:
+            self._async_unsub_poll_check = async_track_time_interval(
+                self.hass, self._async_start_polling, self.scan_interval
+            )
+        elif not not_polled and self._async_unsub_poll_check is not None:
+            self._async_unsub_poll_check()
+            self._async_unsub_poll_check = None
 
-            if tasks:
-                await asyncio.gather(*tasks)
+    @callback
+    def _async_stop_poller(self, entity_id: str) -> None:
+        """Stop polling a removed entity."""
+        poller = self._pollers.pop(entity_id, None)
+        if poller is not None:
+            poller.async_stop()
+
+    @callback
+    def _async_stop_polling(self) -> None:
+        """Stop polling all entities."""
+        if self._async_unsub_poll_check is not None:
+            self._async_unsub_poll_check()
+            self._async_unsub_poll_check = None
+        for entity_id in list(self._pollers):
+            self._async_stop_poller(entity_id)
 
 
 current_platform: ContextVar[Optional[EntityPlatform]] = ContextVar(
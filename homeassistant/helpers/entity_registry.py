@@ -35,7 +35,11 @@ from homeassistant.const import (
 )
 from homeassistant.core import Event, callback, split_entity_id, valid_entity_id
 from homeassistant.helpers.device_registry import EVENT_DEVICE_REGISTRY_UPDATED
-from homeassistant.util import slugify
+from homeassistant.util import (
+    add_to_secondary_index,
+    remove_from_secondary_index,
+    slugify,
+)
 from homeassistant.util.yaml import load_yaml
 
 from .singleton import singleton
@@ -57,6 +61,9 @@ DISABLED_HASS = "hass"
 DISABLED_INTEGRATION = "integration"
 DISABLED_USER = "user"
 
+# Attributes of registry entries with an index to look entries up by
+_SECONDARY_INDEX_ATTRS = ("device_id", "area_id", "config_entry_id")
+
 STORAGE_VERSION = 1
 STORAGE_KEY = "core.entity_registry"
 
@@ -126,6 +133,10 @@ class EntityRegistry:
         self.hass = hass
         self.entities: Dict[str, RegistryEntry]
         self._index: Dict[Tuple[str, str, str], str] = {}
+        # Entity ids by device id, area id and config entry id
+        self._secondary_index: Dict[str, Dict[str, Dict[str, None]]] = {
+            attr_name: {} for attr_name in _SECONDARY_INDEX_ATTRS
+        }
         self._store = hass.helpers.storage.Store(STORAGE_VERSION, STORAGE_KEY)
         self.hass.bus.async_listen(
             EVENT_DEVICE_REGISTRY_UPDATED, self.async_device_modified
@@ -422,9 +433,9 @@ class EntityRegistry:
         if not changes:
             return old
 
-        self._remove_index(old)
         new = attr.evolve(old, **changes)
-        self._register_entry(new)
+        self.entities[new.entity_id] = new
+        self._update_index(old, new)
 
         self.async_schedule_save()
 
@@ -514,19 +525,14 @@ class EntityRegistry:
     @callback
     def async_clear_config_entry(self, config_entry: str) -> None:
         """Clear config entry from registry entries."""
-        for entity_id in [
-            entity_id
-            for entity_id, entry in self.entities.items()
-            if config_entry == entry.config_entry_id
-        ]:
-            self.async_remove(entity_id)
+        for entry in self._async_entries_for_index("config_entry_id", config_entry):
+            self.async_remove(entry.entity_id)
 
     @callback
     def async_clear_area_id(self, area_id: str) -> None:
         """Clear area id from registry entries."""
-        for entity_id, entry in self.entities.items():
-            if area_id == entry.area_id:
-                self._async_update_entity(entity_id, area_id=None)  # type: ignore
+        for entry in self._async_entries_for_index("area_id", area_id):
+            self._async_update_entity(entry.entity_id, area_id=None)  # type: ignore
 
     def _register_entry(self, entry: RegistryEntry) -> None:
         self.entities[entry.entity_id] = entry
@@ -534,6 +540,8 @@ class EntityRegistry:
 
     def _add_index(self, entry: RegistryEntry) -> None:
         self._index[(entry.domain, entry.platform, entry.unique_id)] = entry.entity_id
+        for attr_name, index in self._secondary_index.items():
+            add_to_secondary_index(index, getattr(entry, attr_name), entry.entity_id)
 
     def _unregister_entry(self, entry: RegistryEntry) -> None:
         self._remove_index(entry)
@@ -541,12 +549,38 @@ class EntityRegistry:
 
     def _remove_index(self, entry: RegistryEntry) -> None:
         del self._index[(entry.domain, entry.platform, entry.unique_id)]
+        for attr_name, index in self._secondary_index.items():
+            remove_from_secondary_index(
+                index, getattr(entry, attr_name), entry.entity_id
+            )
+
+    def _update_index(self, old: RegistryEntry, new: RegistryEntry) -> None:
+        """Update the indexes, keeping the order of entries that stay in place."""
+        del self._index[(old.domain, old.platform, old.unique_id)]
+        self._index[(new.domain, new.platform, new.unique_id)] = new.entity_id
+        for attr_name, index in self._secondary_index.items():
+            old_key = getattr(old, attr_name)
+            new_key = getattr(new, attr_name)
+            if old_key == new_key and old.entity_id == new.entity_id:
+                continue
+            remove_from_secondary_index(index, old_key, old.entity_id)
+            add_to_secondary_index(index, new_key, new.entity_id)
 
     def _rebuild_index(self) -> None:
         self._index = {}
+        for index in self._secondary_index.values():
+            index.clear()
         for entry in self.entities.values():
             self._add_index(entry)
 
+    @callback
+    def _async_entries_for_index(self, attr_name: str, key: str) -> List[RegistryEntry]:
+        """Return the entries with a device id, area id or config entry id."""
+        return [
+            self.entities[entity_id]
+            for entity_id in self._secondary_index[attr_name].get(key, ())
+        ]
+
 
 @singleton(DATA_REGISTRY)
 async def async_get_registry(hass: HomeAssistantType) -> EntityRegistry:
@@ -561,11 +595,11 @@ def async_entries_for_device(
     registry: EntityRegistry, device_id: str, include_disabled_entities: bool = False
 ) -> List[RegistryEntry]:
     """Return entries that match a device."""
+    # pylint: disable=protected-access
     return [
         entry
-        for entry in registry.entities.values()
-        if entry.device_id == device_id
-        and (not entry.disabled_by or include_disabled_entities)
+        for entry in registry._async_entries_for_index("device_id", device_id)
+        if not entry.disabled_by or include_disabled_entities
     ]
 
 
@@ -574,7 +608,8 @@ def async_entries_for_area(
     registry: EntityRegistry, area_id: str
 ) -> List[RegistryEntry]:
     """Return entries that match an area."""
-    return [entry for entry in registry.entities.values() if entry.area_id == area_id]
+    # pylint: disable=protected-access
+    return registry._async_entries_for_index("area_id", area_id)
 
 
 @callback
@@ -582,11 +617,8 @@ def async_entries_for_config_entry(
     registry: EntityRegistry, config_entry_id: str
 ) -> List[RegistryEntry]:
     """Return entries that match a config entry."""
-    return [
-        entry
-        for entry in registry.entities.values()
-        if entry.config_entry_id == config_entry_id
-    ]
+    # pylint: disable=protected-access
+    return registry._async_entries_for_index("config_entry_id", config_entry_id)
 
 
 async def _async_migrate(entities: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
@@ -90,11 +90,13 @@ class TrackTemplate:
     The template is template to calculate.
     The variables are variables to pass to the template.
     The rate_limit is a rate limit on how often the template is re-rendered.
+    The offload is whether expensive re-renders run in the executor.
     """
 
     template: Template
     variables: TemplateVarsType
     rate_limit: Optional[timedelta] = None
+    offload: bool = False
 
 
 @dataclass
@@ -753,6 +755,8 @@ class _TrackTemplateResultInfo:
         self._info: Dict[Template, RenderInfo] = {}
         self._track_state_changes: Optional[_TrackStateChangeFiltered] = None
         self._time_listeners: Dict[Template, Callable] = {}
+        # Templates rendering in the executor, and if they must render again
+        self._offloaded: Dict[Template, bool] = {}
 
     def async_setup(self, raise_on_template_error: bool) -> None:
         """Activation of template tracking."""
@@ -827,6 +831,7 @@ class _TrackTemplateResultInfo:
         self._rate_limit.async_remove()
         for template in list(self._time_listeners):
             self._time_listeners.pop(template)()
+        self._offloaded.clear()
 
     @callback
     def async_refresh(self) -> None:
@@ -877,10 +882,23 @@ class _TrackTemplateResultInfo:
             )
 
         self._rate_limit.async_triggered(template, now)
+
+        if track_template_.offload and template.is_expensive:
+            self._async_offload_render(track_template_, event)
+            return False
+
         self._info[template] = info = template.async_render_to_info(
             track_template_.variables
         )
+        return self._render_result(template, info)
 
+    def _render_result(
+        self, template: Template, info: RenderInfo
+    ) -> Union[bool, TrackTemplateResult]:
+        """Return True if the result of a render did not change.
+
+        Returns TrackTemplateResult if the render generates a new result.
+        """
         try:
             result: Union[str, TemplateError] = info.result()
         except TemplateError as ex:
@@ -897,6 +915,53 @@ class _TrackTemplateResultInfo:
 
         return TrackTemplateResult(template, last_result, result)
 
+    @callback
+    def _async_offload_render(
+        self, track_template_: TrackTemplate, event: Optional[Event]
+    ) -> None:
+        """Re-render an expensive template in the executor."""
+        template = track_template_.template
+        if template in self._offloaded:
+            # Render again with the latest states when the render is done
+            self._offloaded[template] = True
+            return
+
+        self._offloaded[template] = False
+        self.hass.async_create_task(
+            self._async_render_offloaded(track_template_, event)
+        )
+
+    async def _async_render_offloaded(
+        self, track_template_: TrackTemplate, event: Optional[Event]
+    ) -> None:
+        """Render a template in the executor and handle the result."""
+        template = track_template_.template
+        try:
+            while True:
+                info = await template.async_render_to_info_in_worker(
+                    track_template_.variables, self._info[template]
+                )
+                if not self._offloaded.get(template):
+                    break
+                self._offloaded[template] = False
+        finally:
+            removed = self._offloaded.pop(template, None) is None
+
+        if removed:
+            return
+
+        _LOGGER.debug(
+            "Template %s rendered in the executor in %.3f seconds",
+            template.template,
+            template.render_cost,
+        )
+        self._info[template] = info
+        update = self._render_result(template, info)
+        self._setup_time_listener(template, info.has_time)
+        self._async_update_listeners()
+        if isinstance(update, TrackTemplateResult):
+            self._async_run_updates(event, [update])
+
     @callback
     def _refresh(
         self,
@@ -934,26 +999,36 @@ class _TrackTemplateResultInfo:
                 updates.append(update)
 
         if info_changed:
-            assert self._track_state_changes
-            self._track_state_changes.async_update_listeners(
-                _render_infos_to_track_states(
-                    [
-                        _suppress_domain_all_in_render_info(self._info[template])
-                        if self._rate_limit.async_has_timer(template)
-                        else self._info[template]
-                        for template in self._info
-                    ]
-                )
-            )
-            _LOGGER.debug(
-                "Template group %s listens for %s",
-                self._track_templates,
-                self.listeners,
-            )
+            self._async_update_listeners()
 
-        if not updates:
-            return
+        if updates:
+            self._async_run_updates(event, updates)
 
+    @callback
+    def _async_update_listeners(self) -> None:
+        """Listen for the state changes the last renders depend on."""
+        assert self._track_state_changes
+        self._track_state_changes.async_update_listeners(
+            _render_infos_to_track_states(
+                [
+                    _suppress_domain_all_in_render_info(self._info[template])
+                    if self._rate_limit.async_has_timer(template)
+                    else self._info[template]
+                    for template in self._info
+                ]
+            )
+        )
+        _LOGGER.debug(
+            "Template group %s listens for %s",
+            self._track_templates,
+            self.listeners,
+        )
+
+    @callback
+    def _async_run_updates(
+        self, event: Optional[Event], updates: List[TrackTemplateResult]
+    ) -> None:
+        """Store the new results and run the action with them."""
         for track_result in updates:
             self._last_result[track_result.template] = track_result.result
 
@@ -1441,8 +1516,9 @@ def _render_infos_needs_all_listener(render_infos: Iterable[RenderInfo]) -> bool
 
         # Previous call had an exception
         # so we do not know which states
-        # to track
-        if render_info.exception:
+        # to track unless the template was
+        # analyzed
+        if render_info.exception and not render_info.analyzed:
             return True
 
     return False
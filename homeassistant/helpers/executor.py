@@ -0,0 +1,203 @@
+"""Run sync jobs in named executor pools with per-integration quotas."""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from time import monotonic
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import Event, callback
+from homeassistant.helpers.typing import HomeAssistantType
+from homeassistant.loader import bind_hass
+
+T = TypeVar("T")
+
+DATA_EXECUTOR_POOLS = "executor_pools"
+
+# The pool running on the default executor of the event loop
+DEFAULT_POOL = "default"
+# Jobs one integration may run at once in a pool, unless set otherwise
+EXECUTOR_QUOTA = 16
+
+
+class ExecutorStats:
+    """Job counts, queue waits and run times of a pool.
+
+    Pending jobs are the jobs waiting for their quota, queued or running.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the stats."""
+        self.jobs = 0
+        self.failures = 0
+        self.pending = 0
+        self.max_wait = 0.0
+        self.total_wait = 0.0
+        self.max_run_time = 0.0
+        self.total_run_time = 0.0
+
+    @callback
+    def async_record(self, wait: float, run_time: float, failed: bool) -> None:
+        """Record a job, the seconds it waited in the queue and ran."""
+        self.jobs += 1
+        self.failures += failed
+        self.max_wait = max(self.max_wait, wait)
+        self.total_wait += wait
+        self.max_run_time = max(self.max_run_time, run_time)
+        self.total_run_time += run_time
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the stats with the average wait and run time in seconds."""
+        return {
+            "jobs": self.jobs,
+            "failures": self.failures,
+            "pending": self.pending,
+            "max_wait": self.max_wait,
+            "average_wait": self.total_wait / self.jobs if self.jobs else 0.0,
+            "max_run_time": self.max_run_time,
+            "average_run_time": (self.total_run_time / self.jobs if self.jobs else 0.0),
+        }
+
+
+class ExecutorPool:
+    """A pool of executor threads shared by integrations.
+
+    An integration runs at most its quota of jobs at once in the pool, so
+    that it cannot occupy all the workers of the pool.
+    """
+
+    def __init__(
+        self, name: str, executor: Optional[ThreadPoolExecutor], quota: int
+    ) -> None:
+        """Initialize the pool."""
+        self.name = name
+        self.executor = executor
+        self.quota = quota
+        self.quotas: Dict[str, int] = {}
+        self.stats = ExecutorStats()
+        self._budgets: Dict[str, asyncio.Semaphore] = {}
+
+    @callback
+    def async_set_quota(self, domain: str, quota: int) -> None:
+        """Set the jobs an integration or platform may run at once."""
+        if domain in self._budgets:
+            raise ValueError(f"Jobs of {domain} already run in pool {self.name}")
+        self.quotas[domain] = quota
+
+    @callback
+    def _async_budget(self, domain: str) -> asyncio.Semaphore:
+        """Return the budget of jobs of an integration or platform."""
+        budget = self._budgets.get(domain)
+        if budget is None:
+            budget = self._budgets[domain] = asyncio.Semaphore(
+                self.quotas.get(domain, self.quota)
+            )
+        return budget
+
+    async def async_run_job(
+        self, domain: str, target: Callable[..., T], *args: Any
+    ) -> T:
+        """Run a job of an integration or platform in the pool."""
+        loop = asyncio.get_running_loop()
+        started: List[float] = []
+
+        def run() -> T:
+            """Run the job, noting when it started."""
+            started.append(monotonic())
+            return target(*args)
+
+        stats = self.stats
+        queued = monotonic()
+        stats.pending += 1
+        failed = False
+        try:
+            async with self._async_budget(domain):
+                future = loop.run_in_executor(self.executor, run)
+                try:
+                    return await future
+                except Exception:
+                    failed = True
+                    raise
+        finally:
+            stats.pending -= 1
+            if started:
+                stats.async_record(
+                    started[0] - queued, monotonic() - started[0], failed
+                )
+
+    def __repr__(self) -> str:
+        """Return the representation."""
+        return f"<ExecutorPool {self.name}: quota={self.quota}>"
+
+
+@callback
+def _async_get_pools(hass: HomeAssistantType) -> Dict[str, ExecutorPool]:
+    """Return the executor pools by name."""
+    pools: Optional[Dict[str, ExecutorPool]] = hass.data.get(DATA_EXECUTOR_POOLS)
+    if pools is None:
+        pools = hass.data[DATA_EXECUTOR_POOLS] = {
+            DEFAULT_POOL: ExecutorPool(DEFAULT_POOL, None, EXECUTOR_QUOTA)
+        }
+    return pools
+
+
+@callback
+@bind_hass
+def async_get_executor_pool(
+    hass: HomeAssistantType, name: str = DEFAULT_POOL
+) -> ExecutorPool:
+    """Return an executor pool by name."""
+    return _async_get_pools(hass)[name]
+
+
+@callback
+@bind_hass
+def async_create_executor_pool(
+    hass: HomeAssistantType,
+    name: str,
+    max_workers: int,
+    quota: Optional[int] = None,
+) -> ExecutorPool:
+    """Create an executor pool with its own worker threads.
+
+    The threads are shut down when Home Assistant closes.
+    """
+    pools = _async_get_pools(hass)
+    if name in pools:
+        raise ValueError(f"Executor pool {name} already exists")
+
+    executor = ThreadPoolExecutor(
+        thread_name_prefix=f"SyncWorker_{name}", max_workers=max_workers
+    )
+    pool = pools[name] = ExecutorPool(
+        name, executor, max_workers if quota is None else quota
+    )
+
+    async def async_shutdown(_: Event) -> None:
+        """Shut down the worker threads of the pool."""
+        pools.pop(name, None)
+        await hass.async_add_executor_job(executor.shutdown)
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, async_shutdown)
+    return pool
+
+
+@callback
+@bind_hass
+def async_add_executor_job(
+    hass: HomeAssistantType,
+    domain: str,
+    target: Callable[..., T],
+    *args: Any,
+    pool: str = DEFAULT_POOL,
+) -> Awaitable[T]:
+    """Add an executor job of an integration or platform to a pool."""
+    return hass.async_create_task(
+        async_get_executor_pool(hass, pool).async_run_job(domain, target, *args)
+    )
+
+
+@callback
+@bind_hass
+def async_executor_stats(hass: HomeAssistantType) -> Dict[str, Dict[str, Any]]:
+    """Return the stats of the executor pools by name."""
+    return {name: pool.stats.as_dict() for name, pool in _async_get_pools(hass).items()}
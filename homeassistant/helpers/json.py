@@ -1,7 +1,30 @@
 """Helpers to help with encoding Home Assistant objects in JSON."""
 from datetime import datetime
 import json
-from typing import Any
+import logging
+from typing import Any, Callable, Dict, Tuple
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore
+
+_LOGGER = logging.getLogger(__name__)
+
+JSON_BACKEND_AUTO = "auto"
+JSON_BACKEND_JSON = "json"
+JSON_BACKEND_ORJSON = "orjson"
+
+
+def json_encoder_default(obj: Any) -> Any:
+    """Convert the Home Assistant objects a JSON backend doesn't know."""
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    if isinstance(obj, set):
+        return list(obj)
+    if hasattr(obj, "as_dict"):
+        return obj.as_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
 
 
 class JSONEncoder(json.JSONEncoder):
@@ -12,11 +35,78 @@ class JSONEncoder(json.JSONEncoder):
 
         Hand other objects to the original method.
         """
-        if isinstance(o, datetime):
-            return o.isoformat()
-        if isinstance(o, set):
-            return list(o)
-        if hasattr(o, "as_dict"):
-            return o.as_dict()
-
-        return json.JSONEncoder.default(self, o)
+        try:
+            return json_encoder_default(o)
+        except TypeError:
+            return json.JSONEncoder.default(self, o)
+
+
+# Encoders are reused between calls, indexed by allow_nan and pretty
+_JSON_ENCODERS: Dict[Tuple[bool, bool], JSONEncoder] = {
+    (allow_nan, pretty): JSONEncoder(allow_nan=allow_nan, indent=4 if pretty else None)
+    for allow_nan in (False, True)
+    for pretty in (False, True)
+}
+
+
+def _json_dumps(data: Any, allow_nan: bool, pretty: bool) -> str:
+    """Serialize data to JSON with the json module of the standard library."""
+    return _JSON_ENCODERS[allow_nan, pretty].encode(data)
+
+
+def _orjson_dumps(data: Any, allow_nan: bool, pretty: bool) -> str:
+    """Serialize data to JSON with orjson.
+
+    orjson always writes NaN and infinity as null. Pretty JSON is written by
+    the json module, as orjson can only indent by 2 spaces and stored files
+    would change on their next save.
+    """
+    if pretty:
+        return _json_dumps(data, allow_nan, pretty)
+    return orjson.dumps(
+        data, default=json_encoder_default, option=orjson.OPT_NON_STR_KEYS
+    ).decode("utf-8")
+
+
+JSON_BACKENDS: Dict[str, Callable[[Any, bool, bool], str]] = {
+    JSON_BACKEND_JSON: _json_dumps
+}
+if orjson is not None:
+    JSON_BACKENDS[JSON_BACKEND_ORJSON] = _orjson_dumps
+
+_backend: Callable[[Any, bool, bool], str] = _json_dumps
+
+
+def json_dumps(data: Any, *, allow_nan: bool = False, pretty: bool = False) -> str:
+    """Serialize data with Home Assistant objects to JSON.
+
+    The backend set with set_json_backend is used. Raises TypeError for data
+    that can't be serialized and with the json backend ValueError for NaN and
+    infinity when allow_nan is False.
+    """
+    return _backend(data, allow_nan, pretty)
+
+
+def set_json_backend(name: str) -> str:
+    """Set the backend used by json_dumps and return its name.
+
+    The json backend is the default. The auto backend is orjson when it is
+    installed and json otherwise. A backend that is not installed falls back
+    to json.
+    """
+    global _backend  # pylint: disable=global-statement
+
+    if name == JSON_BACKEND_AUTO:
+        name = (
+            JSON_BACKEND_ORJSON
+            if JSON_BACKEND_ORJSON in JSON_BACKENDS
+            else JSON_BACKEND_JSON
+        )
+    elif name not in JSON_BACKENDS:
+        _LOGGER.warning(
+            "JSON backend %s is not available, using %s", name, JSON_BACKEND_JSON
+        )
+        name = JSON_BACKEND_JSON
+
+    _backend = JSON_BACKENDS[name]
+    return name
@@ -0,0 +1,231 @@
+"""Schedule the polling of entities."""
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+import logging
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional
+import zlib
+
+from homeassistant.core import CALLBACK_TYPE, HassJob, callback
+from homeassistant.helpers.event import async_track_point_in_utc_time
+from homeassistant.helpers.typing import HomeAssistantType
+from homeassistant.loader import bind_hass
+import homeassistant.util.dt as dt_util
+
+if TYPE_CHECKING:
+    from .entity import Entity
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_POLL_SCHEDULER = "poll_scheduler"
+
+# Entity updates running at once across all platforms
+POLL_CONCURRENCY = 32
+# Part of the scan interval the polls of entities are spread over
+POLL_SPREAD = 0.5
+# Most scan intervals an entity waits after failing or timing out in a row
+POLL_MAX_BACKOFF = 8
+
+
+class PollStats:
+    """Poll counts and latencies of a platform."""
+
+    def __init__(self) -> None:
+        """Initialize the stats."""
+        self.polls = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        self.total_latency = 0.0
+        self.total_wait = 0.0
+
+    @callback
+    def async_record(
+        self, wait: float, latency: float, failed: bool, timed_out: bool
+    ) -> None:
+        """Record a poll, the seconds it waited for the budget and ran."""
+        self.polls += 1
+        self.failures += failed
+        self.timeouts += timed_out
+        self.last_latency = latency
+        self.max_latency = max(self.max_latency, latency)
+        self.total_latency += latency
+        self.total_wait += wait
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the stats with the average latency and wait in seconds."""
+        return {
+            "polls": self.polls,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "last_latency": self.last_latency,
+            "max_latency": self.max_latency,
+            "average_latency": self.total_latency / self.polls if self.polls else 0.0,
+            "average_wait": self.total_wait / self.polls if self.polls else 0.0,
+        }
+
+
+class PollScheduler:
+    """Hold the concurrency budget and the stats of polling entities."""
+
+    def __init__(self, concurrency: int) -> None:
+        """Initialize the scheduler."""
+        self.budget = asyncio.Semaphore(concurrency)
+        self.stats: Dict[str, PollStats] = {}
+
+    @callback
+    def async_stats_for(self, domain: str, platform_name: str) -> PollStats:
+        """Return the stats of a platform."""
+        key = f"{domain}.{platform_name}"
+        stats = self.stats.get(key)
+        if stats is None:
+            stats = self.stats[key] = PollStats()
+        return stats
+
+
+@callback
+def async_get_poll_scheduler(hass: HomeAssistantType) -> PollScheduler:
+    """Return the poll scheduler of Home Assistant."""
+    scheduler: Optional[PollScheduler] = hass.data.get(DATA_POLL_SCHEDULER)
+    if scheduler is None:
+        scheduler = hass.data[DATA_POLL_SCHEDULER] = PollScheduler(POLL_CONCURRENCY)
+    return scheduler
+
+
+@callback
+@bind_hass
+def async_poll_stats(hass: HomeAssistantType) -> Dict[str, Dict[str, Any]]:
+    """Return the poll stats by domain and platform name."""
+    return {
+        key: stats.as_dict()
+        for key, stats in async_get_poll_scheduler(hass).stats.items()
+    }
+
+
+def poll_jitter(entity_id: str, scan_interval: timedelta) -> timedelta:
+    """Return how much earlier than the scan interval an entity is polled.
+
+    The jitter is the same every time for an entity id.
+    """
+    fraction = zlib.crc32(entity_id.encode("utf-8")) / 2 ** 32
+    return scan_interval * (POLL_SPREAD * fraction)
+
+
+class EntityPoller:
+    """Poll an entity every scan interval at its own offset in the interval.
+
+    An entity that fails or takes longer than the scan interval waits twice
+    as long before the next poll, up to POLL_MAX_BACKOFF scan intervals.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistantType,
+        logger: logging.Logger,
+        entity: "Entity",
+        scan_interval: timedelta,
+        stats: PollStats,
+    ) -> None:
+        """Initialize the poller."""
+        self.hass = hass
+        self.logger = logger
+        self.entity = entity
+        self.scan_interval = scan_interval
+        self.stats = stats
+        self.backoff = 1
+        self._stopped = False
+        self._unsub_poll: Optional[CALLBACK_TYPE] = None
+        self._poll_job = HassJob(self._async_poll)
+
+    @callback
+    def async_start(self) -> None:
+        """Schedule the first poll within one scan interval."""
+        jitter = poll_jitter(self.entity.entity_id, self.scan_interval)
+        self._async_schedule(dt_util.utcnow() + self.scan_interval - jitter)
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop polling."""
+        self._stopped = True
+        if self._unsub_poll is not None:
+            self._unsub_poll()
+            self._unsub_poll = None
+
+    @callback
+    def _async_schedule(self, when: datetime) -> None:
+        """Schedule the next poll."""
+        self._unsub_poll = async_track_point_in_utc_time(
+            self.hass, self._poll_job, when
+        )
+
+    async def _async_poll(self, _now: datetime) -> None:
+        """Update the entity and schedule the next poll once it is done.
+
+        The offset of the first poll in the scan interval is kept, apart from
+        the time the updates take.
+        """
+        self._unsub_poll = None
+
+        if self.entity.should_poll:
+            await self._async_update()
+
+        if not self._stopped:
+            self._async_schedule(dt_util.utcnow() + self.scan_interval * self.backoff)
+
+    async def _async_update(self) -> None:
+        """Update the entity within the concurrency budget.
+
+        The budget is taken once the platform allows the entity to update, so
+        entities waiting for the other entities of their platform don't hold
+        it. Only the update itself counts as latency.
+        """
+        loop = self.hass.loop
+        queued = loop.time()
+        times: List[float] = []
+
+        @asynccontextmanager
+        async def slot() -> AsyncIterator[None]:
+            """Hold the budget and note when the update starts and ends."""
+            async with async_get_poll_scheduler(self.hass).budget:
+                times.append(loop.time())
+                try:
+                    yield
+                finally:
+                    times.append(loop.time())
+
+        failed = False
+        try:
+            await self.entity.async_device_update(slot=slot())
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.exception("Update for %s fails", self.entity.entity_id)
+            failed = True
+
+        if not times:
+            # The entity was updating already
+            return
+
+        start, end = times
+        latency = end - start
+        timed_out = latency > self.scan_interval.total_seconds()
+        self.stats.async_record(start - queued, latency, failed, timed_out)
+
+        if timed_out:
+            self.logger.warning(
+                "Updating %s took longer than the scheduled update interval %s",
+                self.entity.entity_id,
+                self.scan_interval,
+            )
+
+        if failed or timed_out:
+            self.backoff = min(self.backoff * 2, POLL_MAX_BACKOFF)
+            _LOGGER.debug(
+                "Polling %s every %s scan intervals",
+                self.entity.entity_id,
+                self.backoff,
+            )
+        else:
+            self.backoff = 1
+
+        if not failed and not self._stopped:
+            self.entity.async_write_ha_state()
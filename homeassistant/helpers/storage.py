@@ -1,5 +1,6 @@
 """Helper to help store data."""
 import asyncio
+from functools import partial
 from json import JSONEncoder
 import logging
 import os
@@ -8,6 +9,7 @@ from typing import Any, Callable, Dict, List, Optional, Type, Union
 from homeassistant.const import EVENT_HOMEASSISTANT_FINAL_WRITE
 from homeassistant.core import CALLBACK_TYPE, CoreState, HomeAssistant, callback
 from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.json import JSONEncoder as HassJSONEncoder, json_dumps
 from homeassistant.loader import bind_hass
 from homeassistant.util import json as json_util
 
@@ -231,7 +233,13 @@ class Store:
             os.makedirs(os.path.dirname(path))
 
         _LOGGER.debug("Writing data for %s to %s", self.key, path)
-        json_util.save_json(path, data, self._private, encoder=self._encoder)
+        dumps = None
+        if self._encoder is HassJSONEncoder:
+            # The JSON backend serializes the objects of the default encoder
+            dumps = partial(json_dumps, allow_nan=True, pretty=True)
+        json_util.save_json(
+            path, data, self._private, encoder=self._encoder, dumps=dumps
+        )
 
     async def _async_migrate_func(self, old_version, old_data):
         """Migrate to the new version."""
@@ -2,7 +2,10 @@
 from ast import literal_eval
 import asyncio
 import base64
+from collections import OrderedDict
 import collections.abc
+from contextvars import ContextVar
+import copy
 from datetime import datetime, timedelta
 from functools import partial, wraps
 import json
@@ -11,7 +14,21 @@ import math
 from operator import attrgetter
 import random
 import re
-from typing import Any, Dict, Generator, Iterable, Optional, Type, Union
+import threading
+from time import monotonic
+from typing import (
+    Any,
+    Dict,
+    FrozenSet,
+    Generator,
+    Hashable,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    Union,
+)
 from urllib.parse import urlencode as urllib_urlencode
 import weakref
 
@@ -32,6 +49,12 @@ from homeassistant.const import (
 from homeassistant.core import State, callback, split_entity_id, valid_entity_id
 from homeassistant.exceptions import TemplateError
 from homeassistant.helpers import location as loc_helper
+from homeassistant.helpers.template_analysis import (
+    ANALYZED_NAMES,
+    TemplateDependencies,
+    analyze_template,
+    uses_volatile_values,
+)
 from homeassistant.helpers.typing import HomeAssistantType, TemplateVarsType
 from homeassistant.loader import bind_hass
 from homeassistant.util import convert, dt as dt_util, location as loc_util
@@ -47,6 +70,12 @@ DATE_STR_FORMAT = "%Y-%m-%d %H:%M:%S"
 
 _RENDER_INFO = "template.render_info"
 _ENVIRONMENT = "template.environment"
+_SLOW_TEMPLATES = "template.slow_templates"
+_SNAPSHOT_HASS = "template.snapshot_hass"
+_RENDER_MEMO_STATS = "template.render_memo_stats"
+
+# How many compiled templates are kept after no Template uses them anymore
+COMPILED_TEMPLATE_CACHE_SIZE = 2048
 
 _RE_JINJA_DELIMITERS = re.compile(r"\{%|\{\{|\{#")
 # Match "simple" ints and floats. -1.0, 1, +5, 5.0
@@ -70,6 +99,14 @@ _COLLECTABLE_STATE_ATTRIBUTES = {
 ALL_STATES_RATE_LIMIT = timedelta(minutes=1)
 DOMAIN_STATES_RATE_LIMIT = timedelta(seconds=1)
 
+# Renders taking longer in seconds hold up the event loop and are reported
+SLOW_RENDER_THRESHOLD = 0.05
+
+# The deadline and the budget of the render in progress
+_RENDER_DEADLINE: ContextVar[Optional[Tuple[float, float]]] = ContextVar(
+    "template_render_deadline", default=None
+)
+
 
 @bind_hass
 def attach(hass: HomeAssistantType, obj: Any) -> None:
@@ -205,6 +242,8 @@ class RenderInfo:
         self.entities = set()
         self.rate_limit = None
         self.has_time = False
+        # The states to track were found by analyzing the template
+        self.analyzed = False
 
     def __repr__(self) -> str:
         """Representation of RenderInfo."""
@@ -235,6 +274,22 @@ class RenderInfo:
         self._freeze_sets()
         self.all_states = False
 
+    def _apply_dependencies(self, dependencies: TemplateDependencies) -> None:
+        """Track the states the template was found to depend on.
+
+        Replaces tracking all states, and tracking all states after an error,
+        when the template uses known entities and domains only.
+        """
+        if dependencies.all_states:
+            return
+        self.entities.update(dependencies.entities)
+        self.domains.update(dependencies.domains)
+        if self.all_states_lifecycle:
+            self.domains_lifecycle.update(dependencies.domains)
+        self.all_states = False
+        self.all_states_lifecycle = False
+        self.analyzed = True
+
     def _freeze_sets(self) -> None:
         self.entities = frozenset(self.entities)
         self.domains = frozenset(self.domains)
@@ -243,13 +298,15 @@ class RenderInfo:
     def _freeze(self) -> None:
         self._freeze_sets()
 
+        unknown_exception = self.exception and not self.analyzed
+
         if self.rate_limit is None:
-            if self.all_states or self.exception:
+            if self.all_states or unknown_exception:
                 self.rate_limit = ALL_STATES_RATE_LIMIT
             elif self.domains or self.domains_lifecycle:
                 self.rate_limit = DOMAIN_STATES_RATE_LIMIT
 
-        if self.exception:
+        if unknown_exception:
             return
 
         if not self.all_states_lifecycle:
@@ -269,6 +326,214 @@ class RenderInfo:
             self.filter = _false
 
 
+class _RenderMemo:
+    """The last render of a template and the states it used."""
+
+    __slots__ = ("variables", "last_updated", "render_info")
+
+    def __init__(
+        self,
+        hass: HomeAssistantType,
+        variables: TemplateVarsType,
+        render_info: RenderInfo,
+    ) -> None:
+        """Initialize the memo."""
+        self.variables = dict(variables or {})
+        self.last_updated = {
+            entity_id: _state_last_updated(hass, entity_id)
+            for entity_id in render_info.entities
+        }
+        self.render_info = _copy_render_info(render_info)
+
+    def matches(self, hass: HomeAssistantType, variables: TemplateVarsType) -> bool:
+        """Return if rendering with the variables would give the same result."""
+        if (variables or {}) != self.variables:
+            return False
+        for entity_id, last_updated in self.last_updated.items():
+            if _state_last_updated(hass, entity_id) != last_updated:
+                return False
+        return True
+
+
+def _copy_render_info(render_info: RenderInfo) -> RenderInfo:
+    """Return a copy of a render info, the caller may change a list or dict result."""
+    render_info = copy.copy(render_info)
+    # pylint: disable=protected-access
+    render_info._result = copy.deepcopy(render_info._result)
+    return render_info
+
+
+def _state_last_updated(hass: HomeAssistantType, entity_id: str) -> Optional[datetime]:
+    """Return when the state of an entity was last updated."""
+    state = hass.states.get(entity_id)
+    return None if state is None else state.last_updated
+
+
+class RenderMemoStats:
+    """Hits and misses of the memoized template renders."""
+
+    def __init__(self) -> None:
+        """Initialize the stats."""
+        self.hits = 0
+        self.misses = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the stats and the hit rate."""
+        renders = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / renders if renders else 0.0,
+        }
+
+
+@callback
+def _async_get_render_memo_stats(hass: HomeAssistantType) -> RenderMemoStats:
+    """Return the stats of the memoized template renders of Home Assistant."""
+    stats: Optional[RenderMemoStats] = hass.data.get(_RENDER_MEMO_STATS)
+    if stats is None:
+        stats = hass.data[_RENDER_MEMO_STATS] = RenderMemoStats()
+    return stats
+
+
+@callback
+@bind_hass
+def async_render_memo_stats(hass: HomeAssistantType) -> Dict[str, Any]:
+    """Return the stats of the memoized template renders."""
+    return _async_get_render_memo_stats(hass).as_dict()
+
+
+@callback
+@bind_hass
+def async_slow_templates(hass: HomeAssistantType) -> Dict[str, float]:
+    """Return the templates that held up the event loop and their longest render.
+
+    The render times are in seconds.
+    """
+    return dict(hass.data.get(_SLOW_TEMPLATES, {}))
+
+
+class _StatesSnapshot:
+    """Read only copy of the states a template renders with in a worker.
+
+    Copies the states the last render used, or all states when the last
+    render is unknown or used all states.
+    """
+
+    __slots__ = ("_states", "_entities", "_domains")
+
+    def __init__(
+        self, hass: HomeAssistantType, render_info: Optional[RenderInfo] = None
+    ) -> None:
+        """Copy the states."""
+        self._entities: Optional[FrozenSet[str]] = None
+        self._domains: Optional[FrozenSet[str]] = None
+
+        if (
+            render_info is None
+            or render_info.all_states
+            or render_info.all_states_lifecycle
+            or (render_info.exception and not render_info.analyzed)
+        ):
+            states = hass.states.async_all()
+        else:
+            self._entities = frozenset(render_info.entities)
+            self._domains = frozenset(
+                render_info.domains | render_info.domains_lifecycle
+            )
+            states = hass.states.async_all(self._domains) if self._domains else []
+            for entity_id in self._entities:
+                state = hass.states.get(entity_id)
+                if state is not None:
+                    states.append(state)
+
+        self._states: Dict[str, State] = {state.entity_id: state for state in states}
+
+    def covers(self, render_info: RenderInfo) -> bool:
+        """Return if a render only used states in the snapshot."""
+        if self._entities is None or self._domains is None:
+            return True
+        if render_info.all_states or render_info.all_states_lifecycle:
+            return False
+        if not self._domains.issuperset(render_info.domains):
+            return False
+        if not self._domains.issuperset(render_info.domains_lifecycle):
+            return False
+        return all(
+            entity_id in self._entities
+            or split_entity_id(entity_id)[0] in self._domains
+            for entity_id in render_info.entities
+        )
+
+    def get(self, entity_id: str) -> Optional[State]:
+        """Retrieve state of entity_id or None if not found."""
+        return self._states.get(entity_id.lower())
+
+    def async_all(
+        self, domain_filter: Optional[Union[str, Iterable]] = None
+    ) -> List[State]:
+        """Create a list of all states matching the filter."""
+        if domain_filter is None:
+            return list(self._states.values())
+
+        if isinstance(domain_filter, str):
+            domain_filter = (domain_filter.lower(),)
+
+        return [
+            state for state in self._states.values() if state.domain in domain_filter
+        ]
+
+    def async_entity_ids_count(
+        self, domain_filter: Optional[Union[str, Iterable]] = None
+    ) -> int:
+        """Count the entity ids matching the filter."""
+        if domain_filter is None:
+            return len(self._states)
+
+        return len(self.async_all(domain_filter))
+
+
+class _SnapshotHass:
+    """The parts of Home Assistant a template uses, with a snapshot of the states.
+
+    The renders in the executor share one instance and its template
+    environment. Each worker thread renders with the snapshot it set and
+    collects its render info in its own data.
+    """
+
+    def __init__(self, hass: HomeAssistantType) -> None:
+        """Initialize the snapshot Home Assistant."""
+        self.config = hass.config
+        self._env = TemplateEnvironment(self)
+        self._local = threading.local()
+
+    @property
+    def data(self) -> Dict[str, Any]:
+        """Return the data of the current thread."""
+        data: Optional[Dict[str, Any]] = getattr(self._local, "data", None)
+        if data is None:
+            data = self._local.data = {_ENVIRONMENT: self._env}
+        return data
+
+    @property
+    def states(self) -> _StatesSnapshot:
+        """Return the snapshot of the states of the current thread."""
+        return self._local.states
+
+    def set_states(self, states: Optional[_StatesSnapshot]) -> None:
+        """Set the snapshot of the states of the current thread."""
+        self._local.states = states
+
+
+@callback
+def _async_get_snapshot_hass(hass: HomeAssistantType) -> _SnapshotHass:
+    """Return the snapshot Home Assistant the renders in the executor use."""
+    snapshot_hass: Optional[_SnapshotHass] = hass.data.get(_SNAPSHOT_HASS)
+    if snapshot_hass is None:
+        snapshot_hass = hass.data[_SNAPSHOT_HASS] = _SnapshotHass(hass)
+    return snapshot_hass
+
+
 class Template:
     """Class to hold a template and manage caching and rendering."""
 
@@ -279,6 +544,11 @@ class Template:
         "is_static",
         "_compiled_code",
         "_compiled",
+        "_dependencies",
+        "_volatile",
+        "_render_memo",
+        "render_budget",
+        "render_cost",
     )
 
     def __init__(self, template, hass=None):
@@ -289,6 +559,14 @@ class Template:
         self.template: str = template.strip()
         self._compiled_code = None
         self._compiled = None
+        self._dependencies = _SENTINEL
+        self._volatile: Optional[bool] = None
+        self._render_memo: Optional[_RenderMemo] = None
+        # Seconds a render may take on the event loop before it is aborted,
+        # checked whenever the template reads a state
+        self.render_budget: Optional[float] = None
+        # Seconds the last render took
+        self.render_cost = 0.0
         self.hass = hass
         self.is_static = not is_template_string(template)
 
@@ -349,10 +627,20 @@ class Template:
         if variables is not None:
             kwargs.update(variables)
 
+        token = None
+        start = monotonic()
+        if self.render_budget is not None:
+            token = _RENDER_DEADLINE.set(
+                (start + self.render_budget, self.render_budget)
+            )
         try:
             render_result = compiled.render(kwargs)
         except Exception as err:  # pylint: disable=broad-except
             raise TemplateError(err) from err
+        finally:
+            if token is not None:
+                _RENDER_DEADLINE.reset(token)
+            self._async_record_cost(monotonic() - start)
 
         render_result = render_result.strip()
 
@@ -361,6 +649,29 @@ class Template:
 
         return self._parse_result(render_result)
 
+    @property
+    def is_expensive(self) -> bool:
+        """Return if the last render of the template held up the event loop."""
+        return self.render_cost >= SLOW_RENDER_THRESHOLD
+
+    @callback
+    def _async_record_cost(self, cost: float) -> None:
+        """Record the time a render took and report slow templates."""
+        self.render_cost = cost
+        if cost < SLOW_RENDER_THRESHOLD or isinstance(self.hass, _SnapshotHass):
+            # Renders in a worker don't hold up the event loop
+            return
+
+        slow_templates = self.hass.data.setdefault(_SLOW_TEMPLATES, {})
+        if self.template not in slow_templates:
+            _LOGGER.warning(
+                "Template took %.3f seconds to render, which holds up the event loop. "
+                "Consider rewriting it to use fewer states: %s",
+                cost,
+                self.template,
+            )
+        slow_templates[self.template] = max(cost, slow_templates.get(self.template, 0))
+
     def _parse_result(self, render_result: str) -> Any:  # pylint: disable=no-self-use
         """Parse the result."""
         try:
@@ -446,7 +757,11 @@ class Template:
     def async_render_to_info(
         self, variables: TemplateVarsType = None, **kwargs: Any
     ) -> RenderInfo:
-        """Render the template and collect an entity filter."""
+        """Render the template and collect an entity filter.
+
+        The result is memoized while the states the template used and the
+        variables don't change.
+        """
         assert self.hass and _RENDER_INFO not in self.hass.data
 
         render_info = RenderInfo(self)
@@ -457,6 +772,20 @@ class Template:
             render_info._freeze_static()
             return render_info
 
+        # The copies rendered in the executor are never memoized
+        memo_stats = (
+            None
+            if isinstance(self.hass, _SnapshotHass)
+            else _async_get_render_memo_stats(self.hass)
+        )
+        memo = self._render_memo
+        if memo is not None and not kwargs and memo.matches(self.hass, variables):
+            if memo_stats is not None:
+                memo_stats.hits += 1
+            return _copy_render_info(memo.render_info)
+        if memo_stats is not None:
+            memo_stats.misses += 1
+
         self.hass.data[_RENDER_INFO] = render_info
         try:
             render_info._result = self.async_render(variables, **kwargs)
@@ -465,9 +794,110 @@ class Template:
         finally:
             del self.hass.data[_RENDER_INFO]
 
+        if (
+            render_info.all_states
+            or render_info.all_states_lifecycle
+            or render_info.exception
+        ):
+            dependencies = self._async_dependencies()
+            if dependencies is not None and not any(
+                name in ANALYZED_NAMES for name in (*(variables or ()), *kwargs)
+            ):
+                render_info._apply_dependencies(dependencies)
+
         render_info._freeze()
+
+        if self._can_memoize(render_info, kwargs):
+            self._render_memo = _RenderMemo(self.hass, variables, render_info)
+        else:
+            self._render_memo = None
+
         return render_info
 
+    async def async_render_to_info_in_worker(
+        self,
+        variables: TemplateVarsType = None,
+        last_render_info: Optional[RenderInfo] = None,
+    ) -> RenderInfo:
+        """Render the template in the executor and collect an entity filter.
+
+        The worker renders with a snapshot of the states used by the last
+        render, and again with all states when the template used other states.
+        The render budget does not apply to the worker.
+
+        This method must be run in the event loop.
+        """
+        assert self.hass
+
+        if self.is_static:
+            return self.async_render_to_info(variables)
+
+        try:
+            self.ensure_valid()
+        except TemplateError:
+            return self.async_render_to_info(variables)
+
+        snapshot_hass = _async_get_snapshot_hass(self.hass)
+        snapshot = _StatesSnapshot(self.hass, last_render_info)
+        render_info, cost = await self.hass.async_add_executor_job(
+            self._render_to_info_with_snapshot, variables, snapshot_hass, snapshot
+        )
+        if not snapshot.covers(render_info):
+            render_info, cost = await self.hass.async_add_executor_job(
+                self._render_to_info_with_snapshot,
+                variables,
+                snapshot_hass,
+                _StatesSnapshot(self.hass),
+            )
+        self.render_cost = cost
+        return render_info
+
+    def _render_to_info_with_snapshot(
+        self,
+        variables: TemplateVarsType,
+        snapshot_hass: _SnapshotHass,
+        snapshot: _StatesSnapshot,
+    ) -> Tuple[RenderInfo, float]:
+        """Render a copy of the template bound to a snapshot of the states.
+
+        Returns the render info and the seconds the render took.
+        """
+        template = Template(self.template, snapshot_hass)
+        template._compiled_code = self._compiled_code
+        template._dependencies = self._dependencies
+        template._volatile = self._volatile
+
+        snapshot_hass.set_states(snapshot)
+        try:
+            render_info = template.async_render_to_info(variables)
+        finally:
+            snapshot_hass.set_states(None)
+        render_info.template = self
+        return render_info, template.render_cost
+
+    def _can_memoize(self, render_info: RenderInfo, kwargs: Dict[str, Any]) -> bool:
+        """Return if a render only depends on the states of its entities."""
+        if (
+            kwargs
+            or render_info.exception
+            or render_info.has_time
+            or render_info.all_states
+            or render_info.all_states_lifecycle
+            or render_info.domains
+            or render_info.domains_lifecycle
+        ):
+            return False
+        if self._volatile is None:
+            self._volatile = uses_volatile_values(self.template)
+        return not self._volatile
+
+    @callback
+    def _async_dependencies(self) -> Optional[TemplateDependencies]:
+        """Return the states the template depends on, None if unknown."""
+        if self._dependencies is _SENTINEL:
+            self._dependencies = analyze_template(self.template)
+        return self._dependencies
+
     def render_with_possible_json_value(self, value, error_value=_SENTINEL):
         """Render template with value exposed.
 
@@ -756,15 +1186,29 @@ def _collect_state(hass: HomeAssistantType, entity_id: str) -> None:
         entity_collect.entities.add(entity_id)
 
 
+def _check_render_budget() -> None:
+    """Abort the render in progress when it ran out of its budget."""
+    deadline = _RENDER_DEADLINE.get()
+    if deadline is not None and monotonic() > deadline[0]:
+        raise TimeoutError(
+            f"Template exceeded its render budget of {deadline[1]} seconds"
+        )
+
+
 def _state_generator(hass: HomeAssistantType, domain: Optional[str]) -> Generator:
-    """State generator for a domain or all states."""
+    """State generator for a domain or all states.
+
+    Aborts the render when it runs out of its budget.
+    """
     for state in sorted(hass.states.async_all(domain), key=attrgetter("entity_id")):
+        _check_render_budget()
         yield TemplateState(hass, state, collect=False)
 
 
 def _get_state_if_valid(
     hass: HomeAssistantType, entity_id: str
 ) -> Optional[TemplateState]:
+    _check_render_budget()
     state = hass.states.get(entity_id)
     if state is None and not valid_entity_id(entity_id):
         raise TemplateError(f"Invalid entity ID '{entity_id}'")  # type: ignore
@@ -772,6 +1216,7 @@ def _get_state_if_valid(
 
 
 def _get_state(hass: HomeAssistantType, entity_id: str) -> Optional[TemplateState]:
+    _check_render_budget()
     return _get_template_state_from_state(hass, entity_id, hass.states.get(entity_id))
 
 
@@ -1289,6 +1734,65 @@ def urlencode(value):
     return urllib_urlencode(value).encode("utf-8")
 
 
+class CompiledTemplateCache:
+    """Bounded LRU of the code of compiled templates.
+
+    The cache is shared by the template environments of the process, so a
+    template source repeated across integrations or reloaded is compiled once.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        """Initialize the cache."""
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._code: "OrderedDict[Hashable, Any]" = OrderedDict()
+        # Templates may be validated from the executor
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any:
+        """Return the code cached for a key or None."""
+        with self._lock:
+            code = self._code.get(key)
+            if code is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._code.move_to_end(key)
+            return code
+
+    def set(self, key: Hashable, code: Any) -> None:
+        """Cache the code of a key."""
+        with self._lock:
+            self._code[key] = code
+            self._code.move_to_end(key)
+            if len(self._code) > self.maxsize:
+                self._code.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove the cached code and reset the stats."""
+        with self._lock:
+            self._code.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Return the hits, misses and size of the cache."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._code),
+            "maxsize": self.maxsize,
+        }
+
+
+_COMPILED_TEMPLATE_CACHE = CompiledTemplateCache(COMPILED_TEMPLATE_CACHE_SIZE)
+
+
+def compiled_template_cache_stats() -> Dict[str, int]:
+    """Return the stats of the compiled template cache of the process."""
+    return _COMPILED_TEMPLATE_CACHE.stats()
+
+
 class TemplateEnvironment(ImmutableSandboxedEnvironment):
     """The Home Assistant template environment."""
 
@@ -1406,7 +1910,14 @@ class TemplateEnvironment(ImmutableSandboxedEnvironment):
         cached = self.template_cache.get(source)
 
         if cached is None:
-            cached = self.template_cache[source] = super().compile(source)
+            # Filters and tests are checked when compiling, they differ with
+            # and without hass
+            key = (self.hass is None, source)
+            cached = _COMPILED_TEMPLATE_CACHE.get(key)
+            if cached is None:
+                cached = super().compile(source)
+                _COMPILED_TEMPLATE_CACHE.set(key, cached)
+            self.template_cache[source] = cached
 
         return cached
 
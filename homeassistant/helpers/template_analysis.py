@@ -0,0 +1,247 @@
+"""Find the states a template depends on without rendering it."""
+from dataclasses import dataclass
+from typing import Any, FrozenSet, Optional, Set, Tuple, Type, cast
+
+import jinja2
+from jinja2 import nodes
+
+# Functions taking an entity id as first argument
+_ENTITY_FUNCTIONS = {"states", "is_state", "state_attr", "is_state_attr"}
+# Functions and filters looking up states the template can't tell
+_DYNAMIC_FUNCTIONS = {"expand", "closest", "distance"}
+_DYNAMIC_FILTERS = {"expand", "closest"}
+
+ANALYZED_NAMES = frozenset(_ENTITY_FUNCTIONS | _DYNAMIC_FUNCTIONS)
+
+# Functions and filters that may return something else each time
+_VOLATILE_FUNCTIONS = {"now", "utcnow", "relative_time"}
+_VOLATILE_FILTERS = {"random"}
+
+_EQUAL_TESTS = {"eq", "==", "equalto"}
+
+_ENV = jinja2.Environment()
+
+
+@dataclass(frozen=True)
+class TemplateDependencies:
+    """States a template may depend on.
+
+    all_states: The template may use any state
+    entities: Entity ids of the states used by the template
+    domains: Domains of which any state may be used by the template
+    """
+
+    all_states: bool
+    entities: FrozenSet[str]
+    domains: FrozenSet[str]
+
+
+class _DynamicReference(Exception):
+    """The template looks up states that can't be known without rendering."""
+
+
+# The fields of jinja2 nodes are only declared at runtime, nodes are typed Any
+# and checked with _is_node which, unlike isinstance, doesn't narrow them
+def _is_node(node: Any, node_types: Tuple[Type[nodes.Node], ...]) -> bool:
+    """Return if a node is of one of the node types."""
+    return isinstance(node, node_types)
+
+
+def _const_str(node: Any) -> Optional[str]:
+    """Return the value of a constant string node."""
+    if _is_node(node, (nodes.Const,)) and isinstance(node.value, str):
+        return node.value
+    return None
+
+
+def _is_states(node: Any) -> bool:
+    """Return if a node is the states global."""
+    return _is_node(node, (nodes.Name,)) and node.name == "states"
+
+
+def _tested_domains(test: Optional[str], value: Any) -> Set[str]:
+    """Return the domains matched by a test of the domain of states."""
+    if test in _EQUAL_TESTS:
+        domain = _const_str(value)
+        return set() if domain is None else {domain}
+    if test == "in" and _is_node(value, (nodes.List, nodes.Tuple)):
+        domains = {_const_str(item) for item in value.items}
+        return set() if None in domains else cast(Set[str], domains)
+    return set()
+
+
+class _DependencyFinder:
+    """Walk the syntax tree of a template and collect the states it uses."""
+
+    def __init__(self) -> None:
+        """Initialize the finder."""
+        self.all_states = False
+        self.entities: Set[str] = set()
+        self.domains: Set[str] = set()
+
+    def visit(self, node: Any) -> None:
+        """Visit a node, the handler of the node type tells if it visited its children."""
+        handler = getattr(self, f"_visit_{type(node).__name__}", None)
+        if handler is not None and handler(node):
+            return
+        for child in node.iter_child_nodes():
+            self.visit(child)
+
+    def _visit_Name(self, node: Any) -> bool:  # pylint: disable=invalid-name
+        """Collect the uses of the states global other than lookups."""
+        if node.name not in ANALYZED_NAMES:
+            return True
+        if node.ctx != "load" or node.name != "states":
+            # Shadowed by a variable, or a function called through another name
+            raise _DynamicReference
+        self.all_states = True
+        return True
+
+    def _visit_Call(self, node: Any) -> bool:  # pylint: disable=invalid-name
+        """Collect the entity ids passed to the state functions."""
+        if (
+            not _is_node(node.node, (nodes.Name,))
+            or node.node.name not in ANALYZED_NAMES
+        ):
+            return False
+        if node.node.name in _DYNAMIC_FUNCTIONS:
+            raise _DynamicReference
+        entity_id = _const_str(node.args[0]) if node.args else None
+        if entity_id is None:
+            raise _DynamicReference
+        self.entities.add(entity_id.lower())
+        for child in (*node.args[1:], *node.kwargs, node.dyn_args, node.dyn_kwargs):
+            if child is not None:
+                self.visit(child)
+        return True
+
+    def _lookup_key(self, node: Any) -> Optional[str]:
+        """Return the key of an attribute or item lookup, None if not constant."""
+        if _is_node(node, (nodes.Getattr,)):
+            return str(node.attr)
+        return _const_str(node.arg)
+
+    def _visit_Getattr(self, node: Any) -> bool:  # pylint: disable=invalid-name
+        """Collect the domains and entities looked up on states."""
+        parent = node.node
+        if _is_node(parent, (nodes.Getattr, nodes.Getitem)) and _is_states(
+            parent.node
+        ):
+            # states.domain.object_id
+            domain = self._lookup_key(parent)
+            if domain is None:
+                raise _DynamicReference
+            if "." in domain:
+                # states['domain.object_id'].state
+                self.entities.add(domain.lower())
+                return True
+            object_id = self._lookup_key(node)
+            if object_id is None:
+                self.domains.add(domain.lower())
+                self.visit(node.arg)
+            else:
+                self.entities.add(f"{domain}.{object_id}".lower())
+            return True
+
+        if not _is_states(parent):
+            return False
+
+        key = self._lookup_key(node)
+        if key is None:
+            raise _DynamicReference
+        if "." in key:
+            self.entities.add(key.lower())
+        else:
+            self.domains.add(key.lower())
+        return True
+
+    _visit_Getitem = _visit_Getattr
+
+    def _visit_Filter(self, node: Any) -> bool:  # pylint: disable=invalid-name
+        """Collect the domains selected from states."""
+        if node.name in _DYNAMIC_FILTERS:
+            raise _DynamicReference
+        if (
+            node.name != "selectattr"
+            or node.node is None
+            or not _is_states(node.node)
+            or len(node.args) != 3
+            or node.kwargs
+            or node.dyn_args
+            or node.dyn_kwargs
+        ):
+            return False
+        attribute, test, value = node.args
+        if _const_str(attribute) != "domain":
+            return False
+        domains = _tested_domains(_const_str(test), value)
+        if not domains:
+            return False
+        # states | selectattr('domain', 'eq', 'light')
+        self.domains.update(domain.lower() for domain in domains)
+        return True
+
+    def _visit_For(self, node: Any) -> bool:  # pylint: disable=invalid-name
+        """Collect the domains of loops over states filtered by domain."""
+        if (
+            not _is_states(node.iter)
+            or not _is_node(node.target, (nodes.Name,))
+            or not _is_node(node.test, (nodes.Compare,))
+            or len(node.test.ops) != 1
+        ):
+            return False
+        expr = node.test.expr
+        operand = node.test.ops[0]
+        if (
+            not _is_node(expr, (nodes.Getattr,))
+            or not _is_node(expr.node, (nodes.Name,))
+            or expr.node.name != node.target.name
+            or expr.attr != "domain"
+        ):
+            return False
+        domains = _tested_domains(operand.op, operand.expr)
+        if not domains:
+            return False
+        # {% for state in states if state.domain == 'light' %}
+        self.domains.update(domain.lower() for domain in domains)
+        for child in (node.target, *node.body, *node.else_):
+            self.visit(child)
+        return True
+
+
+def analyze_template(source: str) -> Optional[TemplateDependencies]:
+    """Return the states a template may depend on.
+
+    The result covers every state the template can use, the rendering may use
+    fewer. Returns None when the template looks up states it only knows while
+    rendering, like entity ids from variables or the members of groups.
+    """
+    try:
+        tree = _ENV.parse(source)
+    except jinja2.TemplateSyntaxError:
+        return None
+
+    finder = _DependencyFinder()
+    try:
+        finder.visit(tree)
+    except _DynamicReference:
+        return None
+
+    return TemplateDependencies(
+        finder.all_states, frozenset(finder.entities), frozenset(finder.domains)
+    )
+
+
+def uses_volatile_values(source: str) -> bool:
+    """Return if rendering a template twice with the same states may differ.
+
+    This is the case when it uses the time or random values.
+    """
+    try:
+        tree = _ENV.parse(source)
+    except jinja2.TemplateSyntaxError:
+        return True
+
+    return any(
+        node.name in _VOLATILE_FUNCTIONS for node in tree.find_all(nodes.Name)
+    ) or any(node.name in _VOLATILE_FILTERS for node in tree.find_all(nodes.Filter))
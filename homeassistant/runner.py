@@ -40,6 +40,8 @@ class RuntimeConfig:
     debug: bool = False
     open_ui: bool = False
 
+    json_backend: str = "json"
+
 
 # In Python 3.8+ proactor policy is the default on Windows
 if sys.platform == "win32" and sys.version_info[:2] < (3, 8):
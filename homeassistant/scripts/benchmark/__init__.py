@@ -12,8 +12,15 @@ from typing import Callable, Dict, TypeVar
 from homeassistant import core
 from homeassistant.components.websocket_api.const import JSON_DUMP
 from homeassistant.const import ATTR_NOW, EVENT_STATE_CHANGED, EVENT_TIME_CHANGED
+from homeassistant.helpers.entity import Entity
 from homeassistant.helpers.entityfilter import convert_include_exclude_filter
-from homeassistant.helpers.json import JSONEncoder
+from homeassistant.helpers.json import (
+    JSON_BACKEND_JSON,
+    JSON_BACKENDS,
+    JSONEncoder,
+    json_dumps,
+    set_json_backend,
+)
 from homeassistant.util import dt as dt_util
 
 # mypy: allow-untyped-calls, allow-untyped-defs, no-check-untyped-defs
@@ -301,6 +308,40 @@ async def filtering_entity_id(hass):
     return timer() - start
 
 
+@benchmark
+async def entity_write_state(hass):
+    """Write 100k states of an entity with and without static attribute caching."""
+
+    class PowerSensor(Entity):
+        """Sensor with the attributes of an energy meter."""
+
+        entity_id = "sensor.power"
+        name = "Power"
+        icon = "mdi:flash"
+        unit_of_measurement = "W"
+        device_class = "power"
+        device_state_attributes = {"voltage": 230}
+        state = 0
+
+    class CachedPowerSensor(PowerSensor):
+        """Sensor caching its static attributes."""
+
+        cache_static_attributes = True
+
+    runtime = 0
+    for sensor in (PowerSensor(), CachedPowerSensor()):
+        sensor.hass = hass
+        start = timer()
+        for idx in range(10 ** 5):
+            sensor.state = idx
+            sensor.async_write_ha_state()
+        write_runtime = timer() - start
+        print(f"{type(sensor).__name__} done in {write_runtime}s")
+        runtime += write_runtime
+        await hass.async_block_till_done()
+    return runtime
+
+
 @benchmark
 async def valid_entity_id(hass):
     """Run valid entity ID a million times."""
@@ -323,6 +364,52 @@ async def json_serialize_states(hass):
     return timer() - start
 
 
+@benchmark
+async def json_serialize_state_changes(hass):
+    """Serialize 100k state changed events with each JSON backend."""
+    now = dt_util.utcnow()
+    attributes = {
+        "friendly_name": "Kitchen Lights",
+        "supported_features": 63,
+        "brightness": 180,
+        "color_temp": 370,
+        "hs_color": (27.001, 19.243),
+        "rgb_color": (255, 228, 206),
+        "xy_color": (0.371, 0.349),
+        "effect_list": ["colorloop", "random"],
+        "min_mireds": 153,
+        "max_mireds": 500,
+        "last_seen": now,
+    }
+    events = []
+    for idx in range(10 ** 5):
+        old_state = core.State(f"light.kitchen_{idx}", "off", attributes)
+        new_state = core.State(f"light.kitchen_{idx}", "on", attributes)
+        events.append(
+            core.Event(
+                EVENT_STATE_CHANGED,
+                {
+                    "entity_id": new_state.entity_id,
+                    "old_state": old_state,
+                    "new_state": new_state,
+                },
+            )
+        )
+
+    runtime = 0
+    for name in JSON_BACKENDS:
+        set_json_backend(name)
+        start = timer()
+        for event in events:
+            json_dumps(event)
+        backend_runtime = timer() - start
+        print(f"Backend {name} done in {backend_runtime}s")
+        runtime += backend_runtime
+
+    set_json_backend(JSON_BACKEND_JSON)
+    return runtime
+
+
 def _create_state_changed_event_from_old_new(
     entity_id, event_time_fired, old_state, new_state
 ):
@@ -13,6 +13,7 @@ from typing import (
     Any,
     Callable,
     Coroutine,
+    Dict,
     Iterable,
     KeysView,
     Optional,
@@ -117,6 +118,29 @@ def get_random_string(length: int = 10) -> str:
     return "".join(generator.choice(source_chars) for _ in range(length))
 
 
+def add_to_secondary_index(
+    index: Dict[str, Dict[str, None]], key: Optional[str], item: str
+) -> None:
+    """Add an item to the bucket of a key of a secondary index.
+
+    The buckets are dicts to keep the items in the order they were added.
+    """
+    if key is not None:
+        index.setdefault(key, {})[item] = None
+
+
+def remove_from_secondary_index(
+    index: Dict[str, Dict[str, None]], key: Optional[str], item: str
+) -> None:
+    """Remove an item from the bucket of a key of a secondary index."""
+    bucket = index.get(key) if key is not None else None
+    if bucket is None:
+        return
+    bucket.pop(item, None)
+    if not bucket:
+        del index[key]  # type: ignore
+
+
 class OrderedEnum(enum.Enum):
     """Taken from Python 3.4.0 docs."""
 
@@ -48,13 +48,19 @@ def save_json(
     private: bool = False,
     *,
     encoder: Optional[Type[json.JSONEncoder]] = None,
+    dumps: Optional[Callable[[Any], str]] = None,
 ) -> None:
     """Save JSON data to a file.
 
+    The data is serialized with dumps if given, else with the encoder.
+
     Returns True on success.
     """
     try:
-        json_data = json.dumps(data, indent=4, cls=encoder)
+        if dumps is not None:
+            json_data = dumps(data)
+        else:
+            json_data = json.dumps(data, indent=4, cls=encoder)
     except TypeError as error:
         msg = f"Failed to serialize to JSON: {filename}. Bad data at {format_unserializable_data(find_paths_unserializable_data(data))}"
         _LOGGER.error(msg)
@@ -6,8 +6,11 @@ import json
 import unittest
 
 from homeassistant.components import history, recorder
-from homeassistant.components.recorder.models import process_timestamp
+from homeassistant.components.recorder import statistics
+from homeassistant.components.recorder.const import EXECUTOR_POOL
+from homeassistant.components.recorder.models import Statistics, process_timestamp
 import homeassistant.core as ha
+from homeassistant.helpers.executor import async_executor_stats
 from homeassistant.helpers.json import JSONEncoder
 from homeassistant.setup import async_setup_component, setup_component
 import homeassistant.util.dt as dt_util
@@ -222,6 +225,40 @@ class TestComponentHistory(unittest.TestCase):
         assert copy(hist[entity_id][0]) == hist[entity_id][0]
         assert copy(hist[entity_id][1]) == hist[entity_id][1]
 
+    def test_get_significant_states_max_points(self):
+        """Test numeric states are downsampled to min/max buckets."""
+        self.test_setup()
+        entity_id = "sensor.power"
+        start = dt_util.utcnow() - timedelta(minutes=20)
+        end = start + timedelta(minutes=10)
+        values = ["5", "1", "9", "3", "unavailable", "4", "8", "2", "6", "7"]
+
+        for minute, value in enumerate(values):
+            with patch(
+                "homeassistant.components.recorder.dt_util.utcnow",
+                return_value=start + timedelta(minutes=minute, seconds=1),
+            ):
+                self.hass.states.set(entity_id, value)
+                wait_recording_done(self.hass)
+
+        hist = history.get_significant_states(
+            self.hass,
+            start,
+            end,
+            entity_ids=[entity_id],
+            include_start_time_state=False,
+            max_points=4,
+        )
+        # Buckets of 5 minutes with their lowest and highest state, the
+        # unavailable state ends a bucket
+        assert [state.state for state in hist[entity_id]] == [
+            "1",
+            "9",
+            "unavailable",
+            "8",
+            "2",
+        ]
+
     def test_get_significant_states(self):
         """Test that only significant states are returned.
 
@@ -767,6 +804,7 @@ async def test_fetch_period_api(hass, hass_client):
     client = await hass_client()
     response = await client.get(f"/api/history/period/{dt_util.utcnow().isoformat()}")
     assert response.status == 200
+    assert async_executor_stats(hass)[EXECUTOR_POOL]["jobs"] == 1
 
 
 async def test_fetch_period_api_with_use_include_order(hass, hass_client):
@@ -1008,3 +1046,134 @@ async def test_entity_ids_limit_via_api_with_skip_initial_state(hass, hass_clien
     assert len(response_json) == 2
     assert response_json[0][0]["entity_id"] == "light.kitchen"
     assert response_json[1][0]["entity_id"] == "light.cow"
+
+
+async def test_fetch_period_api_with_statistics(hass, hass_client):
+    """Test the fetch period view returns long-term statistics."""
+    await hass.async_add_executor_job(init_recorder_component, hass)
+    await async_setup_component(hass, "history", {})
+    instance = hass.data[recorder.DATA_INSTANCE]
+    await hass.async_add_executor_job(instance.block_till_done)
+
+    start = statistics.period_start(
+        dt_util.utcnow() - timedelta(hours=2), statistics.PERIOD_HOUR
+    )
+
+    def _add_statistics():
+        with recorder.session_scope(hass=hass) as session:
+            for entity_id, mean in (("sensor.one", 1.5), ("sensor.two", 2.5)):
+                session.add(
+                    Statistics(
+                        entity_id=entity_id,
+                        period=statistics.PERIOD_HOUR,
+                        start=start,
+                        mean=mean,
+                        min=1.0,
+                        max=3.0,
+                    )
+                )
+
+    await hass.async_add_executor_job(_add_statistics)
+
+    client = await hass_client()
+    response = await client.get(
+        f"/api/history/period/{start.isoformat()}",
+        params={"filter_entity_id": "sensor.one", "statistics": "hour"},
+    )
+    assert response.status == 200
+    assert await response.json() == [
+        [
+            {
+                "entity_id": "sensor.one",
+                "start": start.isoformat(),
+                "mean": 1.5,
+                "min": 1.0,
+                "max": 3.0,
+                "sum": None,
+            }
+        ]
+    ]
+
+    response = await client.get(
+        f"/api/history/period/{start.isoformat()}", params={"statistics": "week"}
+    )
+    assert response.status == 400
+
+
+async def test_fetch_period_api_with_statistics_and_exclude(hass, hass_client):
+    """Test the fetch period view applies the filters to long-term statistics."""
+    await hass.async_add_executor_job(init_recorder_component, hass)
+    await async_setup_component(
+        hass, "history", {"history": {"exclude": {"entities": ["sensor.two"]}}}
+    )
+    instance = hass.data[recorder.DATA_INSTANCE]
+    await hass.async_add_executor_job(instance.block_till_done)
+
+    start = statistics.period_start(
+        dt_util.utcnow() - timedelta(hours=2), statistics.PERIOD_HOUR
+    )
+
+    def _add_statistics():
+        with recorder.session_scope(hass=hass) as session:
+            for entity_id in ("sensor.one", "sensor.two"):
+                session.add(
+                    Statistics(
+                        entity_id=entity_id,
+                        period=statistics.PERIOD_HOUR,
+                        start=start,
+                        mean=1.5,
+                        min=1.0,
+                        max=3.0,
+                    )
+                )
+
+    await hass.async_add_executor_job(_add_statistics)
+
+    client = await hass_client()
+    response = await client.get(
+        f"/api/history/period/{start.isoformat()}", params={"statistics": "hour"}
+    )
+    assert response.status == 200
+    response_json = await response.json()
+    assert [rows[0]["entity_id"] for rows in response_json] == ["sensor.one"]
+
+
+async def test_fetch_period_api_with_invalid_max_points(hass, hass_client):
+    """Test the fetch period view rejects an invalid max_points."""
+    await hass.async_add_executor_job(init_recorder_component, hass)
+    await async_setup_component(hass, "history", {})
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+    client = await hass_client()
+    response = await client.get(
+        f"/api/history/period/{dt_util.utcnow().isoformat()}",
+        params={"max_points": "zero"},
+    )
+    assert response.status == 400
+
+
+async def test_fetch_period_api_stream(hass, hass_client):
+    """Test the fetch period view streams the same states."""
+    await hass.async_add_executor_job(init_recorder_component, hass)
+    await async_setup_component(hass, "history", {})
+    instance = hass.data[recorder.DATA_INSTANCE]
+    await hass.async_add_executor_job(instance.block_till_done)
+
+    start = dt_util.utcnow()
+    for entity_id in ("sensor.one", "sensor.two"):
+        for value in ("1", "2", "3"):
+            hass.states.async_set(entity_id, value, {"unit_of_measurement": "W"})
+    await hass.async_block_till_done()
+    await hass.async_add_executor_job(trigger_db_commit, hass)
+    await hass.async_block_till_done()
+    await hass.async_add_executor_job(instance.block_till_done)
+
+    client = await hass_client()
+    url = f"/api/history/period/{start.isoformat()}"
+    response = await client.get(url, params={"minimal_response": ""})
+    assert response.status == 200
+    expected = await response.json()
+    assert len(expected) == 2
+
+    response = await client.get(url, params={"minimal_response": "", "stream": ""})
+    assert response.status == 200
+    assert await response.json() == expected
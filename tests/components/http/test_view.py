@@ -1,4 +1,5 @@
 """Tests for Home Assistant View."""
+from aiohttp import ClientPayloadError, web
 from aiohttp.web_exceptions import (
     HTTPBadRequest,
     HTTPInternalServerError,
@@ -7,13 +8,14 @@ from aiohttp.web_exceptions import (
 import pytest
 import voluptuous as vol
 
+from homeassistant.components.http import view as http_view
 from homeassistant.components.http.view import (
     HomeAssistantView,
     request_handler_factory,
 )
 from homeassistant.exceptions import ServiceNotFound, Unauthorized
 
-from tests.async_mock import AsyncMock, Mock
+from tests.async_mock import AsyncMock, Mock, patch
 
 
 @pytest.fixture
@@ -69,3 +71,87 @@ async def test_not_running(mock_request_with_stopping):
         Mock(requires_auth=False), AsyncMock(side_effect=Unauthorized)
     )(mock_request_with_stopping)
     assert response.status == 503
+
+
+async def test_json_stream(hass, aiohttp_client):
+    """Test streaming a JSON array produced in the executor."""
+
+    class StreamView(HomeAssistantView):
+        """Stream the items of the count query parameter."""
+
+        url = "/stream"
+        requires_auth = False
+
+        async def get(self, request):
+            """Stream a JSON array."""
+            count = int(request.query["count"])
+            return await self.json_stream(
+                request, lambda: ({"item": idx} for idx in range(count))
+            )
+
+    app = web.Application()
+    app["hass"] = hass
+    StreamView().register(app, app.router)
+    client = await aiohttp_client(app)
+
+    with patch.object(http_view, "JSON_STREAM_CHUNK_ITEMS", 2):
+        for count in (0, 1, 5):
+            response = await client.get("/stream", params={"count": count})
+            assert response.status == 200
+            assert response.content_type == "application/json"
+            assert await response.json() == [{"item": idx} for idx in range(count)]
+
+
+async def test_json_stream_error_while_streaming(hass, aiohttp_client, caplog):
+    """Test the connection is aborted when producing items fails mid-stream."""
+
+    def items():
+        """Fail after the first chunk."""
+        yield from ({"item": idx} for idx in range(3))
+        raise OSError("Fake database error")
+
+    class StreamView(HomeAssistantView):
+        """Stream items until failing."""
+
+        url = "/stream"
+        requires_auth = False
+
+        async def get(self, request):
+            """Stream a JSON array."""
+            return await self.json_stream(request, items)
+
+    app = web.Application()
+    app["hass"] = hass
+    StreamView().register(app, app.router)
+    client = await aiohttp_client(app)
+
+    with patch.object(http_view, "JSON_STREAM_CHUNK_ITEMS", 2):
+        response = await client.get("/stream")
+        assert response.status == 200
+        with pytest.raises(ClientPayloadError):
+            await response.read()
+    assert "Error streaming JSON to /stream" in caplog.text
+    assert "Fake database error" in caplog.text
+
+
+async def test_json_stream_invalid_json(hass, aiohttp_client, caplog):
+    """Test streaming items that can not be serialized."""
+
+    class StreamView(HomeAssistantView):
+        """Stream an invalid item."""
+
+        url = "/stream"
+        requires_auth = False
+
+        async def get(self, request):
+            """Stream a JSON array."""
+            return await self.json_stream(request, lambda: [float("NaN")])
+
+    app = web.Application()
+    app["hass"] = hass
+    StreamView().register(app, app.router)
+    client = await aiohttp_client(app)
+
+    response = await client.get("/stream")
+    assert response.status == 500
+    assert "Unable to serialize to JSON" in caplog.text
@@ -315,6 +315,76 @@ async def test_logbook_view(hass, hass_client):
     assert response.status == 200
 
 
+async def test_logbook_view_stream(hass, hass_client):
+    """Test the logbook view streams the same entries."""
+    await hass.async_add_executor_job(init_recorder_component, hass)
+    await async_setup_component(hass, "logbook", {})
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+
+    hass.states.async_set("switch.test", STATE_OFF)
+    hass.states.async_set("switch.test", STATE_ON)
+    await hass.async_add_executor_job(trigger_db_commit, hass)
+    await hass.async_block_till_done()
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+
+    client = await hass_client()
+    start = dt_util.utcnow().date()
+    start_date = datetime(start.year, start.month, start.day)
+
+    response = await client.get(f"/api/logbook/{start_date.isoformat()}")
+    assert response.status == 200
+    expected = await response.json()
+
+    response = await client.get(f"/api/logbook/{start_date.isoformat()}?stream")
+    assert response.status == 200
+    assert await response.json() == expected
+
+
+async def test_logbook_view_stream_more_contexts_than_kept(hass, hass_client):
+    """Test contexts no longer kept while streaming are looked up again."""
+    await hass.async_add_executor_job(init_recorder_component, hass)
+    await async_setup_component(hass, "logbook", {})
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+
+    for entity_id in ("switch.parent", "switch.child", "switch.other"):
+        hass.states.async_set(entity_id, STATE_ON)
+    for idx in range(5):
+        hass.states.async_set(f"switch.noise_{idx}", STATE_ON)
+    await hass.async_block_till_done()
+
+    context = ha.Context(id="ac5bd62de45711eaaeb351041eec8dd9")
+    hass.states.async_set("switch.parent", STATE_OFF, context=context)
+    await hass.async_block_till_done()
+    for idx in range(5):
+        hass.states.async_set(f"switch.noise_{idx}", STATE_OFF)
+        await hass.async_block_till_done()
+    hass.states.async_set("switch.child", STATE_OFF, context=context)
+    await hass.async_block_till_done()
+    hass.states.async_set("switch.other", STATE_OFF)
+    await hass.async_block_till_done()
+
+    await hass.async_add_executor_job(trigger_db_commit, hass)
+    await hass.async_block_till_done()
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+
+    client = await hass_client()
+    start = dt_util.utcnow().date()
+    start_date = datetime(start.year, start.month, start.day)
+
+    response = await client.get(f"/api/logbook/{start_date.isoformat()}")
+    assert response.status == 200
+    expected = await response.json()
+
+    entries = {entry["entity_id"]: entry for entry in expected}
+    assert entries["switch.child"]["context_entity_id"] == "switch.parent"
+    assert "context_entity_id" not in entries["switch.other"]
+
+    with patch("homeassistant.components.logbook.CONTEXT_LOOKUP_SIZE", 2):
+        response = await client.get(f"/api/logbook/{start_date.isoformat()}?stream")
+        assert response.status == 200
+        assert await response.json() == expected
+
+
 async def test_logbook_view_period_entity(hass, hass_client):
     """Test the logbook view with period and entity."""
     await hass.async_add_executor_job(init_recorder_component, hass)
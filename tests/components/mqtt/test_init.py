@@ -331,6 +331,70 @@ async def test_subscribe_topic(hass, mqtt_mock, calls, record_calls):
     assert len(calls) == 1
 
 
+async def test_messages_are_handled_in_batches(
+    hass, hass_ws_client, mqtt_mock, calls, record_calls
+):
+    """Test messages from the paho thread are handled in batches."""
+    await mqtt.async_subscribe(hass, "test-topic/#", record_calls)
+    mqtt_mock.return_value._batch_size = 2
+
+    def receive_messages():
+        for index in range(5):
+            mqtt_mock._mqtt_on_message(
+                None, None, mqtt.Message(f"test-topic/{index}", b"payload", 0, False)
+            )
+
+    await hass.async_add_executor_job(receive_messages)
+    await hass.async_block_till_done()
+
+    assert [call[0].topic for call in calls] == [
+        f"test-topic/{index}" for index in range(5)
+    ]
+
+    client = await hass_ws_client(hass)
+    await client.send_json({"id": 5, "type": "mqtt/message_stats"})
+    response = await client.receive_json()
+    assert response["success"]
+    stats = response["result"]
+    assert stats["queue_depth"] == 0
+    assert stats["peak_queue_depth"] == 5
+    assert stats["messages_received"] == 5
+    assert stats["message_batches"] == 3
+    assert stats["max_drain_latency"] >= stats["last_drain_latency"] >= 0
+
+
+async def test_messages_are_handled_after_batch_latency(
+    hass, mqtt_mock, calls, record_calls
+):
+    """Test messages are coalesced for the batch latency."""
+    await mqtt.async_subscribe(hass, "test-topic", record_calls)
+    mqtt_mock.return_value._batch_latency = 5
+
+    await hass.async_add_executor_job(
+        mqtt_mock._mqtt_on_message,
+        None,
+        None,
+        mqtt.Message("test-topic", b"payload", 0, False),
+    )
+    await hass.async_block_till_done()
+    assert len(calls) == 0
+
+    async_fire_time_changed(hass, utcnow() + timedelta(seconds=5))
+    await hass.async_block_till_done()
+    assert len(calls) == 1
+
+
+async def test_message_stats_without_connection(hass, hass_ws_client):
+    """Test getting the message stats before MQTT is set up."""
+    assert not await async_setup_component(hass, mqtt.DOMAIN, {})
+
+    client = await hass_ws_client(hass)
+    await client.send_json({"id": 5, "type": "mqtt/message_stats"})
+    response = await client.receive_json()
+    assert not response["success"]
+    assert response["error"]["code"] == websocket_api.const.ERR_NOT_FOUND
+
+
 async def test_subscribe_deprecated(hass, mqtt_mock):
     """Test the subscription of a topic using deprecated callback signature."""
     calls = []
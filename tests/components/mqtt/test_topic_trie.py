@@ -0,0 +1,67 @@
+"""The tests for the MQTT topic trie."""
+import pytest
+
+from homeassistant.components.mqtt.topic_trie import TopicTrie
+
+
+@pytest.mark.parametrize(
+    "topic_filter,topic,matches",
+    [
+        ("a/b/c", "a/b/c", True),
+        ("a/b/c", "a/b", False),
+        ("a/b/c", "a/b/c/d", False),
+        ("a/+/c", "a/b/c", True),
+        ("a/+/c", "a//c", True),
+        ("a/+/c", "a/b/d", False),
+        ("a/+", "a/b/c", False),
+        ("a/#", "a", True),
+        ("a/#", "a/b/c", True),
+        ("a/#", "b/c", False),
+        ("#", "a/b", True),
+        ("+/b", "a/b", True),
+        ("#", "$SYS/broker", False),
+        ("+/broker", "$SYS/broker", False),
+        ("$SYS/#", "$SYS/broker", True),
+        ("$SYS/+", "$SYS/broker", True),
+    ],
+)
+def test_match(topic_filter, topic, matches):
+    """Test topics are matched like by the broker."""
+    trie = TopicTrie()
+    trie.add(topic_filter, "item")
+    assert trie.match(topic) == (["item"] if matches else [])
+
+
+def test_match_multiple_filters():
+    """Test the items of all matching filters are returned."""
+    trie = TopicTrie()
+    trie.add("a/b", 1)
+    trie.add("a/b", 2)
+    trie.add("a/+", 3)
+    trie.add("#", 4)
+    trie.add("a/c", 5)
+
+    assert sorted(trie.match("a/b")) == [1, 2, 3, 4]
+    assert sorted(trie.match("a/c")) == [3, 4, 5]
+
+
+def test_remove():
+    """Test removing items prunes the filters not used anymore."""
+    trie = TopicTrie()
+    trie.add("a/b/c", 1)
+    trie.add("a/b/c", 2)
+    trie.add("a/#", 3)
+
+    assert trie.remove("a/b/c", 1)
+    assert not trie.remove("a/b/c", 1)
+    assert not trie.remove("a/b", 2)
+    assert trie.get("a/b/c") == [2]
+    assert sorted(trie.match("a/b/c")) == [2, 3]
+
+    assert trie.remove("a/b/c", 2)
+    assert trie.get("a/b/c") == []
+    assert trie.match("a/b/c") == [3]
+
+    assert trie.remove("a/#", 3)
+    assert trie.match("a/b/c") == []
+    assert trie._root.children == {}
@@ -6,14 +6,23 @@ from homeassistant import setup
 from homeassistant.components.profiler import (
     CONF_SCAN_INTERVAL,
     CONF_SECONDS,
+    CONF_SLOW_THRESHOLD,
     CONF_TYPE,
     SERVICE_DUMP_LOG_OBJECTS,
     SERVICE_MEMORY,
     SERVICE_START,
     SERVICE_START_LOG_OBJECTS,
+    SERVICE_START_LOOP_MONITOR,
     SERVICE_STOP_LOG_OBJECTS,
+    SERVICE_STOP_LOOP_MONITOR,
 )
 from homeassistant.components.profiler.const import DOMAIN
+from homeassistant.const import STATE_UNKNOWN
+from homeassistant.core import callback
+from homeassistant.helpers import polling
+from homeassistant.helpers.entity import DATA_SKIPPED_STATE_WRITES
+from homeassistant.helpers.executor import DEFAULT_POOL, async_add_executor_job
+from homeassistant.helpers.template import compiled_template_cache_stats
 import homeassistant.util.dt as dt_util
 
 from tests.async_mock import patch
@@ -147,3 +156,110 @@ async def test_dump_log_object(hass, caplog):
 
     assert await hass.config_entries.async_unload(entry.entry_id)
     await hass.async_block_till_done()
+
+
+async def test_loop_monitor(hass, hass_ws_client, caplog):
+    """Test slow callbacks are recorded and reported."""
+
+    await setup.async_setup_component(hass, "persistent_notification", {})
+    entry = MockConfigEntry(domain=DOMAIN)
+    entry.add_to_hass(hass)
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert hass.states.get("sensor.profiler_event_loop_lag").state == STATE_UNKNOWN
+
+    await hass.services.async_call(
+        DOMAIN, SERVICE_START_LOOP_MONITOR, {CONF_SLOW_THRESHOLD: 0}, blocking=True
+    )
+
+    @callback
+    def slow_listener(event):
+        pass
+
+    hass.bus.async_listen("test_event", slow_listener)
+    hass.bus.async_fire("test_event")
+    await hass.async_block_till_done()
+
+    assert "slow_listener of tests blocked the event loop" in caplog.text
+
+    client = await hass_ws_client(hass)
+    await client.send_json({"id": 5, "type": "profiler/loop_monitor"})
+    response = await client.receive_json()
+    assert response["success"]
+    result = response["result"]
+    assert result["running"]
+    assert result["domains"]["tests"]["event"]["count"] == 1
+    assert result["slow_callbacks"][0]["origin"] == "event test_event"
+
+    await hass.helpers.entity_component.async_update_entity(
+        "sensor.profiler_event_loop_lag"
+    )
+    state = hass.states.get("sensor.profiler_event_loop_lag")
+    assert state.state != STATE_UNKNOWN
+    assert state.attributes["slow_callbacks"] >= 1
+
+    await hass.services.async_call(DOMAIN, SERVICE_STOP_LOOP_MONITOR, {}, blocking=True)
+    assert hass.job_timer is None
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_executor_stats(hass, hass_ws_client):
+    """Test the stats of the executor pools are reported."""
+    assert await setup.async_setup_component(hass, DOMAIN, {})
+    await async_add_executor_job(hass, "test", lambda: None)
+
+    client = await hass_ws_client(hass)
+    await client.send_json({"id": 5, "type": "profiler/executor_stats"})
+    response = await client.receive_json()
+    assert response["success"]
+    assert response["result"][DEFAULT_POOL]["jobs"] == 1
+
+
+async def test_compiled_template_cache(hass, hass_ws_client):
+    """Test the stats of the compiled template cache are reported."""
+    assert await setup.async_setup_component(hass, DOMAIN, {})
+
+    client = await hass_ws_client(hass)
+    await client.send_json({"id": 5, "type": "profiler/compiled_template_cache"})
+    response = await client.receive_json()
+    assert response["success"]
+    assert set(response["result"]) == set(compiled_template_cache_stats())
+
+
+async def test_render_memo(hass, hass_ws_client):
+    """Test the stats of the memoized template renders are reported."""
+    assert await setup.async_setup_component(hass, DOMAIN, {})
+
+    client = await hass_ws_client(hass)
+    await client.send_json({"id": 5, "type": "profiler/render_memo"})
+    response = await client.receive_json()
+    assert response["success"]
+    assert set(response["result"]) == {"hits", "misses", "hit_rate"}
+
+
+async def test_skipped_state_writes(hass, hass_ws_client):
+    """Test the skipped state writes are reported."""
+    assert await setup.async_setup_component(hass, DOMAIN, {})
+    hass.data[DATA_SKIPPED_STATE_WRITES] = {"test": 2}
+
+    client = await hass_ws_client(hass)
+    await client.send_json({"id": 5, "type": "profiler/skipped_state_writes"})
+    response = await client.receive_json()
+    assert response["success"]
+    assert response["result"] == {"test": 2}
+
+
+async def test_poll_stats(hass, hass_ws_client):
+    """Test the poll stats are reported."""
+    assert await setup.async_setup_component(hass, DOMAIN, {})
+    polling.async_get_poll_scheduler(hass).async_stats_for("test", "platform")
+
+    client = await hass_ws_client(hass)
+    await client.send_json({"id": 5, "type": "profiler/poll_stats"})
+    response = await client.receive_json()
+    assert response["success"]
+    assert response["result"]["test.platform"]["polls"] == 0
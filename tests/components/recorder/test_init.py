@@ -1,6 +1,7 @@
 """The tests for the Recorder component."""
 # pylint: disable=protected-access
 from datetime import datetime, timedelta
+import threading
 
 from sqlalchemy.exc import OperationalError
 
@@ -12,8 +13,17 @@ from homeassistant.components.recorder import (
     run_information_from_instance,
     run_information_with_session,
 )
-from homeassistant.components.recorder.const import DATA_INSTANCE
-from homeassistant.components.recorder.models import Events, RecorderRuns, States
+from homeassistant.components.recorder.const import (
+    DATA_INSTANCE,
+    EVENT_RECORDER_QUEUE_OVERFLOW,
+)
+from homeassistant.components.recorder.models import (
+    Events,
+    RecorderRuns,
+    StateAttributes,
+    States,
+)
+from homeassistant.components.recorder.spill import SpillFile
 from homeassistant.components.recorder.util import session_scope
 from homeassistant.const import MATCH_ALL, STATE_LOCKED, STATE_UNLOCKED
 from homeassistant.core import Context, callback
@@ -319,6 +329,8 @@ def test_recorder_setup_failure():
             auto_purge=True,
             keep_days=7,
             commit_interval=1,
+            batch_writes=False,
+            max_queue_depth=30000,
             uri="sqlite://",
             db_max_retries=10,
             db_retry_wait=3,
@@ -459,3 +471,196 @@ def test_run_information(hass_recorder):
 
 class CannotSerializeMe:
     """A class that the JSONEncoder cannot serialize."""
+
+
+def test_batch_writes_saving_state_and_event(hass_recorder):
+    """Test saving states and events with batched writes."""
+    hass = hass_recorder({"batch_writes": True})
+
+    hass.states.set("test.one", "on", {"test_attr": 5})
+    hass.bus.fire("EVENT_TEST", {"test_attr": 5})
+    wait_recording_done(hass)
+
+    with session_scope(hass=hass) as session:
+        db_states = list(session.query(States))
+        assert len(db_states) == 1
+        db_event = session.query(Events).filter_by(event_id=db_states[0].event_id).one()
+        assert db_event.event_type == "state_changed"
+        assert db_states[0].to_native() == _state_empty_context(hass, "test.one")
+
+        db_events = list(session.query(Events).filter_by(event_type="EVENT_TEST"))
+        assert len(db_events) == 1
+        assert db_events[0].to_native().data == {"test_attr": 5}
+
+    assert hass.data[DATA_INSTANCE].rows_written >= 3
+
+
+def test_batch_writes_sets_old_state(hass_recorder):
+    """Test batched writes link states to the previous state."""
+    hass = hass_recorder({"batch_writes": True})
+
+    hass.states.set("test.one", "on", {})
+    hass.states.set("test.two", "on", {})
+    wait_recording_done(hass)
+    hass.states.set("test.one", "off", {})
+    hass.states.set("test.one", "on", {})
+    hass.states.remove("test.two")
+    wait_recording_done(hass)
+    hass.states.set("test.two", "on", {})
+    wait_recording_done(hass)
+
+    with session_scope(hass=hass) as session:
+        states = list(session.query(States).order_by(States.state_id))
+        assert [(state.entity_id, state.state) for state in states] == [
+            ("test.one", "on"),
+            ("test.two", "on"),
+            ("test.one", "off"),
+            ("test.one", "on"),
+            ("test.two", None),
+            ("test.two", "on"),
+        ]
+        assert states[0].old_state_id is None
+        assert states[1].old_state_id is None
+        assert states[2].old_state_id == states[0].state_id
+        assert states[3].old_state_id == states[2].state_id
+        assert states[4].old_state_id == states[1].state_id
+        assert states[5].old_state_id is None
+
+
+def test_batch_writes_retries_failed_commit(hass_recorder, caplog):
+    """Test batched rows are kept when the commit has to be retried."""
+    hass = hass_recorder({"batch_writes": True})
+    instance = hass.data[DATA_INSTANCE]
+    commit = instance.event_session.commit
+    calls = 0
+
+    def _fail_once():
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise OperationalError("insert the state", "fake params", "forced to fail")
+        commit()
+
+    with patch("time.sleep"), patch.object(
+        instance.event_session, "commit", side_effect=_fail_once
+    ):
+        hass.states.set("test.one", "on", {})
+        wait_recording_done(hass)
+
+    assert "Error executing query" in caplog.text
+
+    with session_scope(hass=hass) as session:
+        assert len(list(session.query(States))) == 1
+
+
+def test_batch_writes_without_commit_interval(hass_recorder):
+    """Test batched writes commit every event without a commit interval."""
+    hass = hass_recorder({"batch_writes": True, "commit_interval": 0})
+
+    hass.states.set("test.one", "on", {})
+    hass.block_till_done()
+    hass.data[DATA_INSTANCE].block_till_done()
+
+    with session_scope(hass=hass) as session:
+        assert len(list(session.query(States))) == 1
+
+
+def test_queue_overflow_spills_to_disk(hass_recorder, tmp_path):
+    """Test events overflowing the queue are spilled and recorded later."""
+    hass = hass_recorder()
+    instance = hass.data[DATA_INSTANCE]
+    instance.max_queue_depth = 2
+    instance._spill = SpillFile(str(tmp_path / "spill"))
+    overflows = []
+    hass.bus.listen(
+        EVENT_RECORDER_QUEUE_OVERFLOW, lambda event: overflows.append(event)
+    )
+
+    blocked = threading.Event()
+    release = threading.Event()
+
+    def _block_purge(*args):
+        blocked.set()
+        release.wait()
+        return True
+
+    with patch(
+        "homeassistant.components.recorder.purge.purge_old_data",
+        side_effect=_block_purge,
+    ):
+        instance.do_adhoc_purge()
+        blocked.wait()
+        for idx in range(5):
+            hass.states.set("test.one", str(idx))
+        hass.block_till_done()
+        queue_depth = instance.queue_depth
+        spilled_events = instance.spilled_events
+        release.set()
+
+    assert queue_depth == 2
+    assert spilled_events == 4
+    assert instance.queue_overflows == 1
+    assert len(overflows) == 1
+    assert overflows[0].data == {"queue_depth": 2, "max_queue_depth": 2}
+
+    wait_recording_done(hass)
+    wait_recording_done(hass)
+
+    assert instance.spilled_events == 0
+    assert not instance._spilling
+    assert not (tmp_path / "spill").exists()
+
+    with session_scope(hass=hass) as session:
+        states = list(session.query(States).order_by(States.state_id))
+        assert [state.state for state in states] == ["0", "1", "2", "3", "4"]
+
+    hass.states.set("test.one", "5")
+    wait_recording_done(hass)
+
+    with session_scope(hass=hass) as session:
+        assert session.query(States).count() == 6
+
+
+def _assert_attributes_deduplicated(hass):
+    """Assert states with identical attributes share a row."""
+    with session_scope(hass=hass) as session:
+        states = list(session.query(States).order_by(States.state_id))
+        assert len(states) == 4
+        assert all(state.attributes is None for state in states)
+        assert states[0].attributes_id == states[2].attributes_id
+        assert states[1].attributes_id == states[3].attributes_id
+        assert states[0].attributes_id != states[1].attributes_id
+        assert session.query(StateAttributes).count() == 2
+        assert states[3].to_native().attributes == {"big": "static", "size": 2}
+
+
+def test_saving_state_deduplicates_attributes(hass_recorder):
+    """Test identical attributes are only stored once."""
+    hass = hass_recorder()
+
+    hass.states.set("test.one", "on", {"big": "static", "size": 1})
+    hass.states.set("test.two", "on", {"big": "static", "size": 2})
+    wait_recording_done(hass)
+    hass.states.set("test.one", "off", {"big": "static", "size": 1})
+    wait_recording_done(hass)
+    # Looked up from the database instead of the cache
+    hass.data[DATA_INSTANCE].state_attributes_ids.clear()
+    hass.states.set("test.two", "off", {"big": "static", "size": 2})
+    wait_recording_done(hass)
+
+    _assert_attributes_deduplicated(hass)
+
+
+def test_batch_writes_deduplicates_attributes(hass_recorder):
+    """Test identical attributes are only stored once with batched writes."""
+    hass = hass_recorder({"batch_writes": True})
+
+    hass.states.set("test.one", "on", {"big": "static", "size": 1})
+    hass.states.set("test.two", "on", {"big": "static", "size": 2})
+    hass.states.set("test.one", "off", {"big": "static", "size": 1})
+    wait_recording_done(hass)
+    hass.data[DATA_INSTANCE].state_attributes_ids.clear()
+    hass.states.set("test.two", "off", {"big": "static", "size": 2})
+    wait_recording_done(hass)
+
+    _assert_attributes_deduplicated(hass)
@@ -4,12 +4,13 @@ from datetime import datetime
 import pytest
 import pytz
 from sqlalchemy import create_engine
-from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.orm import joinedload, scoped_session, sessionmaker
 
 from homeassistant.components.recorder.models import (
     Base,
     Events,
     RecorderRuns,
+    StateAttributes,
     States,
     process_timestamp,
     process_timestamp_to_utc_isoformat,
@@ -128,6 +129,35 @@ def test_entity_ids():
     assert run.entity_ids(in_run2) == ["sensor.humidity"]
 
 
+def test_states_attributes_loaded_on_demand():
+    """Test the shared attributes are only joined when asked for."""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = scoped_session(sessionmaker(bind=engine))
+
+    session.add(
+        States(
+            entity_id="sensor.temperature",
+            state="20",
+            state_attributes=StateAttributes(
+                hash=1, shared_attrs='{"unit_of_measurement": "°C"}'
+            ),
+        )
+    )
+    session.commit()
+    session.expunge_all()
+
+    query = session.query(States)
+    assert "state_attributes" not in str(query.statement)
+    assert query.one().to_native().attributes == {"unit_of_measurement": "°C"}
+    session.expunge_all()
+
+    query = query.options(joinedload(States.state_attributes))
+    db_state = query.one()
+    session.expunge_all()
+    assert db_state.to_native().attributes == {"unit_of_measurement": "°C"}
+
+
 def test_states_from_native_invalid_entity_id():
     """Test loading a state from an invalid entity ID."""
     state = States()
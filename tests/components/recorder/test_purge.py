@@ -4,7 +4,12 @@ import json
 
 from homeassistant.components import recorder
 from homeassistant.components.recorder.const import DATA_INSTANCE
-from homeassistant.components.recorder.models import Events, RecorderRuns, States
+from homeassistant.components.recorder.models import (
+    Events,
+    RecorderRuns,
+    StateAttributes,
+    States,
+)
 from homeassistant.components.recorder.purge import purge_old_data
 from homeassistant.components.recorder.util import session_scope
 from homeassistant.util import dt as dt_util
@@ -25,19 +30,86 @@ def test_purge_old_states(hass, hass_recorder):
         assert states.count() == 6
 
         # run purge_old_data()
-        finished = purge_old_data(hass.data[DATA_INSTANCE], 4, repack=False)
+        finished = purge_old_data(hass.data[DATA_INSTANCE], 4)
         assert not finished
         assert states.count() == 4
 
-        finished = purge_old_data(hass.data[DATA_INSTANCE], 4, repack=False)
+        finished = purge_old_data(hass.data[DATA_INSTANCE], 4)
         assert not finished
         assert states.count() == 2
 
-        finished = purge_old_data(hass.data[DATA_INSTANCE], 4, repack=False)
+        finished = purge_old_data(hass.data[DATA_INSTANCE], 4)
         assert finished
         assert states.count() == 2
 
 
+def test_purge_old_states_in_chunks(hass, hass_recorder):
+    """Test purging a bounded number of states per call."""
+    hass = hass_recorder()
+    _add_test_states(hass)
+
+    with session_scope(hass=hass) as session, patch(
+        "homeassistant.components.recorder.purge.MAX_ROWS_TO_PURGE", 1
+    ):
+        states = session.query(States)
+        assert states.count() == 6
+
+        finished = purge_old_data(hass.data[DATA_INSTANCE], 4)
+        assert not finished
+        assert states.count() == 5
+
+        for remaining in (4, 3, 2):
+            finished = purge_old_data(hass.data[DATA_INSTANCE], 4)
+            assert not finished
+            assert states.count() == remaining
+
+        finished = purge_old_data(hass.data[DATA_INSTANCE], 4)
+        assert finished
+        assert states.count() == 2
+        assert hass.data[DATA_INSTANCE].purge_rows_deleted == 4
+
+
+def test_purge_disconnects_old_state(hass, hass_recorder):
+    """Test states no longer reference purged old states."""
+    hass = hass_recorder()
+    now = dt_util.utcnow()
+    eleven_days_ago = now - timedelta(days=11)
+
+    with recorder.session_scope(hass=hass) as session:
+        old_state = States(
+            entity_id="test.recorder2",
+            domain="sensor",
+            state="purgeme",
+            attributes="{}",
+            last_changed=eleven_days_ago,
+            last_updated=eleven_days_ago,
+            created=eleven_days_ago,
+        )
+        session.add(old_state)
+        session.flush()
+        session.add(
+            States(
+                entity_id="test.recorder2",
+                domain="sensor",
+                state="dontpurgeme",
+                attributes="{}",
+                last_changed=now,
+                last_updated=now,
+                created=now,
+                old_state_id=old_state.state_id,
+            )
+        )
+
+    while not purge_old_data(hass.data[DATA_INSTANCE], 4):
+        pass
+
+    with session_scope(hass=hass) as session:
+        states = session.query(States).all()
+        assert len(states) == 1
+        assert states[0].state == "dontpurgeme"
+        assert states[0].old_state_id is None
+
+
 def test_purge_old_events(hass, hass_recorder):
     """Test deleting old events."""
     hass = hass_recorder()
@@ -48,20 +120,48 @@ def test_purge_old_events(hass, hass_recorder):
         assert events.count() == 6
 
         # run purge_old_data()
-        finished = purge_old_data(hass.data[DATA_INSTANCE], 4, repack=False)
+        finished = purge_old_data(hass.data[DATA_INSTANCE], 4)
         assert not finished
         assert events.count() == 4
 
-        finished = purge_old_data(hass.data[DATA_INSTANCE], 4, repack=False)
+        finished = purge_old_data(hass.data[DATA_INSTANCE], 4)
         assert not finished
         assert events.count() == 2
 
         # we should only have 2 events left
-        finished = purge_old_data(hass.data[DATA_INSTANCE], 4, repack=False)
+        finished = purge_old_data(hass.data[DATA_INSTANCE], 4)
         assert finished
         assert events.count() == 2
 
 
+def test_purge_old_state_attributes(hass, hass_recorder):
+    """Test deleting attributes only used by purged states."""
+    hass = hass_recorder()
+    _add_test_states_with_shared_attributes(hass)
+
+    with session_scope(hass=hass) as session:
+        state_attributes = session.query(StateAttributes)
+        assert state_attributes.count() == 3
+
+        finished = purge_old_data(hass.data[DATA_INSTANCE], 4)
+        assert not finished
+        assert state_attributes.count() == 2
+
+        finished = purge_old_data(hass.data[DATA_INSTANCE], 4)
+        assert not finished
+        assert state_attributes.count() == 1
+
+        finished = purge_old_data(hass.data[DATA_INSTANCE], 4)
+        assert finished
+        assert state_attributes.count() == 1
+
+        states = session.query(States)
+        assert states.count() == 2
+        assert {state.to_native().attributes["shared"] for state in states} == {
+            "recent"
+        }
+
+
 def test_purge_old_recorder_runs(hass, hass_recorder):
     """Test deleting old recorder runs keeps current run."""
     hass = hass_recorder()
@@ -73,7 +173,7 @@ def test_purge_old_recorder_runs(hass, hass_recorder):
         assert recorder_runs.count() == 7
 
         # run purge_old_data()
-        finished = purge_old_data(hass.data[DATA_INSTANCE], 0, repack=False)
+        finished = purge_old_data(hass.data[DATA_INSTANCE], 0)
         assert finished
         assert recorder_runs.count() == 1
 
@@ -139,7 +239,7 @@ def test_purge_method(hass, hass_recorder):
             hass.data[DATA_INSTANCE].block_till_done()
             wait_recording_done(hass)
             assert (
-                mock_logger.debug.mock_calls[5][1][0]
+                mock_logger.debug.mock_calls[6][1][0]
                 == "Vacuuming SQL DB to free space"
             )
 
@@ -181,6 +281,41 @@ def _add_test_states(hass):
             )
 
 
+def _add_test_states_with_shared_attributes(hass):
+    """Add states sharing attributes to the db for testing."""
+    now = datetime.now()
+    five_days_ago = now - timedelta(days=5)
+    eleven_days_ago = now - timedelta(days=11)
+
+    hass.block_till_done()
+    hass.data[DATA_INSTANCE].block_till_done()
+    wait_recording_done(hass)
+
+    with recorder.session_scope(hass=hass) as session:
+        for timestamp, shared in (
+            (eleven_days_ago, "old"),
+            (five_days_ago, "older"),
+            (now, "recent"),
+        ):
+            shared_attrs = json.dumps({"shared": shared})
+            state_attributes = StateAttributes(
+                hash=StateAttributes.hash_shared_attrs(shared_attrs),
+                shared_attrs=shared_attrs,
+            )
+            for _ in range(2):
+                session.add(
+                    States(
+                        entity_id="test.recorder2",
+                        domain="sensor",
+                        state="on",
+                        state_attributes=state_attributes,
+                        last_changed=timestamp,
+                        last_updated=timestamp,
+                        created=timestamp,
+                    )
+                )
+
+
 def _add_test_events(hass):
     """Add a few events for testing."""
     now = datetime.now()
@@ -0,0 +1,93 @@
+"""The tests for the recorder spill file."""
+from homeassistant.components.recorder.spill import SpillFile
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import Context, Event, State
+from homeassistant.util import dt as dt_util
+
+
+def test_spill_replay_round_trip(tmp_path):
+    """Test spilled events are replayed in order and removed from disk."""
+    spill = SpillFile(str(tmp_path / "spill"))
+    context = Context(user_id="user", parent_id="parent")
+    new_state = State("sensor.power", "100", {"unit_of_measurement": "W"})
+    time_fired = dt_util.utcnow()
+
+    assert spill.add(Event("test_event", {"data": 1}, context=context))
+    assert spill.add(
+        Event(
+            EVENT_STATE_CHANGED,
+            {"entity_id": "sensor.power", "old_state": None, "new_state": new_state},
+            time_fired=time_fired,
+        )
+    )
+    assert spill.pending == 2
+    spill.flush()
+    assert (tmp_path / "spill").exists()
+
+    events = list(spill.replay())
+    assert spill.pending == 0
+    assert not (tmp_path / "spill").exists()
+    assert (tmp_path / "spill.replay").exists()
+    spill.commit()
+    assert not (tmp_path / "spill.replay").exists()
+
+    assert events[0].event_type == "test_event"
+    assert events[0].data == {"data": 1}
+    assert events[0].context == context
+    assert events[1].time_fired == time_fired
+    assert events[1].data["old_state"] is None
+    assert events[1].data["new_state"].state == "100"
+    assert events[1].data["new_state"].attributes == {"unit_of_measurement": "W"}
+    assert events[1].data["new_state"].last_updated == new_state.last_updated
+
+
+def test_spill_unserializable_event(tmp_path, caplog):
+    """Test an event that cannot be serialized is reported."""
+    spill = SpillFile(str(tmp_path / "spill"))
+
+    assert not spill.add(Event("test_event", {"data": object()}))
+    assert spill.pending == 0
+    assert "Event is not JSON serializable" in caplog.text
+
+
+def test_spill_load_left_over_files(tmp_path):
+    """Test events left behind by a previous run are replayed first."""
+    first = SpillFile(str(tmp_path / "spill"))
+    first.add(Event("first_event"))
+    first.flush()
+    # Stopped while replaying
+    (tmp_path / "spill").rename(tmp_path / "spill.replay")
+    first.add(Event("second_event"))
+    first.flush()
+
+    spill = SpillFile(str(tmp_path / "spill"))
+    spill.load()
+    assert spill.pending == 2
+
+    assert [event.event_type for event in spill.replay()] == ["first_event"]
+    spill.commit()
+    assert [event.event_type for event in spill.replay()] == ["second_event"]
+    spill.commit()
+    assert spill.pending == 0
+
+
+def test_spill_resume_replay_after_commit(tmp_path):
+    """Test a replay stopped halfway resumes after the committed events."""
+    first = SpillFile(str(tmp_path / "spill"))
+    for idx in range(4):
+        first.add(Event(f"event_{idx}"))
+
+    replay = first.replay()
+    assert next(replay).event_type == "event_0"
+    assert next(replay).event_type == "event_1"
+    first.commit()
+    # Replayed but not committed
+    assert next(replay).event_type == "event_2"
+
+    spill = SpillFile(str(tmp_path / "spill"))
+    spill.load()
+    assert spill.pending == 2
+    assert [event.event_type for event in spill.replay()] == ["event_2", "event_3"]
+    spill.commit()
+    assert not (tmp_path / "spill.replay").exists()
+    assert not (tmp_path / "spill.offset").exists()
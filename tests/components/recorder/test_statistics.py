@@ -0,0 +1,296 @@
+"""Test compiling long-term statistics."""
+from datetime import timedelta
+import json
+
+from homeassistant.components import recorder
+from homeassistant.components.recorder import statistics
+from homeassistant.components.recorder.const import DATA_INSTANCE
+from homeassistant.components.recorder.models import States, Statistics
+from homeassistant.components.recorder.purge import purge_old_data
+from homeassistant.components.recorder.statistics import (
+    PERIOD_5MINUTE,
+    PERIOD_HOUR,
+    compile_missing_statistics,
+    compile_statistics,
+    period_start,
+    statistics_during_period,
+)
+from homeassistant.components.recorder.util import session_scope
+from homeassistant.util import dt as dt_util
+from homeassistant.util.async_ import run_callback_threadsafe
+
+from .common import wait_recording_done
+
+from tests.async_mock import patch
+
+
+def _add_test_states(hass, entity_id, changes, attributes=None):
+    """Add the states of an entity changing at the given times."""
+    wait_recording_done(hass)
+    with recorder.session_scope(hass=hass) as session:
+        for timestamp, state in changes:
+            session.add(
+                States(
+                    entity_id=entity_id,
+                    domain="sensor",
+                    state=state,
+                    attributes=json.dumps(attributes or {}),
+                    last_changed=timestamp,
+                    last_updated=timestamp,
+                    created=timestamp,
+                )
+            )
+
+
+def _seed_states(hass):
+    """Return the states statistics are seeded with when they are scheduled."""
+    return run_callback_threadsafe(
+        hass.loop, statistics.async_seed_states, hass.data[DATA_INSTANCE]
+    ).result()
+
+
+def _get_statistics(hass, entity_id, period):
+    """Return the compiled statistics of an entity by start."""
+    with session_scope(hass=hass) as session:
+        return {
+            dt_util.as_utc(row.start): (row.mean, row.min, row.max, row.sum, row.last)
+            for row in session.query(Statistics)
+            .filter(Statistics.entity_id == entity_id)
+            .filter(Statistics.period == period)
+        }
+
+
+def test_compile_5minute_statistics(hass_recorder):
+    """Test compiling the statistics of numeric sensors."""
+    hass = hass_recorder()
+    instance = hass.data[DATA_INSTANCE]
+    start = period_start(dt_util.utcnow() - timedelta(hours=1), PERIOD_5MINUTE)
+    _add_test_states(
+        hass,
+        "sensor.temperature",
+        [
+            (start, "10"),
+            (start + timedelta(seconds=60), "20"),
+            (start + timedelta(seconds=240), "unavailable"),
+        ],
+    )
+    _add_test_states(
+        hass,
+        "sensor.energy",
+        [
+            (start, "100"),
+            (start + timedelta(seconds=120), "105"),
+            (start + timedelta(seconds=180), "2"),
+        ],
+        {"device_class": "energy"},
+    )
+    _add_test_states(hass, "sensor.text", [(start, "on")])
+
+    states = _seed_states(hass)
+    compile_statistics(instance, start, states)
+    compile_statistics(instance, start + timedelta(seconds=PERIOD_5MINUTE), states)
+    # Compiling a period again does not add statistics
+    compile_statistics(instance, start, states)
+
+    next_start = start + timedelta(seconds=PERIOD_5MINUTE)
+    assert _get_statistics(hass, "sensor.temperature", PERIOD_5MINUTE) == {
+        start: (17.5, 10.0, 20.0, None, None)
+    }
+    assert _get_statistics(hass, "sensor.energy", PERIOD_5MINUTE) == {
+        start: (61.8, 2.0, 105.0, 7.0, 2.0),
+        next_start: (2.0, 2.0, 2.0, 0.0, 2.0),
+    }
+    assert _get_statistics(hass, "sensor.text", PERIOD_5MINUTE) == {}
+
+
+def test_compile_hourly_statistics(hass_recorder):
+    """Test compiling hourly statistics from the 5 minute ones."""
+    hass = hass_recorder()
+    instance = hass.data[DATA_INSTANCE]
+    hour_start = period_start(dt_util.utcnow() - timedelta(hours=2), PERIOD_HOUR)
+    _add_test_states(
+        hass,
+        "sensor.temperature",
+        [(hour_start, "5"), (hour_start + timedelta(minutes=30), "11")],
+    )
+
+    states = _seed_states(hass)
+    for idx in range(12):
+        compile_statistics(
+            instance, hour_start + timedelta(seconds=idx * PERIOD_5MINUTE), states
+        )
+
+    assert _get_statistics(hass, "sensor.temperature", PERIOD_HOUR) == {
+        hour_start: (8.0, 5.0, 11.0, None, 11.0)
+    }
+    assert statistics_during_period(
+        hass, hour_start, entity_ids=["sensor.temperature"]
+    ) == {
+        "sensor.temperature": [
+            {
+                "entity_id": "sensor.temperature",
+                "start": hour_start.isoformat(),
+                "mean": 8.0,
+                "min": 5.0,
+                "max": 11.0,
+                "sum": None,
+            }
+        ]
+    }
+
+
+def test_compile_hourly_statistics_weighted(hass_recorder):
+    """Test the hourly mean is weighted by the time the 5 minute means cover."""
+    hass = hass_recorder()
+    instance = hass.data[DATA_INSTANCE]
+    hour_start = period_start(dt_util.utcnow() - timedelta(hours=2), PERIOD_HOUR)
+    _add_test_states(
+        hass,
+        "sensor.temperature",
+        [
+            (hour_start, "10"),
+            (hour_start + timedelta(minutes=5), "unavailable"),
+            (hour_start + timedelta(minutes=57), "40"),
+        ],
+    )
+
+    states = _seed_states(hass)
+    for idx in range(12):
+        compile_statistics(
+            instance, hour_start + timedelta(seconds=idx * PERIOD_5MINUTE), states
+        )
+
+    assert _get_statistics(hass, "sensor.temperature", PERIOD_HOUR) == {
+        hour_start: (21.25, 10.0, 40.0, None, 40.0)
+    }
+
+
+def test_compile_missing_statistics(hass_recorder):
+    """Test the periods missed since the last compiled one are compiled."""
+    hass = hass_recorder()
+    instance = hass.data[DATA_INSTANCE]
+    start = period_start(dt_util.utcnow() - timedelta(hours=1), PERIOD_5MINUTE)
+    _add_test_states(hass, "sensor.temperature", [(start, "10")])
+
+    states = _seed_states(hass)
+    compile_statistics(instance, start, states)
+    end = start + timedelta(seconds=3 * PERIOD_5MINUTE)
+    assert compile_missing_statistics(instance, end, states) is None
+
+    assert _get_statistics(hass, "sensor.temperature", PERIOD_5MINUTE) == {
+        start + timedelta(seconds=idx * PERIOD_5MINUTE): (10.0, 10.0, 10.0, None, 10.0)
+        for idx in range(4)
+    }
+
+
+def test_compile_missing_statistics_in_steps(hass_recorder):
+    """Test the missed periods are compiled a few at a time."""
+    hass = hass_recorder()
+    instance = hass.data[DATA_INSTANCE]
+    start = period_start(dt_util.utcnow() - timedelta(hours=1), PERIOD_5MINUTE)
+    _add_test_states(hass, "sensor.temperature", [(start, "10")])
+    states = _seed_states(hass)
+    compile_statistics(instance, start, states)
+    end = start + timedelta(seconds=3 * PERIOD_5MINUTE)
+
+    with patch.object(statistics, "MAX_MISSING_PERIODS", 2):
+        next_start = compile_missing_statistics(instance, end, states)
+        assert next_start == start + timedelta(seconds=3 * PERIOD_5MINUTE)
+        assert len(_get_statistics(hass, "sensor.temperature", PERIOD_5MINUTE)) == 3
+
+        assert compile_missing_statistics(instance, end, states, next_start) is None
+        assert len(_get_statistics(hass, "sensor.temperature", PERIOD_5MINUTE)) == 4
+
+
+def test_compile_statistics_of_unchanged_state(hass_recorder):
+    """Test entities without statistics start with their last state."""
+    hass = hass_recorder()
+    instance = hass.data[DATA_INSTANCE]
+    start = period_start(dt_util.utcnow() - timedelta(hours=1), PERIOD_5MINUTE)
+    next_start = period_start(dt_util.utcnow(), PERIOD_5MINUTE) + timedelta(
+        seconds=PERIOD_5MINUTE
+    )
+    _add_test_states(hass, "sensor.temperature", [(start - timedelta(minutes=10), "5")])
+    hass.states.set("sensor.temperature", "20")
+    hass.states.set("sensor.energy", "100", {"device_class": "energy"})
+    wait_recording_done(hass)
+
+    # The last recorded state before start is used as the state changed since
+    states = _seed_states(hass)
+    compile_statistics(instance, start, states)
+    # The current state is used as it didn't change since start
+    compile_statistics(instance, next_start, states)
+
+    assert _get_statistics(hass, "sensor.temperature", PERIOD_5MINUTE) == {
+        start: (5.0, 5.0, 5.0, None, 5.0),
+        next_start: (20.0, 20.0, 20.0, None, 20.0),
+    }
+    assert _get_statistics(hass, "sensor.energy", PERIOD_5MINUTE) == {
+        next_start: (100.0, 100.0, 100.0, 0.0, 100.0),
+    }
+
+
+def test_compile_statistics_of_excluded_entities(hass_recorder):
+    """Test no statistics are compiled for entities that are not recorded."""
+    hass = hass_recorder({"exclude": {"entities": ["sensor.secret"]}})
+    instance = hass.data[DATA_INSTANCE]
+    start = period_start(dt_util.utcnow() - timedelta(hours=1), PERIOD_5MINUTE)
+    _add_test_states(hass, "sensor.ok", [(start, "10")])
+    _add_test_states(hass, "sensor.secret", [(start, "10")])
+    hass.states.set("sensor.secret", "20")
+    wait_recording_done(hass)
+
+    states = _seed_states(hass)
+    compile_statistics(instance, start, states)
+
+    assert _get_statistics(hass, "sensor.ok", PERIOD_5MINUTE) == {
+        start: (10.0, 10.0, 10.0, None, 10.0)
+    }
+    assert _get_statistics(hass, "sensor.secret", PERIOD_5MINUTE) == {}
+
+
+def test_purge_5minute_statistics(hass_recorder):
+    """Test purging the 5 minute statistics compiled into hourly ones."""
+    hass = hass_recorder()
+    instance = hass.data[DATA_INSTANCE]
+    hour_start = period_start(dt_util.utcnow() - timedelta(days=11), PERIOD_HOUR)
+    _add_test_states(hass, "sensor.temperature", [(hour_start, "10")])
+    states = _seed_states(hass)
+    for idx in range(13):
+        compile_statistics(
+            instance, hour_start + timedelta(seconds=idx * PERIOD_5MINUTE), states
+        )
+
+    while not purge_old_data(instance, 4):
+        pass
+
+    # The 5 minute statistics of the next, not yet compiled, hour are kept
+    next_hour_start = hour_start + timedelta(seconds=PERIOD_HOUR)
+    assert _get_statistics(hass, "sensor.temperature", PERIOD_5MINUTE) == {
+        next_hour_start: (10.0, 10.0, 10.0, None, 10.0)
+    }
+    assert _get_statistics(hass, "sensor.temperature", PERIOD_HOUR) == {
+        hour_start: (10.0, 10.0, 10.0, None, 10.0)
+    }
+
+
+def test_statistics_survive_purge(hass_recorder):
+    """Test purging old states keeps their statistics."""
+    hass = hass_recorder()
+    instance = hass.data[DATA_INSTANCE]
+    # The first 5 minutes of an hour, no hourly statistics are compiled
+    start = period_start(dt_util.utcnow() - timedelta(days=11), PERIOD_HOUR)
+    _add_test_states(hass, "sensor.temperature", [(start, "10")])
+    states = _seed_states(hass)
+    compile_statistics(instance, start, states)
+
+    while not purge_old_data(instance, 4):
+        pass
+
+    with session_scope(hass=hass) as session:
+        assert (
+            session.query(States).filter_by(entity_id="sensor.temperature").count() == 0
+        )
+    assert _get_statistics(hass, "sensor.temperature", PERIOD_5MINUTE) == {
+        start: (10.0, 10.0, 10.0, None, 10.0)
+    }
@@ -0,0 +1,34 @@
+"""Test recorder system health."""
+from homeassistant.components.recorder.const import DATA_INSTANCE
+from homeassistant.setup import async_setup_component
+
+from tests.common import async_init_recorder_component, get_system_health_info
+
+
+async def test_recorder_system_health(hass):
+    """Test recorder system health."""
+    await async_init_recorder_component(hass)
+    assert await async_setup_component(hass, "system_health", {})
+    await hass.async_block_till_done()
+    await hass.async_add_executor_job(hass.data[DATA_INSTANCE].block_till_done)
+    info = await get_system_health_info(hass, "recorder")
+    # The rows written depend on when the recorder committed
+    assert info.pop("rows_written") >= 0
+    assert info.pop("rows_per_second") >= 0
+    assert info == {
+        "write_mode": "session",
+        "queue_depth": 0,
+        "max_queue_depth": 30000,
+        "queue_overflows": 0,
+        "spilled_events": 0,
+        "purge_in_progress": False,
+        "purge_rows_deleted": 0,
+    }
+
+
+async def test_recorder_system_health_batch_writes(hass):
+    """Test recorder system health with batched writes."""
+    await async_init_recorder_component(hass, {"batch_writes": True})
+    assert await async_setup_component(hass, "system_health", {})
+    info = await get_system_health_info(hass, "recorder")
+    assert info["write_mode"] == "batch"
@@ -187,6 +187,119 @@ async def test_subscribe_unsubscribe_events(hass, websocket_client):
     assert sum(hass.bus.async_listeners().values()) == init_count
 
 
+async def test_subscribe_entities(hass, websocket_client):
+    """Test subscribe entities command sends the changes of the entities."""
+    hass.states.async_set("light.permitted", "off", {"color": "red"})
+    hass.states.async_set("light.other", "off")
+    hass.states.async_set("switch.ignored", "off")
+    hass.states.async_set("sensor.single", "1")
+    light_state = hass.states.get("light.permitted")
+
+    await websocket_client.send_json(
+        {
+            "id": 7,
+            "type": "subscribe_entities",
+            "entity_ids": ["sensor.single"],
+            "domains": ["light"],
+        }
+    )
+
+    msg = await websocket_client.receive_json()
+    assert msg["id"] == 7
+    assert msg["type"] == const.TYPE_RESULT
+    assert msg["success"]
+
+    msg = await websocket_client.receive_json()
+    assert msg["id"] == 7
+    assert msg["type"] == "event"
+    assert set(msg["event"]["a"]) == {"light.permitted", "light.other", "sensor.single"}
+    assert msg["event"]["a"]["light.permitted"] == {
+        "s": "off",
+        "a": {"color": "red"},
+        "c": light_state.context.id,
+        "lc": light_state.last_changed.timestamp(),
+    }
+
+    hass.states.async_set("switch.ignored", "on")
+    hass.states.async_set("light.permitted", "on", {"brightness": 100})
+    light_state = hass.states.get("light.permitted")
+
+    msg = await websocket_client.receive_json()
+    assert msg["event"] == {
+        "c": {
+            "light.permitted": {
+                "+": {
+                    "s": "on",
+                    "a": {"brightness": 100},
+                    "c": light_state.context.id,
+                    "lc": light_state.last_changed.timestamp(),
+                },
+                "-": {"a": ["color"]},
+            }
+        }
+    }
+
+    hass.states.async_set("light.permitted", "on", {"brightness": 100})
+    hass.states.async_set("light.permitted", "on", {"brightness": 50})
+    light_state = hass.states.get("light.permitted")
+
+    msg = await websocket_client.receive_json()
+    assert msg["event"] == {
+        "c": {
+            "light.permitted": {
+                "+": {
+                    "a": {"brightness": 50},
+                    "c": light_state.context.id,
+                    "lu": light_state.last_updated.timestamp(),
+                }
+            }
+        }
+    }
+
+    # Entities added to a domain are sent once and then tracked
+    hass.states.async_set("light.new", "off")
+    msg = await websocket_client.receive_json()
+    assert set(msg["event"]["a"]) == {"light.new"}
+
+    hass.states.async_set("light.new", "on")
+    msg = await websocket_client.receive_json()
+    assert msg["event"]["c"]["light.new"]["+"]["s"] == "on"
+
+    hass.states.async_remove("sensor.single")
+    msg = await websocket_client.receive_json()
+    assert msg["event"] == {"r": ["sensor.single"]}
+
+    hass.states.async_set("sensor.single", "2")
+    msg = await websocket_client.receive_json()
+    assert set(msg["event"]["a"]) == {"sensor.single"}
+    assert msg["event"]["a"]["sensor.single"]["s"] == "2"
+
+    await websocket_client.send_json(
+        {"id": 8, "type": "unsubscribe_events", "subscription": 7}
+    )
+    msg = await websocket_client.receive_json()
+    assert msg["id"] == 8
+    assert msg["success"]
+
+    hass.states.async_set("light.permitted", "off")
+    hass.states.async_set("light.new", "off")
+    await websocket_client.send_json({"id": 9, "type": "ping"})
+    msg = await websocket_client.receive_json()
+    assert msg["id"] == 9
+    assert msg["type"] == "pong"
+
+
+async def test_subscribe_entities_requires_entities(hass, websocket_client):
+    """Test subscribe entities command needs entity_ids or domains."""
+    await websocket_client.send_json({"id": 7, "type": "subscribe_entities"})
+
+    msg = await websocket_client.receive_json()
+    assert msg["id"] == 7
+    assert msg["type"] == const.TYPE_RESULT
+    assert not msg["success"]
+    assert msg["error"]["code"] == const.ERR_INVALID_FORMAT
+
+
 async def test_get_states(hass, websocket_client):
     """Test get_states command."""
     hass.states.async_set("greeting.hello", "world")
@@ -206,6 +319,63 @@ async def test_get_states(hass, websocket_client):
     assert msg["result"] == states
 
 
+async def test_get_state_changes(hass, websocket_client):
+    """Test get_state_changes command returns what changed since a version."""
+    hass.states.async_set("greeting.hello", "world")
+    hass.states.async_set("greeting.bye", "universe")
+
+    await websocket_client.send_json({"id": 5, "type": "get_state_changes"})
+
+    msg = await websocket_client.receive_json()
+    assert msg["id"] == 5
+    assert msg["type"] == const.TYPE_RESULT
+    assert msg["success"]
+    result = msg["result"]
+    assert result["instance_id"] == hass.states.instance_id
+    assert result["version"] == hass.states.version
+    assert result["snapshot"]
+    assert result["removed"] == []
+    assert result["states"] == [state.as_dict() for state in hass.states.async_all()]
+
+    hass.states.async_set("greeting.hello", "moon")
+    hass.states.async_remove("greeting.bye")
+
+    await websocket_client.send_json(
+        {
+            "id": 6,
+            "type": "get_state_changes",
+            "instance_id": result["instance_id"],
+            "version": result["version"],
+        }
+    )
+
+    msg = await websocket_client.receive_json()
+    assert msg["id"] == 6
+    assert msg["success"]
+    result = msg["result"]
+    assert result["version"] == hass.states.version
+    assert not result["snapshot"]
+    assert result["removed"] == ["greeting.bye"]
+    assert result["states"] == [hass.states.get("greeting.hello").as_dict()]
+
+    # A version of another instance can't be trusted
+    await websocket_client.send_json(
+        {
+            "id": 7,
+            "type": "get_state_changes",
+            "instance_id": "other",
+            "version": result["version"],
+        }
+    )
+
+    msg = await websocket_client.receive_json()
+    assert msg["id"] == 7
+    assert msg["result"]["snapshot"]
+    assert msg["result"]["states"] == [
+        state.as_dict() for state in hass.states.async_all()
+    ]
+
+
 async def test_get_services(hass, websocket_client):
     """Test get_services command."""
     await websocket_client.send_json({"id": 5, "type": "get_services"})
@@ -253,6 +423,76 @@ async def test_ping(websocket_client):
     assert msg["type"] == "pong"
 
 
+async def test_coalesce_messages(hass, websocket_client):
+    """Test queued messages are sent in one frame."""
+    await websocket_client.send_json(
+        {
+            "id": 5,
+            "type": "supported_features",
+            "features": {const.FEATURE_COALESCE_MESSAGES: 1},
+        }
+    )
+    msg = await websocket_client.receive_json()
+    assert msg["id"] == 5
+    assert msg["success"]
+
+    await websocket_client.send_json(
+        {"id": 6, "type": "subscribe_events", "event_type": "test_event"}
+    )
+    msg = await websocket_client.receive_json()
+    assert msg["success"]
+
+    for index in range(3):
+        hass.bus.async_fire("test_event", {"index": index})
+
+    with timeout(3):
+        frame = await websocket_client.receive_json()
+
+    assert [msg["event"]["data"]["index"] for msg in frame] == [0, 1, 2]
+    assert all(msg["id"] == 6 for msg in frame)
+
+
+async def test_coalesce_state_changes(hass, websocket_client):
+    """Test queued state changes of an entity are replaced by newer ones."""
+    await websocket_client.send_json(
+        {
+            "id": 5,
+            "type": "supported_features",
+            "features": {const.FEATURE_COALESCE_STATE_CHANGES: 1},
+        }
+    )
+    msg = await websocket_client.receive_json()
+    assert msg["success"]
+
+    await websocket_client.send_json(
+        {"id": 6, "type": "subscribe_events", "event_type": "state_changed"}
+    )
+    msg = await websocket_client.receive_json()
+    assert msg["success"]
+
+    hass.states.async_set("light.kitchen", "on")
+    hass.states.async_set("light.living_room", "on")
+    hass.states.async_set("light.kitchen", "off", {"brightness": 10})
+
+    with timeout(3):
+        msg = await websocket_client.receive_json()
+    assert msg["event"]["data"]["entity_id"] == "light.kitchen"
+    assert msg["event"]["data"]["new_state"]["state"] == "off"
+
+    msg = await websocket_client.receive_json()
+    assert msg["event"]["data"]["entity_id"] == "light.living_room"
+
+    await websocket_client.send_json({"id": 7, "type": "ping"})
+    msg = await websocket_client.receive_json()
+    assert msg["type"] == "pong"
+
+    # Messages that were sent are not replaced anymore
+    hass.states.async_set("light.kitchen", "on")
+    with timeout(3):
+        msg = await websocket_client.receive_json()
+    assert msg["event"]["data"]["new_state"]["state"] == "on"
+
+
 async def test_call_service_context_with_user(hass, aiohttp_client, hass_access_token):
     """Test that the user is set in the service call context."""
     assert await async_setup_component(hass, "websocket_api", {})
@@ -671,6 +671,43 @@ async def test_update_remove_config_entries(hass, registry, update_events):
     assert update_events[4]["device_id"] == entry3.id
 
 
+async def test_entries_lookups_follow_updates(registry):
+    """Test looking up devices by area and config entry after changes."""
+    entry1 = registry.async_get_or_create(
+        config_entry_id="1234", identifiers={("hue", "1")}
+    )
+    entry2 = registry.async_get_or_create(
+        config_entry_id="1234", identifiers={("hue", "2")}
+    )
+
+    entry1 = registry.async_update_device(entry1.id, area_id="kitchen")
+    entry2 = registry.async_update_device(entry2.id, area_id="kitchen")
+    entry1 = registry.async_get_or_create(
+        config_entry_id="5678", identifiers={("hue", "1")}
+    )
+    assert device_registry.async_entries_for_area(registry, "kitchen") == [
+        entry1,
+        entry2,
+    ]
+    assert device_registry.async_entries_for_config_entry(registry, "1234") == [
+        entry1,
+        entry2,
+    ]
+    assert device_registry.async_entries_for_config_entry(registry, "5678") == [entry1]
+
+    registry.async_clear_config_entry("1234")
+    entry1 = registry.async_get(entry1.id)
+    assert device_registry.async_entries_for_config_entry(registry, "1234") == []
+    assert device_registry.async_entries_for_config_entry(registry, "5678") == [entry1]
+    assert device_registry.async_entries_for_area(registry, "kitchen") == [entry1]
+
+    registry.async_clear_area_id("kitchen")
+    assert device_registry.async_entries_for_area(registry, "kitchen") == []
+
+    registry.async_remove_device(entry1.id)
+    assert device_registry.async_entries_for_config_entry(registry, "5678") == []
+
+
 async def test_loading_race_condition(hass):
     """Test only one storage load called when concurrent loading occurred ."""
     with patch(
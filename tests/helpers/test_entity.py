@@ -650,6 +650,87 @@ async def test_capability_attrs(hass):
     assert state.attributes["always"] == "there"
 
 
+async def test_static_attributes_cached(hass):
+    """Test static attributes are read again after invalidation only."""
+
+    class StaticEntity(entity.Entity):
+        """Entity caching its static attributes."""
+
+        cache_static_attributes = True
+        icon = "mdi:flash"
+        device_state_attributes = {"power": 1}
+
+    entry = entity_registry.RegistryEntry(
+        entity_id="hello.world",
+        unique_id="test-unique-id",
+        platform="test-platform",
+    )
+    registry = mock_registry(hass, {"hello.world": entry})
+
+    ent = StaticEntity()
+    ent.hass = hass
+    ent.entity_id = "hello.world"
+    ent.registry_entry = entry
+    ent.add_to_platform_start(hass, MagicMock(platform_name="test-platform"), None)
+    await ent.add_to_platform_finish()
+
+    with patch.object(
+        StaticEntity, "icon", PropertyMock(return_value="mdi:flash")
+    ) as icon:
+        ent.device_state_attributes = {"power": 2}
+        ent.async_write_ha_state()
+        ent.async_write_ha_state()
+        assert icon.call_count == 0
+
+        state = hass.states.get("hello.world")
+        assert state.attributes == {"icon": "mdi:flash", "power": 2}
+
+        ent.async_invalidate_static_attributes()
+        ent.async_write_ha_state()
+        assert icon.call_count == 1
+
+    registry.async_update_entity("hello.world", name="Meter")
+    await hass.async_block_till_done()
+    state = hass.states.get("hello.world")
+    assert state.attributes == {
+        "friendly_name": "Meter",
+        "icon": "mdi:flash",
+        "power": 2,
+    }
+
+
+async def test_skip_unchanged_state_writes(hass):
+    """Test writing an unchanged state is skipped and counted."""
+    ent = entity.Entity()
+    ent.hass = hass
+    ent.entity_id = "hello.world"
+    ent.platform = MagicMock(platform_name="test-platform")
+
+    with patch.object(
+        entity.Entity, "state", PropertyMock(return_value="on")
+    ), patch.object(hass.states, "async_set", wraps=hass.states.async_set) as set_:
+        ent.async_write_ha_state()
+        ent.async_write_ha_state()
+        assert set_.call_count == 1
+        assert entity.async_skipped_state_writes(hass) == {"test-platform": 1}
+
+        # The state was changed by someone else
+        hass.states.async_set("hello.world", "off")
+        ent.async_write_ha_state()
+        assert hass.states.get("hello.world").state == "on"
+
+        with patch.object(
+            entity.Entity, "force_update", PropertyMock(return_value=True)
+        ):
+            ent.async_write_ha_state()
+        assert set_.call_count == 4
+
+    with patch.object(entity.Entity, "state", PropertyMock(return_value="off")):
+        ent.async_write_ha_state()
+    assert hass.states.get("hello.world").state == "off"
+    assert entity.async_skipped_state_writes(hass) == {"test-platform": 1}
+
+
 async def test_warn_slow_write_state(hass, caplog):
     """Check that we log a warning if reading properties takes too long."""
     mock_entity = entity.Entity()
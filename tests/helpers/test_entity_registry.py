@@ -794,3 +794,45 @@ async def test_disabled_entities_excluded_from_entity_list(hass, registry):
         registry, device_entry.id, include_disabled_entities=True
     )
     assert entries == [entry1, entry2]
+
+
+async def test_entries_lookups_follow_updates(registry):
+    """Test looking up entries by device, area and config entry after changes."""
+    config_entry = MockConfigEntry(domain="light", entry_id="mock-id-1")
+    entry1 = registry.async_get_or_create(
+        "light", "hue", "1234", config_entry=config_entry, device_id="device-1"
+    )
+    entry2 = registry.async_get_or_create(
+        "light", "hue", "5678", config_entry=config_entry, device_id="device-1"
+    )
+
+    entry1 = registry.async_update_entity(entry1.entity_id, area_id="kitchen")
+    entry2 = registry.async_update_entity(entry2.entity_id, name="Ceiling")
+    assert entity_registry.async_entries_for_device(registry, "device-1") == [
+        entry1,
+        entry2,
+    ]
+    assert entity_registry.async_entries_for_area(registry, "kitchen") == [entry1]
+
+    entry1 = registry.async_update_entity(
+        entry1.entity_id, new_entity_id="light.kitchen"
+    )
+    entry1 = registry.async_get_or_create(
+        "light", "hue", "1234", config_entry=config_entry, device_id="device-2"
+    )
+    assert entity_registry.async_entries_for_device(registry, "device-1") == [entry2]
+    assert entity_registry.async_entries_for_device(registry, "device-2") == [entry1]
+    assert entity_registry.async_entries_for_area(registry, "kitchen") == [entry1]
+    assert entity_registry.async_entries_for_config_entry(registry, "mock-id-1") == [
+        entry2,
+        entry1,
+    ]
+
+    registry.async_clear_area_id("kitchen")
+    assert entity_registry.async_entries_for_area(registry, "kitchen") == []
+
+    registry.async_remove(entry2.entity_id)
+    assert entity_registry.async_entries_for_device(registry, "device-1") == []
+    registry.async_clear_config_entry("mock-id-1")
+    assert entity_registry.async_entries_for_config_entry(registry, "mock-id-1") == []
+    assert registry.entities == {}
@@ -1486,6 +1486,108 @@ async def test_track_template_result_errors(hass, caplog):
         assert isinstance(not_exist_runs[2][3], TemplateError)
 
 
+async def test_track_template_result_analyzed_domains(hass):
+    """Test a template filtering all states by domain only tracks the domain."""
+    template_lights = Template(
+        "{{ states | selectattr('domain', 'eq', 'light') | list | count }}", hass
+    )
+    runs = []
+
+    @ha.callback
+    def lights_listener(event, updates):
+        runs.append(updates.pop().result)
+
+    info = async_track_template_result(
+        hass,
+        [TrackTemplate(template_lights, None, timedelta(seconds=0))],
+        lights_listener,
+    )
+    await hass.async_block_till_done()
+
+    assert info.listeners == {
+        "all": False,
+        "domains": {"light"},
+        "entities": set(),
+        "time": False,
+    }
+
+    hass.states.async_set("switch.one", "on")
+    await hass.async_block_till_done()
+    assert runs == []
+
+    hass.states.async_set("light.one", "on")
+    await hass.async_block_till_done()
+    assert runs == [1]
+
+
+async def test_track_template_result_analyzed_error(hass):
+    """Test a template with an error only tracks the states it uses."""
+    template_unit = Template(
+        "{{ states.sensor.temperature.attributes.unit.upper() }}", hass
+    )
+    runs = []
+
+    @ha.callback
+    def unit_listener(event, updates):
+        runs.append(updates.pop().result)
+
+    info = async_track_template_result(
+        hass, [TrackTemplate(template_unit, None)], unit_listener
+    )
+    await hass.async_block_till_done()
+
+    assert info.listeners == {
+        "all": False,
+        "domains": set(),
+        "entities": {"sensor.temperature"},
+        "time": False,
+    }
+
+    hass.states.async_set("sensor.humidity", "50", {"unit": "%"})
+    await hass.async_block_till_done()
+    assert runs == []
+
+    hass.states.async_set("sensor.temperature", "20", {"unit": "c"})
+    await hass.async_block_till_done()
+    assert runs == ["C"]
+
+
+async def test_track_template_result_offload(hass):
+    """Test expensive templates re-render in the executor when offloaded."""
+    template_lights = Template("{{ [states('light.one'), states('light.two')] }}", hass)
+    runs = []
+
+    @ha.callback
+    def lights_listener(event, updates):
+        runs.append(updates.pop().result)
+
+    hass.states.async_set("light.one", "on")
+    with patch("homeassistant.helpers.template.SLOW_RENDER_THRESHOLD", 0), patch(
+        "homeassistant.helpers.template.Template.async_render_to_info_in_worker",
+        wraps=template_lights.async_render_to_info_in_worker,
+    ) as render_in_worker:
+        info = async_track_template_result(
+            hass, [TrackTemplate(template_lights, None, offload=True)], lights_listener
+        )
+        await hass.async_block_till_done()
+        assert render_in_worker.call_count == 0
+
+        hass.states.async_set("light.two", "off")
+        await hass.async_block_till_done()
+        assert runs == [["on", "off"]]
+        assert render_in_worker.call_count == 1
+
+        hass.states.async_set("light.one", "off")
+        hass.states.async_set("light.two", "on")
+        await hass.async_block_till_done()
+        assert runs[-1] == ["off", "on"]
+
+        info.async_remove()
+        hass.states.async_set("light.one", "on")
+        await hass.async_block_till_done()
+        assert runs[-1] == ["off", "on"]
+
+
 async def test_static_string(hass):
     """Test a static string."""
     template_refresh = Template("{{ 'static' }}", hass)
@@ -0,0 +1,81 @@
+"""Test the executor pools."""
+import asyncio
+import threading
+
+import pytest
+
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.helpers import executor
+
+
+async def test_quota_limits_jobs_of_integration(hass):
+    """Test an integration runs at most its quota of jobs at once."""
+    pool = executor.async_get_executor_pool(hass)
+    pool.async_set_quota("slow", 2)
+
+    release = threading.Event()
+    running = []
+    lock = threading.Lock()
+
+    def slow_job():
+        """Block until released."""
+        with lock:
+            running.append(None)
+        release.wait(5)
+
+    slow_jobs = [
+        executor.async_add_executor_job(hass, "slow", slow_job) for _ in range(4)
+    ]
+    await asyncio.sleep(0.1)
+    assert len(running) == 2
+
+    # Other integrations are not held up
+    assert await executor.async_add_executor_job(hass, "fast", lambda x: x, 5) == 5
+
+    release.set()
+    await asyncio.gather(*slow_jobs)
+    assert len(running) == 4
+
+    with pytest.raises(ValueError):
+        pool.async_set_quota("slow", 3)
+
+
+async def test_executor_stats(hass):
+    """Test the stats of a pool."""
+
+    def fail():
+        """Fail the job."""
+        raise ValueError("Fake error")
+
+    await executor.async_add_executor_job(hass, "test", lambda: None)
+    with pytest.raises(ValueError):
+        await executor.async_add_executor_job(hass, "test", fail)
+
+    stats = executor.async_executor_stats(hass)[executor.DEFAULT_POOL]
+    assert stats["jobs"] == 2
+    assert stats["failures"] == 1
+    assert stats["pending"] == 0
+    assert stats["max_wait"] >= stats["average_wait"] >= 0
+    assert stats["max_run_time"] >= stats["average_run_time"] >= 0
+
+
+async def test_named_pool(hass):
+    """Test jobs run in the threads of a named pool until it is shut down."""
+    pool = executor.async_create_executor_pool(hass, "storage", 2)
+    assert pool.quota == 2
+
+    with pytest.raises(ValueError):
+        executor.async_create_executor_pool(hass, "storage", 2)
+
+    thread_name = await executor.async_add_executor_job(
+        hass, "test", lambda: threading.current_thread().name, pool="storage"
+    )
+    assert thread_name.startswith("SyncWorker_storage")
+    assert executor.async_executor_stats(hass)["storage"]["jobs"] == 1
+
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_CLOSE)
+    await hass.async_block_till_done()
+
+    assert "storage" not in executor.async_executor_stats(hass)
+    with pytest.raises(RuntimeError):
+        pool.executor.submit(lambda: None)
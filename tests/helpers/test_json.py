@@ -1,7 +1,10 @@
 """Test Home Assistant remote methods and classes."""
+import json
+
 import pytest
 
 from homeassistant import core
+from homeassistant.helpers import json as json_helper
 from homeassistant.helpers.json import JSONEncoder
 from homeassistant.util import dt as dt_util
 
@@ -19,3 +22,51 @@ def test_json_encoder(hass):
 
     now = dt_util.utcnow()
     assert ha_json_enc.default(now) == now.isoformat()
+
+
+@pytest.fixture
+def json_backend():
+    """Restore the JSON backend after a test."""
+    yield
+    json_helper.set_json_backend(json_helper.JSON_BACKEND_JSON)
+
+
+@pytest.mark.parametrize("backend", list(json_helper.JSON_BACKENDS))
+def test_json_dumps(json_backend, backend):
+    """Test serializing Home Assistant objects with each backend."""
+    assert json_helper.set_json_backend(backend) == backend
+
+    now = dt_util.utcnow()
+    state = core.State("test.test", "hello", {"tags": {"a"}, "seen": now})
+    event = core.Event("test_event", {"state": state})
+
+    assert json.loads(json_helper.json_dumps(event)) == json.loads(
+        json.dumps(event, cls=JSONEncoder)
+    )
+    assert json.loads(json_helper.json_dumps({1: now})) == {"1": now.isoformat()}
+    assert json_helper.json_dumps({"a": 1}, pretty=True) == '{\n    "a": 1\n}'
+
+    with pytest.raises(TypeError):
+        json_helper.json_dumps(object())
+
+
+def test_json_dumps_nan(json_backend):
+    """Test the json backend only writes NaN when allowed."""
+    json_helper.set_json_backend(json_helper.JSON_BACKEND_JSON)
+
+    with pytest.raises(ValueError):
+        json_helper.json_dumps(float("nan"))
+    assert json_helper.json_dumps(float("nan"), allow_nan=True) == "NaN"
+
+
+def test_set_json_backend(json_backend, caplog):
+    """Test selecting the JSON backend."""
+    expected = (
+        json_helper.JSON_BACKEND_ORJSON
+        if json_helper.JSON_BACKEND_ORJSON in json_helper.JSON_BACKENDS
+        else json_helper.JSON_BACKEND_JSON
+    )
+    assert json_helper.set_json_backend(json_helper.JSON_BACKEND_AUTO) == expected
+
+    assert json_helper.set_json_backend("unknown") == json_helper.JSON_BACKEND_JSON
+    assert "JSON backend unknown is not available" in caplog.text
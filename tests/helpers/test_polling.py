@@ -0,0 +1,147 @@
+"""Test the polling of entities."""
+import asyncio
+from datetime import timedelta
+import logging
+
+from homeassistant.helpers import polling
+from homeassistant.helpers.entity_component import EntityComponent
+import homeassistant.util.dt as dt_util
+
+from tests.async_mock import AsyncMock
+from tests.common import MockEntity, async_fire_time_changed
+
+_LOGGER = logging.getLogger(__name__)
+DOMAIN = "test_domain"
+
+
+def test_poll_jitter():
+    """Test the jitter is stable per entity and within the spread."""
+    interval = timedelta(seconds=30)
+
+    jitter = polling.poll_jitter("sensor.one", interval)
+    assert jitter == polling.poll_jitter("sensor.one", interval)
+    assert jitter != polling.poll_jitter("sensor.two", interval)
+
+    for entity_id in ("sensor.one", "sensor.two", "light.kitchen"):
+        jitter = polling.poll_jitter(entity_id, interval)
+        assert timedelta(0) <= jitter < interval * polling.POLL_SPREAD
+
+
+async def test_poll_backoff_and_stats(hass):
+    """Test failing entities are polled less often until they recover."""
+    component = EntityComponent(_LOGGER, DOMAIN, hass, timedelta(seconds=20))
+
+    updates = []
+    fail = True
+
+    def update():
+        """Mock update that fails while requested."""
+        updates.append(None)
+        if fail:
+            raise AssertionError("Fake error update")
+
+    ent = MockEntity(should_poll=True)
+    ent.update = update
+    await component.async_add_entities([ent])
+
+    now = dt_util.utcnow()
+    async_fire_time_changed(hass, now + timedelta(seconds=20))
+    await hass.async_block_till_done()
+    assert len(updates) == 1
+
+    # Polled after two scan intervals once it failed
+    async_fire_time_changed(hass, now + timedelta(seconds=30))
+    await hass.async_block_till_done()
+    assert len(updates) == 1
+
+    fail = False
+    async_fire_time_changed(hass, now + timedelta(seconds=60))
+    await hass.async_block_till_done()
+    assert len(updates) == 2
+
+    # Back to one scan interval once it recovered
+    async_fire_time_changed(hass, now + timedelta(seconds=80))
+    await hass.async_block_till_done()
+    assert len(updates) == 3
+
+    stats = polling.async_poll_stats(hass)[f"{DOMAIN}.{DOMAIN}"]
+    assert stats["polls"] == 3
+    assert stats["failures"] == 1
+    assert stats["timeouts"] == 0
+
+
+async def test_poll_stops_on_remove(hass):
+    """Test a removed entity is no longer polled."""
+    component = EntityComponent(_LOGGER, DOMAIN, hass, timedelta(seconds=20))
+
+    updates = []
+    ent = MockEntity(should_poll=True)
+    ent.update = lambda: updates.append(None)
+    await component.async_add_entities([ent])
+
+    await component.async_remove_entity(ent.entity_id)
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=20))
+    await hass.async_block_till_done()
+    assert not updates
+
+
+async def test_poll_budget_not_held_while_waiting_for_platform(hass):
+    """Test entities waiting for their platform leave the budget to others."""
+    hass.data[polling.DATA_POLL_SCHEDULER] = polling.PollScheduler(2)
+    component = EntityComponent(_LOGGER, DOMAIN, hass, timedelta(seconds=20))
+
+    release = asyncio.Event()
+    updated = []
+
+    def slow_update(name):
+        """Return an update that waits to be released."""
+
+        async def async_update():
+            await release.wait()
+            updated.append(name)
+
+        return async_update
+
+    slow = [MockEntity(should_poll=True) for _ in range(3)]
+    for idx, ent in enumerate(slow):
+        ent.async_update = slow_update(idx)
+    other = MockEntity(should_poll=True)
+    other.async_update = AsyncMock(side_effect=lambda: updated.append("other"))
+    await component.async_add_entities(slow + [other])
+
+    # The slow entities update one at a time
+    parallel_updates = asyncio.Semaphore(1)
+    for ent in slow:
+        ent.parallel_updates = parallel_updates
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=20))
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    assert updated == ["other"]
+
+    release.set()
+    await hass.async_block_till_done()
+    assert sorted(updated, key=str) == [0, 1, 2, "other"]
+
+
+async def test_poll_entity_that_starts_polling(hass):
+    """Test an entity is polled once it starts polling."""
+    component = EntityComponent(_LOGGER, DOMAIN, hass, timedelta(seconds=20))
+
+    updates = []
+    ent = MockEntity(should_poll=False)
+    ent.update = lambda: updates.append(None)
+    await component.async_add_entities([ent])
+
+    now = dt_util.utcnow()
+    async_fire_time_changed(hass, now + timedelta(seconds=20))
+    await hass.async_block_till_done()
+    assert not updates
+
+    ent._values["should_poll"] = True
+    async_fire_time_changed(hass, now + timedelta(seconds=40))
+    await hass.async_block_till_done()
+    async_fire_time_changed(hass, now + timedelta(seconds=60))
+    await hass.async_block_till_done()
+    assert updates
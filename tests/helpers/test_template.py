@@ -1,5 +1,6 @@
 """Test Home Assistant template helper methods."""
 from datetime import datetime
+import itertools
 import math
 import random
 
@@ -2082,11 +2083,187 @@ async def test_cache_garbage_collection():
         template_string
     )  # pylint: disable=protected-access
     del tpl2
+    # The compiled template cache keeps the code of unused templates
+    assert template._NO_HASS_ENV.template_cache.get(
+        template_string
+    )  # pylint: disable=protected-access
+
+    template._COMPILED_TEMPLATE_CACHE.clear()  # pylint: disable=protected-access
     assert not template._NO_HASS_ENV.template_cache.get(
         template_string
     )  # pylint: disable=protected-access
 
 
+async def test_compiled_template_cache(hass):
+    """Test environments share the compiled templates."""
+    template_string = "{{ states('sensor.compiled_template_cache') }}"
+    code = template.TemplateEnvironment(hass).compile(template_string)
+    stats = template.compiled_template_cache_stats()
+
+    assert template.TemplateEnvironment(hass).compile(template_string) is code
+    assert template.compiled_template_cache_stats()["hits"] == stats["hits"] + 1
+
+
+async def test_render_to_info_memoized(hass):
+    """Test renders are memoized while the states used don't change."""
+    hass.states.async_set("sensor.memo", "1")
+    tpl = template.Template("{{ states('sensor.memo') | int + value }}", hass)
+    stats = template.async_render_memo_stats(hass)
+
+    with patch.object(
+        template.Template, "async_render", wraps=tpl.async_render
+    ) as render:
+        assert tpl.async_render_to_info({"value": 1}).result() == 2
+        assert tpl.async_render_to_info({"value": 1}).result() == 2
+        assert render.call_count == 1
+
+        hass.states.async_set("sensor.other", "5")
+        info = tpl.async_render_to_info({"value": 1})
+        assert info.result() == 2
+        assert info.entities == {"sensor.memo"}
+        assert render.call_count == 1
+
+        assert tpl.async_render_to_info({"value": 2}).result() == 3
+        assert render.call_count == 2
+
+        hass.states.async_set("sensor.memo", "1", {"unit": "W"})
+        assert tpl.async_render_to_info({"value": 2}).result() == 3
+        assert render.call_count == 3
+
+    new_stats = template.async_render_memo_stats(hass)
+    assert new_stats["hits"] == stats["hits"] + 2
+    assert new_stats["misses"] == stats["misses"] + 3
+    assert 0 < new_stats["hit_rate"] < 1
+
+
+async def test_render_to_info_memoized_result_copied(hass):
+    """Test changing a memoized result does not change the next one."""
+    hass.states.async_set("sensor.memo", "1")
+    tpl = template.Template("{{ [states('sensor.memo')] }}", hass)
+
+    tpl.async_render_to_info().result().append("2")
+    assert tpl.async_render_to_info().result() == ["1"]
+    tpl.async_render_to_info().result().append("2")
+    assert tpl.async_render_to_info().result() == ["1"]
+
+
+async def test_render_to_info_not_memoized(hass):
+    """Test renders using the time, random values or domains are not memoized."""
+    hass.states.async_set("sensor.memo", "1")
+    for template_str in (
+        "{{ states('sensor.memo') }} {{ now() }}",
+        "{{ states('sensor.memo') }} {{ [1, 2] | random }}",
+        "{{ states.sensor | count }}",
+    ):
+        tpl = template.Template(template_str, hass)
+        with patch.object(
+            template.Template, "async_render", wraps=tpl.async_render
+        ) as render:
+            tpl.async_render_to_info()
+            tpl.async_render_to_info()
+        assert render.call_count == 2
+
+
+async def test_render_budget(hass, caplog):
+    """Test a render running out of its budget is aborted and reported."""
+    for i in range(4):
+        hass.states.async_set(f"sensor.budget_{i}", "on")
+    tpl = template.Template("{{ states.sensor | map(attribute='state') | list }}", hass)
+    tpl.render_budget = 1.5
+
+    # Every call of the clock takes a second
+    with patch(
+        "homeassistant.helpers.template.monotonic", side_effect=itertools.count()
+    ), pytest.raises(TemplateError, match="render budget of 1.5 seconds"):
+        tpl.async_render()
+
+    assert tpl.render_cost > template.SLOW_RENDER_THRESHOLD
+    assert tpl.is_expensive
+    assert template.async_slow_templates(hass) == {tpl.template: tpl.render_cost}
+    assert "Template took" in caplog.text
+
+    tpl.render_budget = None
+    assert tpl.async_render() == ["on", "on", "on", "on"]
+    assert not tpl.is_expensive
+
+
+async def test_render_budget_state_accessors(hass):
+    """Test the budget is checked when a template reads single states."""
+    hass.states.async_set("sensor.budget", "on")
+    tpl = template.Template(
+        "{% for _ in range(4) %}{{ states('sensor.budget') }}{% endfor %}", hass
+    )
+    tpl.render_budget = 1.5
+
+    with patch(
+        "homeassistant.helpers.template.monotonic", side_effect=itertools.count()
+    ), pytest.raises(TemplateError, match="render budget of 1.5 seconds"):
+        tpl.async_render()
+
+
+async def test_render_to_info_in_worker(hass):
+    """Test rendering in the executor with a snapshot of the states."""
+    hass.states.async_set("sensor.worker", "1")
+    hass.states.async_set("light.worker", "on")
+    tpl = template.Template(
+        "{{ states('sensor.worker') }} {{ states.light | count }}", hass
+    )
+    info = tpl.async_render_to_info()
+    assert info.result() == "1 1"
+
+    hass.states.async_set("sensor.worker", "2")
+    hass.states.async_set("light.other", "off")
+    hass.states.async_set("switch.worker", "on")
+    with patch(
+        "homeassistant.helpers.template._StatesSnapshot", wraps=template._StatesSnapshot
+    ) as snapshot:
+        info = await tpl.async_render_to_info_in_worker(None, info)
+    assert info.result() == "2 2"
+    assert info.template is tpl
+    assert info.entities == {"sensor.worker"}
+    assert info.domains_lifecycle == {"light"}
+    assert snapshot.call_count == 1
+
+    # The template uses a state the snapshot doesn't have
+    hass.states.async_set("sensor.switch", "switch")
+    tpl = template.Template(
+        "{{ states[states('sensor.switch') ~ '.worker'].state }}", hass
+    )
+    last_info = template.Template("{{ states('sensor.switch') }}", hass)
+    last_info = last_info.async_render_to_info()
+    with patch(
+        "homeassistant.helpers.template._StatesSnapshot", wraps=template._StatesSnapshot
+    ) as snapshot, patch(
+        "homeassistant.helpers.template.TemplateEnvironment",
+        wraps=template.TemplateEnvironment,
+    ) as environment:
+        info = await tpl.async_render_to_info_in_worker(None, last_info)
+    assert info.result() == "on"
+    assert info.entities == {"sensor.switch", "switch.worker"}
+    assert snapshot.call_count == 2
+    # The worker renders share their template environment
+    assert not environment.called
+    assert tpl.render_cost > 0
+    assert template.async_slow_templates(hass) == {}
+
+
+def test_compiled_template_cache_lru():
+    """Test the compiled template cache drops the least recently used code."""
+    cache = template.CompiledTemplateCache(2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats() == {"hits": 3, "misses": 1, "size": 2, "maxsize": 2}
+
+    cache.clear()
+    assert cache.stats() == {"hits": 0, "misses": 0, "size": 0, "maxsize": 2}
+
+
 def test_is_template_string():
     """Test is template string."""
     assert template.is_template_string("{{ x }}") is True
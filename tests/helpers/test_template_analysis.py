@@ -0,0 +1,96 @@
+"""Test finding the states a template depends on."""
+import pytest
+
+from homeassistant.helpers.template_analysis import (
+    TemplateDependencies,
+    analyze_template,
+    uses_volatile_values,
+)
+
+
+@pytest.mark.parametrize(
+    "template_str,all_states,entities,domains",
+    [
+        ("{{ 1 + 1 }}", False, set(), set()),
+        ("{{ states.sensor.Temperature.state }}", False, {"sensor.temperature"}, set()),
+        (
+            "{{ states['sensor.temperature'].state }}",
+            False,
+            {"sensor.temperature"},
+            set(),
+        ),
+        ("{{ states.sensor['temperature'] }}", False, {"sensor.temperature"}, set()),
+        (
+            "{{ states('sensor.a') }} {{ is_state('light.b', 'on') }}"
+            " {{ state_attr('light.c', 'brightness') }}"
+            " {{ is_state_attr('light.d', 'brightness', 1) }}",
+            False,
+            {"sensor.a", "light.b", "light.c", "light.d"},
+            set(),
+        ),
+        ("{{ states.light | count }}", False, set(), {"light"}),
+        ("{{ states.light[name] }}", False, set(), {"light"}),
+        (
+            "{% for state in states if state.domain == 'light' %}"
+            "{{ state.name }}{% endfor %}",
+            False,
+            set(),
+            {"light"},
+        ),
+        (
+            "{{ states | selectattr('domain', 'in', ['light', 'switch'])"
+            " | map(attribute='entity_id') | list }}",
+            False,
+            set(),
+            {"light", "switch"},
+        ),
+        ("{{ states | count }}", True, set(), set()),
+        ("{% for state in states %}{{ state.name }}{% endfor %}", True, set(), set()),
+        (
+            "{{ states | selectattr('state', 'eq', 'on') | list }}",
+            True,
+            set(),
+            set(),
+        ),
+    ],
+)
+def test_analyze_template(template_str, all_states, entities, domains):
+    """Test the states used by templates are found."""
+    assert analyze_template(template_str) == TemplateDependencies(
+        all_states, frozenset(entities), frozenset(domains)
+    )
+
+
+@pytest.mark.parametrize(
+    "template_str",
+    [
+        "{{ states(entity_id) }}",
+        "{{ states[entity_id].state }}",
+        "{{ is_state(entity_id, 'on') }}",
+        "{{ expand('group.all') | count }}",
+        "{{ ['group.all'] | expand | count }}",
+        "{{ closest(states.device_tracker) }}",
+        "{% set states = entities %}{{ states }}",
+        "{% macro show(states) %}{{ states }}{% endmacro %}",
+        "{{ states.sensor",
+    ],
+)
+def test_analyze_template_unknown(template_str):
+    """Test templates looking up states while rendering are not analyzed."""
+    assert analyze_template(template_str) is None
+
+
+@pytest.mark.parametrize(
+    "template_str,volatile",
+    [
+        ("{{ states('sensor.a') }}", False),
+        ("{{ now() }}", True),
+        ("{{ utcnow().hour }}", True),
+        ("{{ relative_time(states.sensor.a.last_changed) }}", True),
+        ("{{ [1, 2] | random }}", True),
+        ("{{ states.sensor", True),
+    ],
+)
+def test_uses_volatile_values(template_str, volatile):
+    """Test templates using the time or random values are found."""
+    assert uses_volatile_values(template_str) is volatile
@@ -3,6 +3,7 @@
 import asyncio
 from datetime import datetime, timedelta
 import functools
+import json
 import logging
 import os
 from tempfile import TemporaryDirectory
@@ -37,6 +38,7 @@ from homeassistant.exceptions import (
     InvalidStateError,
     ServiceNotFound,
 )
+from homeassistant.helpers.json import JSONEncoder
 import homeassistant.util.dt as dt_util
 from homeassistant.util.unit_system import METRIC_SYSTEM
 
@@ -336,6 +338,43 @@ def test_state_as_dict():
     assert state.as_dict() is state.as_dict()
 
 
+def test_state_as_json():
+    """Test the JSON of a State is the one of its dictionary."""
+    state = ha.State(
+        "happy.happy",
+        "on",
+        {"pig": "dog", "when": datetime(1984, 12, 8, 12, 0, 0), "ids": {1}},
+        last_changed=datetime(1984, 12, 8, 12, 0, 0),
+    )
+    assert state.as_json() == json.dumps(state.as_dict(), cls=JSONEncoder)
+    assert state.as_json() is state.as_json()
+    assert state.attributes_json() == json.dumps(
+        dict(state.attributes), cls=JSONEncoder
+    )
+    assert state.context.as_json() == json.dumps(state.context.as_dict())
+
+
+def test_state_as_json_not_serializable():
+    """Test the JSON of a State with attributes that aren't serializable."""
+    state = ha.State("happy.happy", "on", {"pig": object()})
+    with pytest.raises(TypeError):
+        state.as_json()
+
+
+def test_event_as_json():
+    """Test the JSON of an Event embeds the JSON of its states."""
+    new_state = ha.State("happy.happy", "on", {"pig": "dog"})
+    event = ha.Event(
+        EVENT_STATE_CHANGED,
+        {"entity_id": "happy.happy", "old_state": None, "new_state": new_state},
+    )
+    assert event.as_json() == json.dumps(event.as_dict(), cls=JSONEncoder)
+    assert new_state.as_json() in event.as_json()
+
+    event = ha.Event("some_type", {1: "int key"})
+    assert event.as_json() == json.dumps(event.as_dict(), cls=JSONEncoder)
+
+
 async def test_eventbus_add_remove_listener(hass):
     """Test remove_listener method."""
     old_count = len(hass.bus.async_listeners())
@@ -379,6 +418,90 @@ async def test_eventbus_unsubscribe_listener(hass):
     assert len(calls) == 1
 
 
+async def test_eventbus_listen_with_event_filter(hass):
+    """Test listening to the events of a single data value."""
+    old_listeners = hass.bus.async_listeners()
+    kitchen = []
+    kitchen_too = []
+    all_lights = []
+
+    def capture(events):
+        """Return a listener appending to events."""
+        return ha.callback(lambda event: events.append(event))
+
+    unsub_kitchen = hass.bus.async_listen(
+        "test", capture(kitchen), {"entity_id": "light.kitchen"}
+    )
+    hass.bus.async_listen("test", capture(kitchen_too), {"entity_id": "light.kitchen"})
+    hass.bus.async_listen("test", capture(all_lights))
+    assert hass.bus.async_listeners()["test"] == 3
+
+    hass.bus.async_fire("test", {"entity_id": "light.kitchen"})
+    hass.bus.async_fire("test", {"entity_id": "light.bedroom"})
+    hass.bus.async_fire("test", {"entity_id": ["light.kitchen"]})
+    hass.bus.async_fire("test")
+    hass.bus.async_fire("other", {"entity_id": "light.kitchen"})
+    await hass.async_block_till_done()
+
+    assert [event.data for event in kitchen] == [{"entity_id": "light.kitchen"}]
+    assert len(kitchen_too) == 1
+    assert len(all_lights) == 4
+
+    unsub_kitchen()
+    hass.bus.async_fire("test", {"entity_id": "light.kitchen"})
+    await hass.async_block_till_done()
+
+    assert len(kitchen) == 1
+    assert len(kitchen_too) == 2
+    assert hass.bus.async_listeners()["test"] == 2
+    assert hass.bus.async_listeners().keys() == {*old_listeners, "test"}
+
+
+async def test_eventbus_listen_with_invalid_event_filter(hass):
+    """Test event filters must have a single key and an event type."""
+    with pytest.raises(ValueError):
+        hass.bus.async_listen("test", lambda event: None, {"a": 1, "b": 2})
+
+    with pytest.raises(ValueError):
+        hass.bus.async_listen(MATCH_ALL, lambda event: None, {"a": 1})
+
+
+async def test_job_timer(hass):
+    """Test the job timer is told how long callbacks ran."""
+    timings = []
+    hass.job_timer = lambda origin, target, duration: timings.append((origin, target))
+    runs = []
+
+    @ha.callback
+    def job_callback(*args):
+        runs.append(args)
+
+    async def job_coroutine(*args):
+        runs.append(args)
+
+    hass.async_run_hass_job(ha.HassJob(job_callback), 1)
+    hass.async_add_hass_job(ha.HassJob(job_callback), 2)
+    hass.bus.async_listen("test_event", job_callback)
+    hass.bus.async_listen("test_event", job_coroutine)
+    hass.bus.async_fire("test_event")
+    hass.services.async_register("test_domain", "test_service", job_callback)
+    await hass.services.async_call("test_domain", "test_service", blocking=True)
+    await hass.async_block_till_done()
+
+    assert len(runs) == 5
+    assert timings == [
+        ("job", job_callback),
+        ("job", job_callback),
+        ("event test_event", job_callback),
+        ("service test_domain.test_service", job_callback),
+    ]
+
+    hass.job_timer = None
+    hass.async_run_hass_job(ha.HassJob(job_callback), 3)
+    assert len(runs) == 6
+    assert len(timings) == 4
+
+
 async def test_eventbus_listen_once_event_with_callback(hass):
     """Test listen_once_event method."""
     runs = []
@@ -637,6 +760,53 @@ async def test_statemachine_force_update(hass):
     assert len(events) == 1
 
 
+async def test_statemachine_changes_since(hass):
+    """Test the state machine returns the changes since a version."""
+    hass.states.async_set("light.bowl", "on")
+    hass.states.async_set("light.kitchen", "on")
+    version = hass.states.version
+
+    assert hass.states.async_changes_since(version) == ([], [])
+
+    hass.states.async_set("light.bowl", "on")
+    assert hass.states.version == version
+
+    hass.states.async_set("light.kitchen", "off")
+    hass.states.async_set("light.bowl", "off")
+    hass.states.async_set("light.kitchen", "on")
+    hass.states.async_remove("light.hall")
+    hass.states.async_set("light.hall", "on")
+    hass.states.async_remove("light.hall")
+    assert hass.states.version == version + 5
+
+    changed, removed = hass.states.async_changes_since(version)
+    assert changed == [hass.states.get("light.bowl"), hass.states.get("light.kitchen")]
+    assert removed == ["light.hall"]
+
+    changed, removed = hass.states.async_changes_since(version + 2)
+    assert changed == [hass.states.get("light.kitchen")]
+    assert removed == ["light.hall"]
+
+    assert hass.states.async_changes_since(version + 6) is None
+
+
+async def test_statemachine_changes_since_log_rolled_over(hass):
+    """Test changes since a version dropped from the change log are unknown."""
+    with patch.object(ha, "STATE_CHANGE_LOG_SIZE", 2):
+        hass.states.async_set("light.bowl", "on")
+        version = hass.states.version
+        hass.states.async_set("light.kitchen", "on")
+        hass.states.async_set("light.hall", "on")
+
+        assert hass.states.async_changes_since(version - 1) is None
+        changed, removed = hass.states.async_changes_since(version)
+        assert changed == [
+            hass.states.get("light.kitchen"),
+            hass.states.get("light.hall"),
+        ]
+        assert removed == []
+
+
 def test_service_call_repr():
     """Test ServiceCall repr."""
     call = ha.ServiceCall("homeassistant", "start")
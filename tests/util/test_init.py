@@ -251,3 +251,20 @@ async def test_throttle_async():
 
     assert (await test_method2()) is True
     assert (await test_method2()) is None
+
+
+def test_secondary_index():
+    """Test adding items to and removing them from a secondary index."""
+    index = {}
+    util.add_to_secondary_index(index, "kitchen", "one")
+    util.add_to_secondary_index(index, "kitchen", "two")
+    util.add_to_secondary_index(index, None, "three")
+    assert index == {"kitchen": {"one": None, "two": None}}
+
+    util.remove_from_secondary_index(index, "kitchen", "one")
+    util.remove_from_secondary_index(index, "hall", "two")
+    util.remove_from_secondary_index(index, None, "two")
+    assert index == {"kitchen": {"two": None}}
+
+    util.remove_from_secondary_index(index, "kitchen", "two")
+    assert index == {}
@@ -113,6 +113,13 @@ def test_custom_encoder():
     assert data == "9"
 
 
+def test_custom_dumps():
+    """Test serializing with a custom dumps callable."""
+    fname = _path_for("test7")
+    save_json(fname, {"a": 1}, dumps=lambda data: dumps({"b": data["a"]}))
+    assert load_json(fname) == {"b": 1}
+
+
 def test_find_unserializable_data():
     """Find unserializeable data."""
     assert find_paths_unserializable_data(1) == {}